@@ -8,6 +8,8 @@ from einops import rearrange
 
 import copy
 import base64
+import functools
+import hashlib
 
 import comfy.supported_models
 import node_helpers
@@ -44,8 +46,91 @@ def fp_and2(tensor1, tensor2):
 
 
 
+REGION_MASK_CACHE      = {}    # interpolated/edge masks and region vectors by content hash, shared so they outlive the AttnMask that made them
+REGION_MASK_CACHE_SIZE = 64
+
+def mask_hash(mask):
+    m = hashlib.sha256()
+    m.update(str((tuple(mask.shape), mask.dtype)).encode())
+    m.update(mask.detach().cpu().contiguous().view(torch.uint8).numpy().tobytes())
+    return m.digest().hex()
+
+def cached_region_mask(key, fn):
+    """
+    Return REGION_MASK_CACHE[key], computing it with fn() on a miss. Least recently used entries are evicted first.
+    """
+    if key in REGION_MASK_CACHE:
+        REGION_MASK_CACHE[key] = REGION_MASK_CACHE.pop(key)
+    else:
+        if len(REGION_MASK_CACHE) >= REGION_MASK_CACHE_SIZE:
+            REGION_MASK_CACHE.pop(next(iter(REGION_MASK_CACHE)))
+        REGION_MASK_CACHE[key] = fn()
+    return REGION_MASK_CACHE[key]
+
+
+
+class RegionalAttnMask:
+    """
+    Compact stand-in for a dense (L, L) regional attention mask. Each region is one (L,) vector over the token sequence
+    (its own text span followed by its flattened image mask, tiled over frames), so that
+    
+        mask[q, k] = max_r min(row_vectors[r, q], region_vectors[r, k])
+    
+    with img_rows OR'd into every image -> image entry. row_vectors are the region_vectors themselves unless the rows
+    cover a different token range than the columns (SplitAttentionMask has image rows only, and separate cross/self
+    masks per region). Host memory and host -> device transfers scale with regions * L instead of L * L. The attention
+    kernels still take a dense mask, which materialize() builds on the work device, so device memory is unchanged.
+    """
+    def __init__(self, region_vectors, shape, img_off, img_rows=None, dtype=None, row_vectors=None, img_row_off=None):
+        self.region_vectors = region_vectors   # regions, L (columns)
+        self.row_vectors    = row_vectors      # regions, rows, or None when the rows are the columns
+        self.img_rows       = img_rows         # rows - img_row_off, or None
+        self.img_off        = img_off
+        self.img_row_off    = img_off if img_row_off is None else img_row_off
+        self.shape          = tuple(shape)
+        self.dtype          = region_vectors.dtype if dtype is None else dtype
+    
+    @property
+    def device(self):
+        return self.region_vectors.device
+    
+    @property
+    def nbytes(self):
+        return sum(vectors.numel() * vectors.element_size() for vectors in (self.region_vectors, self.row_vectors, self.img_rows) if vectors is not None)
+    
+    @property
+    def dense_nbytes(self):
+        return self.shape[0] * self.shape[1] * torch.empty((), dtype=self.dtype).element_size()
+    
+    def to(self, *args, **kwargs):
+        _, dtype, _, _ = torch._C._nn._parse_to(*args, **kwargs)
+        img_rows       = self.img_rows   .to(*args, **kwargs) if self.img_rows    is not None else None
+        row_vectors    = self.row_vectors.to(*args, **kwargs) if self.row_vectors is not None else None
+        region_vectors = self.region_vectors.to(*args, **kwargs)
+        return RegionalAttnMask(region_vectors, self.shape, self.img_off, img_rows, dtype=self.dtype if dtype is None else dtype, row_vectors=row_vectors, img_row_off=self.img_row_off)
+    
+    def materialize(self):
+        """
+        Build the dense (L, L) mask on the device the vectors live on.
+        """
+        mask        = torch.zeros(self.shape, dtype=self.dtype, device=self.device)
+        row_vectors = self.region_vectors if self.row_vectors is None else self.row_vectors
+        for row_vector, region_vector in zip(row_vectors, self.region_vectors):
+            torch.maximum(mask, fp_and(row_vector.unsqueeze(1), region_vector.unsqueeze(0)), out=mask)
+        
+        if self.img_rows is not None:
+            block = mask[self.img_row_off:, self.img_off:]
+            torch.maximum(block, self.img_rows.unsqueeze(1), out=block)
+        
+        return mask
+
+
+
 class CoreAttnMask:
     def __init__(self, mask, mask_type=None, start_sigma=None, end_sigma=None, start_block=0, end_block=-1, idle_device='cpu', work_device='cuda'):
+        self.device_masks      = {}    # raw mask, one copy per device
+        self.bytes_transferred = 0
+        
         self.mask        = mask.to(idle_device)
         self.start_sigma = start_sigma
         self.end_sigma   = end_sigma
@@ -55,13 +140,83 @@ class CoreAttnMask:
         self.idle_device = idle_device
         self.mask_type   = mask_type
     
+    @property
+    def mask(self):
+        if self._mask is None:                            # compact mask, only build the dense one on the host when asked for
+            self._mask         = self.regional.materialize()
+            self._mask_version = self._mask._version
+            self.regional      = None
+        return self._mask
+    
+    @mask.setter
+    def mask(self, mask):
+        if isinstance(mask, RegionalAttnMask):
+            self._mask         = None
+            self._mask_version = None
+            self.regional      = mask
+        else:
+            self._mask         = mask
+            self._mask_version = mask._version
+            self.regional      = None
+        self.clear_device_cache()
+    
+    @property
+    def dtype(self):
+        return self.regional.dtype if self._mask is None else self._mask.dtype
+    
+    @property
+    def shape(self):
+        return self.regional.shape if self._mask is None else tuple(self._mask.shape)
+    
+    def recast(self, dtype):
+        if self.dtype != dtype:
+            self.mask = self.regional.to(dtype) if self._mask is None else self._mask.to(dtype)
+    
+    def clear_device_cache(self):
+        self.device_masks.clear()
+    
     def set_sigma_range(self, start_sigma, end_sigma):
         self.start_sigma = start_sigma
         self.end_sigma   = end_sigma
+        self.clear_device_cache()
         
     def set_block_range(self, start_block, end_block):
         self.start_block = start_block
         self.end_block   = end_block
+    
+    def to_device(self, device=None):
+        """
+        Return the raw mask on device, only copying it over when the mask has been reassigned or modified in place since the last transfer.
+        """
+        device = self.work_device if device is None else device
+        
+        if self._mask is not None and self._mask._version != self._mask_version:
+            self._mask_version = self._mask._version
+            self.clear_device_cache()
+        
+        key = str(device)
+        if key not in self.device_masks:
+            if self._mask is None:                        # only the compact form crosses the bus, the dense mask is built on device
+                regional = self.regional.to(device)
+                if regional.device != self.regional.device:
+                    self.bytes_transferred += self.regional.nbytes
+                mask = regional.materialize()
+            else:
+                mask = self._mask.to(device)
+                if mask is not self._mask:
+                    self.bytes_transferred += self._mask.numel() * self._mask.element_size()
+            self.device_masks[key] = mask
+        return self.device_masks[key]
+    
+    def get_mask(self, weight=1.0, mask_type=None):
+        """
+        Weighted (gradient) or thresholded mask built from the resident device copy. Always a new tensor, as callers
+        modify it in place (e.g. the SD3.5 floor clamp) and the weight changes every step.
+        """
+        mask_type = self.mask_type if mask_type is None else mask_type
+        gradient  = mask_type.startswith("gradient")
+        mask      = self.to_device()
+        return mask * weight if gradient else mask > 0
 
     def __call__(self, weight=1.0, mask_type=None, transformer_options=None, block_idx=0):
         """ 
@@ -72,18 +227,16 @@ class CoreAttnMask:
         if block_idx > self.end_block and self.end_block > 0:
             return None
         
-        mask_type = self.mask_type if mask_type is None else mask_type
-        
         if transformer_options is None:
-            return self.mask.to(self.work_device) * weight if mask_type.startswith("gradient") else self.mask.to(self.work_device) > 0
+            return self.get_mask(weight, mask_type)
 
         sigma = transformer_options['sigmas'][0].to(self.start_sigma.device)
         
         if self.start_sigma is not None and self.end_sigma is not None:
             if self.start_sigma >= sigma > self.end_sigma:
-                return self.mask.to(self.work_device) * weight if mask_type.startswith("gradient") else self.mask.to(self.work_device) > 0
+                return self.get_mask(weight, mask_type)
         else:
-            return self.mask.to(self.work_device) * weight if mask_type.startswith("gradient") else self.mask.to(self.work_device) > 0
+            return self.get_mask(weight, mask_type)
         
         return None
 
@@ -104,6 +257,7 @@ class BaseAttentionMask:
         self.context_lens         = []
         self.context_lens_list    = []
         self.masks                = []
+        self.mask_keys            = []
         
         self.num_regions          = 0
         
@@ -136,6 +290,7 @@ class BaseAttentionMask:
     def add_region(self, context, mask):
         self.context_lens.append(context.shape[-2])
         self.masks       .append(mask)
+        self.mask_keys   .append(None)
         
         self.text_len = sum(self.context_lens)
         self.text_off = self.text_len
@@ -147,6 +302,7 @@ class BaseAttentionMask:
         self.context_lens     .append(sum(context_size_list))
         self.context_lens_list.append(    context_size_list)
         self.masks            .append(mask)
+        self.mask_keys        .append(None)
         
         self.text_len = sum(sum(sublist) for sublist in self.context_lens_list)
         self.text_off = self.text_len
@@ -160,6 +316,7 @@ class BaseAttentionMask:
     def clear_regions(self):
         self.context_lens  = []
         self.masks         = []
+        self.mask_keys     = []
         self.text_len      = 0
         self.text_off      = 0
         self.num_regions   = 0
@@ -171,8 +328,39 @@ class BaseAttentionMask:
         return self.attn_mask(**kwargs)
     
     def attn_mask_recast(self, dtype):
-        if self.attn_mask.mask.dtype != dtype:
-            self.attn_mask.mask = self.attn_mask.mask.to(dtype)
+        self.attn_mask.recast(dtype)
+    
+    def mask_key(self, mask):
+        """
+        Content hash of one of the region masks, reused until that mask is modified. None for any other (derived) mask.
+        """
+        for idx, region_mask in enumerate(self.masks):
+            if mask is region_mask:
+                if self.mask_keys[idx] is None or self.mask_keys[idx][0] != mask._version:
+                    self.mask_keys[idx] = (mask._version, mask_hash(mask))
+                return self.mask_keys[idx][1]
+        return None
+    
+    def interpolate_mask(self, mask, dtype, mask_key=None):
+        mask_key    = self.mask_key(mask) if mask_key is None else mask_key
+        interpolate = lambda: F.interpolate(mask.unsqueeze(0).to(torch.float16), (self.h, self.w), mode='nearest-exact').to(dtype).flatten()
+        if mask_key is None:
+            return interpolate()
+        return cached_region_mask(("interpolate", mask_key, self.h, self.w, dtype), interpolate)
+    
+    def edge_mask(self, mask, dilation):
+        mask_key = self.mask_key(mask)
+        if mask_key is None:
+            return get_edge_mask(mask, dilation=dilation)
+        return cached_region_mask(("edge", mask_key, dilation), lambda: get_edge_mask(mask, dilation=dilation))
+    
+    @property
+    def bytes_transferred(self):
+        total = 0
+        for attn_mask in (self.attn_mask, getattr(self, 'cross_self_mask', None)):
+            if isinstance(attn_mask, CoreAttnMask):
+                total += attn_mask.bytes_transferred
+        return total
 
 
 
@@ -185,93 +373,80 @@ class FullAttentionMask(BaseAttentionMask):
         text_len  = self.text_len
         img_len   = self.img_len
         t         = self.t
-        h         = self.h
-        w         = self.w
         
         if self.edge_width_list is None:
             self.edge_width_list = [self.edge_width] * self.num_regions
         
-        attn_mask = torch.zeros((text_off+t*img_len, text_len+t*img_len), dtype=dtype)
-        
-        #cross_self_mask = torch.zeros((t*img_len, t*img_len), dtype=torch.float16)
+        # each region attends txt <-> txt within its own span, txt <-> regional img, and regional img <-> regional img.
+        # all of that is max_r min(v_r[q], v_r[k]) with v_r = [txt span, img mask], so only the vectors are stored
+        # regions whose mask, span and latent size are unchanged since a previous generate() are reused from the cache
+        mask_keys      = [self.mask_key(mask) for mask in self.masks]
+        img_masks      = [self.interpolate_mask(mask, dtype, mask_key) for mask, mask_key in zip(self.masks, mask_keys)]
+        region_vectors = []
         
         prev_len = 0
-        for context_len, mask in zip(self.context_lens, self.masks):
-            
-            img2txt_mask    = F.interpolate(mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, context_len)
-            img2txt_mask_sq = F.interpolate(mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
-
+        for context_len, img_mask, mask_key in zip(self.context_lens, img_masks, mask_keys):
             curr_len = prev_len + context_len
             
-            attn_mask[prev_len:curr_len, prev_len:curr_len] = 1.0                                         # self             TXT 2 TXT
-            attn_mask[prev_len:curr_len, text_len:        ] = img2txt_mask.transpose(-1, -2).repeat(1,t)  # cross            TXT 2 regional IMG    # txt2img_mask
-            attn_mask[text_off:        , prev_len:curr_len] = img2txt_mask.repeat(t,1)                    # cross   regional IMG 2 TXT
-
-            attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], fp_and(img2txt_mask_sq.repeat(t,t), img2txt_mask_sq.transpose(-1, -2).repeat(t,t))) # img2txt_mask_sq, txt2img_mask_sq
-            
-            #cross_self_mask[:,:] = fp_or(cross_self_mask, fp_and(img2txt_mask_sq.repeat(t,t), (1-img2txt_mask_sq).transpose(-1, -2).repeat(t,t)))
+            region_key = ("region", mask_key, prev_len, curr_len, text_len, t, self.h, self.w, dtype)
+            region_vectors.append(cached_region_mask(region_key, functools.partial(self.region_vector, img_mask, prev_len, curr_len, dtype)))
             
             prev_len = curr_len
-            
+        
+        region_vectors = torch.stack(region_vectors)
+        
+        # image tokens that attend to the whole image (unmasked regions, edges, regions without a self-attn mask)
+        img_rows = []
+        
         if self.mask_type.endswith("_masked") or self.mask_type.endswith("_A") or self.mask_type.endswith("_AB") or self.mask_type.endswith("_AC") or self.mask_type.endswith("_A,unmasked"):
-            img2txt_mask_sq = F.interpolate(self.masks[0].unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
-            attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
+            img_rows.append(img_masks[0])
         
         if self.mask_type.endswith("_unmasked") or self.mask_type.endswith("_C") or self.mask_type.endswith("_BC") or self.mask_type.endswith("_AC") or self.mask_type.endswith("_B,unmasked") or self.mask_type.endswith("_A,unmasked"):
-            img2txt_mask_sq = F.interpolate(self.masks[-1].unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
-            attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
+            img_rows.append(img_masks[-1])
             
         if self.mask_type.endswith("_B") or self.mask_type.endswith("_AB") or self.mask_type.endswith("_BC") or self.mask_type.endswith("_B,unmasked"):
-            img2txt_mask_sq = F.interpolate(self.masks[1].unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
-            attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
+            img_rows.append(img_masks[1])
             
         if self.edge_width > 0:
+            edge_key  = ("edges", tuple(mask_keys), self.edge_width)
             edge_mask = torch.zeros_like(self.masks[0])
             for mask in self.masks:
-                edge_mask = fp_or(edge_mask, get_edge_mask(mask, dilation=self.edge_width))
+                edge_mask = fp_or(edge_mask, self.edge_mask(mask, dilation=self.edge_width))
                 
-            img2txt_mask_sq = F.interpolate(edge_mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
-            attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
+            img_rows.append(self.interpolate_mask(edge_mask, dtype, edge_key))
             
-        elif self.edge_width_list is not None:
+        elif self.edge_width_list is not None and any(edge_width != 0 for edge_width in self.edge_width_list):
+            edge_key  = ("edges", tuple(mask_keys), tuple(self.edge_width_list))
             edge_mask = torch.zeros_like(self.masks[0])
             
             for mask, edge_width in zip(self.masks, self.edge_width_list):
                 if edge_width != 0:
-                    edge_mask_new = get_edge_mask(mask, dilation=abs(edge_width))
+                    edge_mask_new = self.edge_mask(mask, dilation=abs(edge_width))
                     edge_mask     = fp_or(edge_mask, fp_and(edge_mask_new, mask)) #fp_and here is to ensure edge_mask only grows into the region for current mask
-                    
-                    img2txt_mask_sq = F.interpolate(edge_mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
-                    attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
+            
+            img_rows.append(self.interpolate_mask(edge_mask, dtype, edge_key))
             
         if self.use_self_attn_mask_list is not None:
-            for mask, use_self_attn_mask in zip(self.masks, self.use_self_attn_mask_list):
+            for img_mask, use_self_attn_mask in zip(img_masks, self.use_self_attn_mask_list):
                 if not use_self_attn_mask:
-                    img2txt_mask_sq = F.interpolate(mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
-                    attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
-        
+                    img_rows.append(img_mask)
         
-        #cmask = torch.zeros((text_len+t*img_len), dtype=torch.bfloat16)
-        #cmask[text_len:] = cross_self_mask #cmask[text_len:] + 0.25 * cross_self_mask
+        img_rows = None if not img_rows else functools.reduce(fp_or, img_rows).repeat(t)
         
-        #self.cross_self_mask = CoreAttnMask(cmask[None,None,...,None],     mask_type=mask_type)   # shape: 1, 1, txt_len+img_len, 1
-        #self.cross_self_mask = CoreAttnMask(cross_self_mask[None,None,...,None],     mask_type=mask_type)   # shape: 1, 1, txt_len+img_len, 1
-        #self.cross_self_mask = CoreAttnMask(cross_self_mask[None,None,...,None],     mask_type=mask_type)   # shape: 1, 1, txt_len+img_len, 1
+        attn_mask = RegionalAttnMask(region_vectors, (text_off+t*img_len, text_len+t*img_len), img_off=text_off, img_rows=img_rows)
+        cross_self_mask = RegionalAttnMask(torch.zeros((0, img_len), dtype=torch.bfloat16), (img_len, img_len), img_off=img_len)
         
-        """
-        cross_self_mask = F.interpolate(self.masks[0].unsqueeze(0).to(torch.bfloat16), (h, w), mode='nearest-exact').to(torch.bfloat16).flatten()#.unsqueeze(1) # .repeat(1, img_len)
+        RESplain("Attention mask:", attn_mask.nbytes, "bytes compact,", attn_mask.dense_nbytes, "bytes dense", debug=True)
 
-        edge_mask = get_edge_mask(self.masks[0], dilation=80)
-        edge_mask = F.interpolate(edge_mask.unsqueeze(0).to(torch.bfloat16), (h, w), mode='nearest-exact').flatten().unsqueeze(1).repeat(1, img_len)
-
-        attn_mask[text_off:, text_len:] = F.interpolate((1-self.masks[0]).unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
-        attn_mask = attn_mask.to(torch.bfloat16)
-
-        edge_mask = edge_mask.to(torch.bfloat16)"""
-
-        self.cross_self_mask = CoreAttnMask(torch.zeros_like(img2txt_mask_sq).to(torch.bfloat16).squeeze(),     mask_type=mask_type)
+        self.cross_self_mask = CoreAttnMask(cross_self_mask, mask_type=mask_type)
         
-        self.attn_mask       = CoreAttnMask(attn_mask, mask_type=mask_type)
+        self.attn_mask       = CoreAttnMask(attn_mask,       mask_type=mask_type)
+    
+    def region_vector(self, img_mask, prev_len, curr_len, dtype):
+        region_vector = torch.zeros((self.text_len+self.t*self.img_len,), dtype=dtype)
+        region_vector[prev_len:curr_len     ] = 1.0
+        region_vector[self.text_len:        ] = img_mask.repeat(self.t)
+        return region_vector
 
 
 
@@ -300,7 +475,7 @@ class FullAttentionMaskHiDream(BaseAttentionMask):
         prev_len = 0
         for context_len, mask in zip(self.context_lens, self.masks):
 
-            img2txt_mask_sq = F.interpolate(mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
+            img2txt_mask_sq = self.interpolate_mask(mask, dtype).unsqueeze(1).repeat(1, img_len)
 
             curr_len = prev_len + context_len
             
@@ -312,33 +487,33 @@ class FullAttentionMaskHiDream(BaseAttentionMask):
         self.self_attn_mask = attn_mask[text_off:, text_len:].clone()
         
         if self.mask_type.endswith("_masked") or self.mask_type.endswith("_A") or self.mask_type.endswith("_AB") or self.mask_type.endswith("_AC") or self.mask_type.endswith("_A,unmasked"):
-            img2txt_mask_sq = F.interpolate(self.masks[0].unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
+            img2txt_mask_sq = self.interpolate_mask(self.masks[0], dtype).unsqueeze(1).repeat(1, img_len)
             attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
         
         if self.mask_type.endswith("_unmasked") or self.mask_type.endswith("_C") or self.mask_type.endswith("_BC") or self.mask_type.endswith("_AC") or self.mask_type.endswith("_B,unmasked") or self.mask_type.endswith("_A,unmasked"):
-            img2txt_mask_sq = F.interpolate(self.masks[-1].unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
+            img2txt_mask_sq = self.interpolate_mask(self.masks[-1], dtype).unsqueeze(1).repeat(1, img_len)
             attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
             
         if self.mask_type.endswith("_B") or self.mask_type.endswith("_AB") or self.mask_type.endswith("_BC") or self.mask_type.endswith("_B,unmasked"):
-            img2txt_mask_sq = F.interpolate(self.masks[1].unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
+            img2txt_mask_sq = self.interpolate_mask(self.masks[1], dtype).unsqueeze(1).repeat(1, img_len)
             attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
         
         if   self.edge_width > 0:
             edge_mask = torch.zeros_like(self.masks[0])
             for mask in self.masks:
-                edge_mask_new = get_edge_mask(mask, dilation=abs(self.edge_width))
+                edge_mask_new = self.edge_mask(mask, dilation=abs(self.edge_width))
                 edge_mask = fp_or(edge_mask, edge_mask_new)
                 #edge_mask = fp_or(edge_mask, get_edge_mask(mask, dilation=self.edge_width))
                 
-            img2txt_mask_sq = F.interpolate(edge_mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
+            img2txt_mask_sq = self.interpolate_mask(edge_mask, dtype).unsqueeze(1).repeat(1, img_len)
             attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
             
         elif self.edge_width < 0: # edge masks using cross-attn too
             edge_mask = torch.zeros_like(self.masks[0])
             for mask in self.masks:
-                edge_mask = fp_or(edge_mask, get_edge_mask(mask, dilation=abs(self.edge_width)))
+                edge_mask = fp_or(edge_mask, self.edge_mask(mask, dilation=abs(self.edge_width)))
                 
-            img2txt_mask_sq = F.interpolate(edge_mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
+            img2txt_mask_sq = self.interpolate_mask(edge_mask, dtype).unsqueeze(1).repeat(1, img_len)
             attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
         
         elif self.edge_width_list is not None:
@@ -346,16 +521,16 @@ class FullAttentionMaskHiDream(BaseAttentionMask):
             
             for mask, edge_width in zip(self.masks, self.edge_width_list):
                 if edge_width != 0:
-                    edge_mask_new = get_edge_mask(mask, dilation=abs(edge_width))
+                    edge_mask_new = self.edge_mask(mask, dilation=abs(edge_width))
                     edge_mask     = fp_or(edge_mask, fp_and(edge_mask_new, mask)) #fp_and here is to ensure edge_mask only grows into the region for current mask
                     
-                    img2txt_mask_sq = F.interpolate(edge_mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
+                    img2txt_mask_sq = self.interpolate_mask(edge_mask, dtype).unsqueeze(1).repeat(1, img_len)
                     attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
             
         if self.use_self_attn_mask_list is not None:
             for mask, use_self_attn_mask in zip(self.masks, self.use_self_attn_mask_list):
                 if not use_self_attn_mask:
-                    img2txt_mask_sq = F.interpolate(mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
+                    img2txt_mask_sq = self.interpolate_mask(mask, dtype).unsqueeze(1).repeat(1, img_len)
                     attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
 
         text_len_t5     = sum(sublist[0] for sublist in self.context_lens_list)
@@ -364,14 +539,14 @@ class FullAttentionMaskHiDream(BaseAttentionMask):
         reg_num_slice   = 0
         for context_len, mask_slice, edge_width in zip(self.context_lens, self.masks, self.edge_width_list):
             if self.edge_width < 0: # edge masks using cross-attn too
-                mask_slice = fp_or(mask_slice, get_edge_mask(mask_slice, dilation=abs(self.edge_width)))
+                mask_slice = fp_or(mask_slice, self.edge_mask(mask_slice, dilation=abs(self.edge_width)))
             if edge_width < 0: # edge masks using cross-attn too
-                mask_slice = fp_or(mask_slice, get_edge_mask(mask_slice, dilation=abs(edge_width)))
+                mask_slice = fp_or(mask_slice, self.edge_mask(mask_slice, dilation=abs(edge_width)))
             
             slice_len     = self.context_lens_list[reg_num_slice][0]
             offset_t5_end = offset_t5_start + slice_len
             
-            img2txt_mask_slice = F.interpolate(mask_slice.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, slice_len)
+            img2txt_mask_slice = self.interpolate_mask(mask_slice, dtype).unsqueeze(1).repeat(1, slice_len)
             
             img2txt_mask_t5[:, offset_t5_start:offset_t5_end] = img2txt_mask_slice
             
@@ -384,14 +559,14 @@ class FullAttentionMaskHiDream(BaseAttentionMask):
         reg_num_slice      = 0
         for context_len, mask_slice, edge_width in zip(self.context_lens, self.masks, self.edge_width_list):
             if self.edge_width < 0: # edge masks using cross-attn too
-                mask_slice = fp_or(mask_slice, get_edge_mask(mask_slice, dilation=abs(self.edge_width)))
+                mask_slice = fp_or(mask_slice, self.edge_mask(mask_slice, dilation=abs(self.edge_width)))
             if edge_width < 0: # edge masks using cross-attn too
-                mask_slice = fp_or(mask_slice, get_edge_mask(mask_slice, dilation=abs(edge_width)))
+                mask_slice = fp_or(mask_slice, self.edge_mask(mask_slice, dilation=abs(edge_width)))
                 
             slice_len        = self.context_lens_list[reg_num_slice][1]
             offset_llama_end = offset_llama_start + slice_len
             
-            img2txt_mask_slice = F.interpolate(mask_slice.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, slice_len)
+            img2txt_mask_slice = self.interpolate_mask(mask_slice, dtype).unsqueeze(1).repeat(1, slice_len)
             
             img2txt_mask_llama[:, offset_llama_start:offset_llama_end] = img2txt_mask_slice
             
@@ -427,10 +602,9 @@ class FullAttentionMaskHiDream(BaseAttentionMask):
         w         = self.w
         
         if self.edge_width_list is None:
-            return self.attn_mask.mask
+            return self.attn_mask.to_device('cuda')
         else:
-            #attn_mask = self.attn_mask.mask.clone()
-            attn_mask = torch.zeros_like(self.attn_mask.mask)
+            attn_mask = torch.zeros(self.attn_mask.shape, dtype=self.attn_mask.dtype)
             attn_mask[text_off:, text_len:] = self.self_attn_mask.clone()
             edge_mask = torch.zeros_like(self.masks[0])
             
@@ -441,10 +615,10 @@ class FullAttentionMaskHiDream(BaseAttentionMask):
                 if edge_width != 0:
                     #edge_width *= (block_idx/48)
                     #edge_width = int(edge_width)
-                    edge_mask_new = get_edge_mask(mask, dilation=abs(edge_width))
+                    edge_mask_new = self.edge_mask(mask, dilation=abs(edge_width))
                     edge_mask     = fp_or(edge_mask, fp_and(edge_mask_new, mask)) #fp_and here is to ensure edge_mask only grows into the region for current mask
                     
-                    img2txt_mask_sq = F.interpolate(edge_mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
+                    img2txt_mask_sq = self.interpolate_mask(edge_mask, dtype).unsqueeze(1).repeat(1, img_len)
                     
                     attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
 
@@ -452,7 +626,7 @@ class FullAttentionMaskHiDream(BaseAttentionMask):
             if self.use_self_attn_mask_list is not None:
                 for mask, use_self_attn_mask in zip(self.masks, self.use_self_attn_mask_list):
                     if not use_self_attn_mask:
-                        img2txt_mask_sq = F.interpolate(mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, img_len)
+                        img2txt_mask_sq = self.interpolate_mask(mask, dtype).unsqueeze(1).repeat(1, img_len)
                         attn_mask[text_off:, text_len:] = fp_or(attn_mask[text_off:, text_len:], img2txt_mask_sq)
 
             text_len_t5     = sum(sublist[0] for sublist in self.context_lens_list)
@@ -461,14 +635,14 @@ class FullAttentionMaskHiDream(BaseAttentionMask):
             reg_num_slice   = 0
             for context_len, mask_slice, edge_width in zip(self.context_lens, self.masks, self.edge_width_list):
                 if self.edge_width < 0: # edge masks using cross-attn too
-                    mask_slice = fp_or(mask_slice, get_edge_mask(mask_slice, dilation=abs(self.edge_width)))
+                    mask_slice = fp_or(mask_slice, self.edge_mask(mask_slice, dilation=abs(self.edge_width)))
                 if edge_width < 0: # edge masks using cross-attn too
-                    mask_slice = fp_or(mask_slice, get_edge_mask(mask_slice, dilation=abs(edge_width)))
+                    mask_slice = fp_or(mask_slice, self.edge_mask(mask_slice, dilation=abs(edge_width)))
                 
                 slice_len     = self.context_lens_list[reg_num_slice][0]
                 offset_t5_end = offset_t5_start + slice_len
                 
-                img2txt_mask_slice = F.interpolate(mask_slice.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, slice_len)
+                img2txt_mask_slice = self.interpolate_mask(mask_slice, dtype).unsqueeze(1).repeat(1, slice_len)
                 
                 img2txt_mask_t5[:, offset_t5_start:offset_t5_end] = img2txt_mask_slice
                 
@@ -481,14 +655,14 @@ class FullAttentionMaskHiDream(BaseAttentionMask):
             reg_num_slice      = 0
             for context_len, mask_slice, edge_width in zip(self.context_lens, self.masks, self.edge_width_list):
                 if self.edge_width < 0: # edge masks using cross-attn too
-                    mask_slice = fp_or(mask_slice, get_edge_mask(mask_slice, dilation=abs(self.edge_width)))
+                    mask_slice = fp_or(mask_slice, self.edge_mask(mask_slice, dilation=abs(self.edge_width)))
                 if edge_width < 0: # edge masks using cross-attn too
-                    mask_slice = fp_or(mask_slice, get_edge_mask(mask_slice, dilation=abs(edge_width)))
+                    mask_slice = fp_or(mask_slice, self.edge_mask(mask_slice, dilation=abs(edge_width)))
                     
                 slice_len        = self.context_lens_list[reg_num_slice][1]
                 offset_llama_end = offset_llama_start + slice_len
                 
-                img2txt_mask_slice = F.interpolate(mask_slice.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, slice_len)
+                img2txt_mask_slice = self.interpolate_mask(mask_slice, dtype).unsqueeze(1).repeat(1, slice_len)
                 
                 img2txt_mask_llama[:, offset_llama_start:offset_llama_end] = img2txt_mask_slice
                 
@@ -658,11 +832,13 @@ class SplitAttentionMask(BaseAttentionMask):
         if self.edge_width_list is None:
             self.edge_width_list = [self.edge_width] * self.num_regions
         
-        cross_attn_mask = torch.zeros((t * img_len,    text_len), dtype=dtype)
-        self_attn_mask  = torch.zeros((t * img_len, t * img_len), dtype=dtype)
-    
+        # rows are image tokens only, columns are txt followed by img. each region is an img -> txt (cross) vector over its
+        # text span and an img -> img (self) vector, with mask[q, k] = max_r min(row_r[q], v_r[k]), so only the vectors are stored
+        row_vectors    = []
+        region_vectors = []
+        self_masks     = []
+        
         prev_len = 0
-        self_masks = []
         for context_len, mask in zip(self.context_lens, self.masks):
 
             cross_mask, self_mask = None, None
@@ -696,71 +872,74 @@ class SplitAttentionMask(BaseAttentionMask):
                 mask.unsqueeze_(0)
                 
             if cross_mask is not None:
-                img2txt_mask    = F.interpolate(cross_mask.unsqueeze(0).unsqueeze(0).to(torch.float16), (t_mask, h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1)
+                img2txt_mask    = F.interpolate(cross_mask.unsqueeze(0).unsqueeze(0).to(torch.float16), (t_mask, h, w), mode='nearest-exact').to(dtype).flatten()
             else:
-                img2txt_mask    = F.interpolate(      mask.unsqueeze(0).unsqueeze(0).to(torch.float16), (t_mask, h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1)
+                img2txt_mask    = F.interpolate(      mask.unsqueeze(0).unsqueeze(0).to(torch.float16), (t_mask, h, w), mode='nearest-exact').to(dtype).flatten()
             
-            if t_mask == 1: # ...why only if == 1?
-                img2txt_mask = img2txt_mask.repeat(1, context_len)   
+            if t_mask == 1:
+                img2txt_mask = img2txt_mask.repeat(t)
 
             curr_len = prev_len + context_len
             
-            if t_mask == 1:
-                cross_attn_mask[:, prev_len:curr_len] = img2txt_mask.repeat(t,1)
-            else:
-                cross_attn_mask[:, prev_len:curr_len] = img2txt_mask
+            img2img_mask = self.frame_vector(self_mask if self_mask is not None else mask, dtype)
+            self_masks.append(img2img_mask)
             
-            if self_mask is not None:
-                img2txt_mask_sq = F.interpolate(self_mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, t_mask * img_len)
-            else:
-                img2txt_mask_sq = F.interpolate(     mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, t_mask * img_len)
-            self_masks.append(img2txt_mask_sq)
+            cross_vector = torch.zeros((text_len+t*img_len,), dtype=dtype)
+            cross_vector[prev_len:curr_len] = 1.0
+            self_vector  = torch.zeros((text_len+t*img_len,), dtype=dtype)
+            self_vector [text_len:        ] = img2img_mask
             
-            if t_mask > 1:
-                self_attn_mask = fp_or(self_attn_mask, fp_and(img2txt_mask_sq, img2txt_mask_sq.transpose(-1,-2)))
-            else:
-                self_attn_mask = fp_or(self_attn_mask, fp_and(img2txt_mask_sq.repeat(t,t), img2txt_mask_sq.transpose(-1,-2)).repeat(t,t))
+            row_vectors   .extend((img2txt_mask, img2img_mask))
+            region_vectors.extend((cross_vector, self_vector))
             
             prev_len = curr_len
-
+        
+        # image tokens that attend to the whole image (unmasked regions, edges, regions without a self-attn mask)
+        img_rows = []
+        
         if self.mask_type.endswith("_masked") or self.mask_type.endswith("_A") or self.mask_type.endswith("_AB") or self.mask_type.endswith("_AC") or self.mask_type.endswith("_A,unmasked"):
-            self_attn_mask = fp_or(self_attn_mask, self_masks[0])
+            img_rows.append(self_masks[0])
         
         if self.mask_type.endswith("_unmasked") or self.mask_type.endswith("_C") or self.mask_type.endswith("_BC") or self.mask_type.endswith("_AC") or self.mask_type.endswith("_B,unmasked") or self.mask_type.endswith("_A,unmasked"):
-            self_attn_mask = fp_or(self_attn_mask, self_masks[-1])
+            img_rows.append(self_masks[-1])
             
         if self.mask_type.endswith("_B") or self.mask_type.endswith("_AB") or self.mask_type.endswith("_BC") or self.mask_type.endswith("_B,unmasked"):
-            self_attn_mask = fp_or(self_attn_mask, self_masks[1])
+            img_rows.append(self_masks[1])
             
         if   self.edge_width > 0:
             edge_mask = torch.zeros_like(self.masks[0])
             for mask in self.masks:
-                edge_mask_new = get_edge_mask(mask, dilation=abs(self.edge_width))
-                edge_mask = fp_or(edge_mask, edge_mask_new)
-                #edge_mask = fp_or(edge_mask, get_edge_mask(mask, dilation=self.edge_width))
+                edge_mask = fp_or(edge_mask, self.edge_mask(mask, dilation=abs(self.edge_width)))
             
-            img2txt_mask_sq = F.interpolate(edge_mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, t_mask * img_len)
-            self_attn_mask = fp_or(self_attn_mask, img2txt_mask_sq)
+            img_rows.append(self.frame_vector(edge_mask, dtype))
             
-        elif self.edge_width_list is not None:
+        elif self.edge_width_list is not None and any(edge_width != 0 for edge_width in self.edge_width_list):
             edge_mask = torch.zeros_like(self.masks[0])
             
             for mask, edge_width in zip(self.masks, self.edge_width_list):
                 if edge_width != 0:
-                    edge_mask_new = get_edge_mask(mask, dilation=abs(edge_width))
+                    edge_mask_new = self.edge_mask(mask, dilation=abs(edge_width))
                     edge_mask     = fp_or(edge_mask, fp_and(edge_mask_new, mask)) #fp_and here is to ensure edge_mask only grows into the region for current mask
-                    
-                    img2txt_mask_sq = F.interpolate(edge_mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, t_mask * img_len)
-                    self_attn_mask = fp_or(self_attn_mask, img2txt_mask_sq)
+            
+            img_rows.append(self.frame_vector(edge_mask, dtype))
             
         if self.use_self_attn_mask_list is not None:
             for mask, use_self_attn_mask in zip(self.masks, self.use_self_attn_mask_list):
                 if not use_self_attn_mask:
-                    img2txt_mask_sq = F.interpolate(mask.unsqueeze(0).to(torch.float16), (h, w), mode='nearest-exact').to(dtype).flatten().unsqueeze(1).repeat(1, t_mask * img_len)
-                    self_attn_mask = fp_or(self_attn_mask, img2txt_mask_sq)
+                    img_rows.append(self.frame_vector(mask, dtype))
+        
+        img_rows = None if not img_rows else functools.reduce(fp_or, img_rows)
         
+        attn_mask = RegionalAttnMask(torch.stack(region_vectors), (t*img_len, text_len+t*img_len), img_off=text_len, img_rows=img_rows, row_vectors=torch.stack(row_vectors), img_row_off=0)
         
-        attn_mask = torch.cat([cross_attn_mask, self_attn_mask], dim=1)
+        RESplain("Attention mask:", attn_mask.nbytes, "bytes compact,", attn_mask.dense_nbytes, "bytes dense", debug=True)
         
         self.attn_mask = CoreAttnMask(attn_mask, mask_type=mask_type)
+    
+    def frame_vector(self, mask, dtype):
+        """
+        Self-attn mask of one region over the image tokens: each frame interpolated to the latent, tiled over frames when the mask has only one.
+        """
+        vector = F.interpolate(mask.unsqueeze(0).to(torch.float16), (self.h, self.w), mode='nearest-exact').to(dtype).flatten()
+        return vector.repeat(self.t * self.img_len // vector.numel())
 
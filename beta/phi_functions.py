@@ -1,6 +1,11 @@
 import torch
 import math
-from typing import Optional
+from typing import Optional, Union
+
+PHI_ORDER         = 6                  # φ_0..φ_6 covers every tableau in rk_coefficients_beta
+PHI_SERIES_RADIUS = 1.0                # below this |z| the recurrence loses digits, use the series instead
+PHI_SERIES_TERMS  = 24                 # |z|^n/(n+j)! < 1e-23 for |z| < 1
+PHI_INV_FACTORIALS = torch.tensor([1 / math.factorial(n) for n in range(PHI_SERIES_TERMS + 2*PHI_ORDER + 1)], dtype=torch.float64)
 
 
 # Remainder solution
@@ -71,32 +76,70 @@ def phi(j: int, neg_h: float, ):
 
 
 
+def phi_all(k: int, neg_h: Union[torch.Tensor, float]) -> torch.Tensor:
+    """
+    φ_0..φ_k at every element of neg_h in one pass, stacked on a new leading dim: (k+1, *neg_h.shape).
+    
+    Uses φ_0(z) = e^z and φ_{j+1}(z) = (φ_j(z) - 1/j!) / z, which cancels badly as z -> 0, so for |z| < PHI_SERIES_RADIUS
+    the Taylor series φ_j(z) = ∑{n>=0} z^n/(n+j)! is used instead.
+    """
+    z = torch.as_tensor(neg_h)
+    z = z if z.is_floating_point() else z.to(torch.float64)
+    
+    inv_factorials = PHI_INV_FACTORIALS.to(dtype=z.dtype, device=z.device)
+    if k + PHI_SERIES_TERMS >= len(inv_factorials):
+        inv_factorials = torch.tensor([1 / math.factorial(n) for n in range(k + PHI_SERIES_TERMS + 1)], dtype=z.dtype, device=z.device)
+    
+    small   = z.abs() < PHI_SERIES_RADIUS
+    z_large = torch.where(small, torch.ones_like(z), z)
+    z_small = torch.where(small, z, torch.zeros_like(z))
+    
+    powers = z_small.unsqueeze(0) ** torch.arange(PHI_SERIES_TERMS, dtype=z.dtype, device=z.device).view(-1, *[1]*z.ndim)
+    
+    phis  = []
+    phi_j = torch.exp(z_large)
+    for j in range(k+1):
+        series = (powers * inv_factorials[j:j+PHI_SERIES_TERMS].view(-1, *[1]*z.ndim)).sum(dim=0)
+        phis.append(torch.where(small, series, phi_j))
+        phi_j = (phi_j - inv_factorials[j]) / z_large
+    
+    return torch.stack(phis)
+
+
+
 class Phi:
     def __init__(self, h, c, analytic_solution=False): 
+        """
+        φ_j(-h * c_i) lookups for one tableau. All φ_0..φ_k for every node are evaluated together with phi_all() on first use.
+        The exact analytic and remainder forms agree there, so analytic_solution no longer changes the result and is only
+        kept so existing calls don't break.
+        """
         self.h = h
         self.c = c
         self.cache = {}  
-        if analytic_solution:
-            self.phi_f = phi
-        else:
-            self.phi_f = _phi  # remainder method
+        self.table = None
+
+    def tabulate(self, k):
+        h = self.h if isinstance(self.h, torch.Tensor) and self.h.is_floating_point() else torch.tensor(float(self.h), dtype=torch.float64)
+        c = torch.tensor([float(c_i) for c_i in self.c] + [1.0], dtype=h.dtype, device=h.device)
+        return phi_all(k, -h * c)
 
     def __call__(self, j, i=-1):
         if (j, i) in self.cache:
             return self.cache[(j, i)]
 
         if i < 0:
-            c = 1
+            col = len(self.c)
         else:
-            c = self.c[i - 1]
-            if c == 0:
+            col = (i - 1) % len(self.c)
+            if self.c[i - 1] == 0:
                 self.cache[(j, i)] = 0
                 return 0
 
-        if j == 0:
-            result = torch.exp(-self.h * c)
-        else:
-            result = self.phi_f(j, -self.h * c)
+        if self.table is None or j >= self.table.shape[0]:
+            self.table = self.tabulate(max(j, PHI_ORDER))
+        
+        result = self.table[j, col]
 
         self.cache[(j, i)] = result
 
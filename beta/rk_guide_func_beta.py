@@ -932,9 +932,10 @@ class LatentGuide:
 
 
     def get_masks_for_step(self, step:int, lgw_type="default") -> Tuple[Tensor, Tensor]:
+        opts = self.EO.compile()
         lgw_mask, lgw_mask_inv = self.prepare_weighted_masks(step, lgw_type=lgw_type)
-        normalize_frame_weights_per_step = self.EO("normalize_frame_weights_per_step")
-        normalize_frame_weights_per_step_inv = self.EO("normalize_frame_weights_per_step_inv")
+        normalize_frame_weights_per_step = opts.normalize_frame_weights_per_step
+        normalize_frame_weights_per_step_inv = opts.normalize_frame_weights_per_step_inv
 
         if self.VIDEO and self.frame_weights_mgr:
             num_frames = lgw_mask.shape[2]
@@ -1011,6 +1012,7 @@ class LatentGuide:
                                             BONGMATH                    : bool,
                                             ):
         
+        opts = self.EO.compile()
         if "pseudoimplicit" not in self.guide_mode or (self.lgw[step_sched] == 0 and self.lgw_inv[step_sched] == 0):
             return x_0, x_, eps_, None, None
         
@@ -1055,7 +1057,7 @@ class LatentGuide:
             
             if row > 0:
                 x_[row] = NS.swap_noise_substep(x_0, x_[row])
-                if BONGMATH and step < sigmas.shape[0]-1 and not self.EO("disable_pseudoimplicit_bongmath"):
+                if BONGMATH and step < sigmas.shape[0]-1 and not opts.disable_pseudoimplicit_bongmath:
                     x_0, x_, eps_ = RK.bong_iter(x_0,
                                                 x_,
                                                 eps_,
@@ -1072,7 +1074,7 @@ class LatentGuide:
         else:
             eps_[row] = RK.get_epsilon(x_0, x_[row], denoised_prev, sigma, NS.s_[row])
             
-        if self.EO("pseudoimplicit_denoised_prev"):
+        if opts.pseudoimplicit_denoised_prev:
             eps_[row] = RK.get_epsilon(x_0, x_[row], denoised_prev, sigma, NS.s_[row])
 
         eps_substep_guide     = torch.zeros_like(x_0)
@@ -1088,9 +1090,9 @@ class LatentGuide:
         if self.guide_mode in {"pseudoimplicit", "pseudoimplicit_cw", "pseudoimplicit_projection", "pseudoimplicit_projection_cw"}:
             maxmin_ratio = (NS.sub_sigma - RK.sigma_min) / NS.sub_sigma
             
-            if   self.EO("guide_pseudoimplicit_power_substep_flip_maxmin_scaling"):
+            if   opts.guide_pseudoimplicit_power_substep_flip_maxmin_scaling:
                 maxmin_ratio *= (RK.rows-row) / RK.rows
-            elif self.EO("guide_pseudoimplicit_power_substep_maxmin_scaling"):
+            elif opts.guide_pseudoimplicit_power_substep_maxmin_scaling:
                 maxmin_ratio *= row / RK.rows
             
             sub_sigma_2 = NS.sub_sigma - maxmin_ratio * (NS.sub_sigma * pseudoimplicit_row_weights[row] * pseudoimplicit_step_weights[full_iter] * self.lgw[step_sched])
@@ -1118,7 +1120,7 @@ class LatentGuide:
             sub_sigma_pseudoimplicit = sub_sigma_2
 
 
-        if RK.IMPLICIT and BONGMATH and step < sigmas.shape[0]-1 and not self.EO("disable_pseudobongmath"):
+        if RK.IMPLICIT and BONGMATH and step < sigmas.shape[0]-1 and not opts.disable_pseudobongmath:
             x_[row] = NS.sigma_from_to(x_0, x_row_pseudoimplicit, sigma, sub_sigma_pseudoimplicit, NS.s_[row])
             
             x_0, x_, eps_ = RK.bong_iter(x_0,
@@ -1162,6 +1164,7 @@ class LatentGuide:
                                                     BONGMATH,
                                                     ):
         
+        opts = self.EO.compile()
         if "fully_pseudoimplicit" not in self.guide_mode or (self.lgw[step_sched] == 0 and self.lgw_inv[step_sched] == 0):
             return x_0, x_, eps_ 
         
@@ -1203,7 +1206,7 @@ class LatentGuide:
 
                     if r > 0:
                         x_[r] = NS.swap_noise_substep(x_0, x_[r])
-                        if BONGMATH and step < sigmas.shape[0]-1 and not self.EO("disable_fully_pseudoimplicit_bongmath"):
+                        if BONGMATH and step < sigmas.shape[0]-1 and not opts.disable_fully_pseudoimplicit_bongmath:
                             x_0, x_, eps_ = RK.bong_iter(x_0,
                                                         x_,
                                                         eps_,
@@ -1218,7 +1221,7 @@ class LatentGuide:
                                                         step_sched,
                                                         )
                             
-                if self.EO("fully_pseudoimplicit_denoised_prev"):
+                if opts.fully_pseudoimplicit_denoised_prev:
                     eps_[r] = RK.get_epsilon(x_0, x_[r], denoised_prev, sigma, NS.s_[r])
                 
                 eps_substep_guide     = torch.zeros_like(x_0)
@@ -1248,10 +1251,10 @@ class LatentGuide:
                 
                 eps_lying_[r] = RK.get_epsilon(x_0, x_[r], data_lying, sigma, NS.s_[r])
                 
-            if not self.EO("pseudoimplicit_disable_eps_lying"):
+            if not opts.pseudoimplicit_disable_eps_lying:
                 eps_ = eps_lying_
             
-            if not self.EO("pseudoimplicit_disable_newton_iter"):
+            if not opts.pseudoimplicit_disable_newton_iter:
                 x_, eps_ = RK.newton_iter(x_0,
                                         x_,
                                         eps_,
@@ -1280,6 +1283,7 @@ class LatentGuide:
                                 sigma_row     : Tensor,
                                 frame_targets : Optional[Tensor] = None,
                                 ):
+        opts = self.EO.compile()
         if not self.HAS_LATENT_GUIDE and not self.HAS_LATENT_GUIDE_INV:
             return x_row
 
@@ -1292,7 +1296,7 @@ class LatentGuide:
             num_frames = data_row.shape[2]
             frame_targets = self.frame_weights_mgr.get_frame_weights_by_name('frame_targets', num_frames, step)
             if frame_targets is None:
-                frame_targets = torch.tensor(self.EO("frame_targets", [1.0]))
+                frame_targets = torch.tensor(opts.frame_targets)
             frame_targets = torch.clamp(frame_targets, 0.0, 1.0).to(self.device)
 
         if self.guide_mode in {"data", "data_projection", "lure", "lure_projection"}:
@@ -1331,11 +1335,12 @@ class LatentGuide:
                         frame_target  : float = 1.0,
                         ):
 
+        opts = self.EO.compile()
         if not self.HAS_LATENT_GUIDE and not self.HAS_LATENT_GUIDE_INV:
             return x_row
 
         if self.guide_mode in {"data", "data_projection", "lure", "lure_projection"}:
-            data_targets = self.EO("data_targets", [1.0])
+            data_targets = opts.data_targets
             step_target = step if len(data_targets) > step else len(data_targets)-1
             
             cossim_target = frame_target * data_targets[step_target]
@@ -1410,6 +1415,7 @@ class LatentGuide:
                                 RK=None,
                                 ):
         
+        opts = self.EO.compile()
         if not self.HAS_LATENT_GUIDE and not self.HAS_LATENT_GUIDE_INV:
             return eps_row
 
@@ -1422,7 +1428,7 @@ class LatentGuide:
             num_frames = data_row.shape[2]
             frame_targets = self.frame_weights_mgr.get_frame_weights_by_name('frame_targets', num_frames, step)
             if frame_targets is None:
-                frame_targets = self.EO("frame_targets", [1.0])
+                frame_targets = opts.frame_targets
             frame_targets = torch.clamp(frame_targets, 0.0, 1.0)
             
         eps_y0     = torch.zeros_like(x_0)
@@ -1467,11 +1473,12 @@ class LatentGuide:
                         frame_target  : float = 1.0,
                         ):
         
+        opts = self.EO.compile()
         if not self.HAS_LATENT_GUIDE and not self.HAS_LATENT_GUIDE_INV:
             return eps_row
 
         if self.guide_mode in {"epsilon", "epsilon_projection"}:
-            eps_targets = self.EO("eps_targets", [1.0])
+            eps_targets = opts.eps_targets
             step_target = step if len(eps_targets) > step else len(eps_targets)-1
             
             cossim_target = frame_target * eps_targets[step_target]
@@ -1543,6 +1550,7 @@ class LatentGuide:
                                 RK,
                                 ):
         
+        opts = self.EO.compile()
         if not self.HAS_LATENT_GUIDE and not self.HAS_LATENT_GUIDE_INV:
             return eps_, x_
 
@@ -1551,19 +1559,19 @@ class LatentGuide:
         if not (lgw_mask.any() != 0 or lgw_mask_inv.any() != 0):  # cossim score too similar! deactivate guide for this step
             return eps_, x_ 
 
-        if self.EO(["substep_eps_ch_mean_std", "substep_eps_ch_mean", "substep_eps_ch_std", "substep_eps_mean_std", "substep_eps_mean", "substep_eps_std"]):
+        if any((opts.substep_eps_ch_mean_std, opts.substep_eps_ch_mean, opts.substep_eps_ch_std, opts.substep_eps_mean_std, opts.substep_eps_mean, opts.substep_eps_std)):
             eps_orig = eps_.clone()
         
-        if self.EO("dynamic_guides_mean_std"):
+        if opts.dynamic_guides_mean_std:
             y_shift, y_inv_shift = normalize_latent([y0, y0_inv], [data_, data_])
             y0 = y_shift
-            if self.EO("dynamic_guides_inv"):
+            if opts.dynamic_guides_inv:
                 y0_inv = y_inv_shift
 
-        if self.EO("dynamic_guides_mean"):
+        if opts.dynamic_guides_mean:
             y_shift, y_inv_shift = normalize_latent([y0, y0_inv], [data_, data_], std=False)
             y0 = y_shift
-            if self.EO("dynamic_guides_inv"):
+            if opts.dynamic_guides_inv:
                 y0_inv = y_inv_shift
 
 
@@ -1601,7 +1609,7 @@ class LatentGuide:
                 if self.HAS_LATENT_GUIDE_INV:
                     eps_substep_guide_inv = RK.get_guide_epsilon(x_0, x_[row], y0_inv, sigma, s_[row], sigma_down, epsilon_scale)  
 
-                tol_value = self.EO("tol", -1.0)
+                tol_value = opts.tol
                 if tol_value >= 0:
                     for b, c in itertools.product(range(x_0.shape[0]), range(x_0.shape[1])):
                         current_diff       = torch.norm(data_[row][b][c] - y0    [b][c]) 
@@ -1620,7 +1628,7 @@ class LatentGuide:
                 
                 elif self.guide_mode in {"epsilon"}: 
                     #eps_[row] = slerp(lgw_mask.mean().item(), eps_[row], eps_substep_guide)
-                    if self.EO("slerp_epsilon_guide"):
+                    if opts.slerp_epsilon_guide:
                         if eps_substep_guide.sum() != 0:
                             eps_[row] = slerp_tensor(lgw_mask, eps_[row], eps_substep_guide)
                         if eps_substep_guide_inv.sum() != 0:
@@ -1631,7 +1639,7 @@ class LatentGuide:
                     #eps_[row] = slerp_barycentric(eps_[row].norm(), eps_substep_guide.norm(), eps_substep_guide_inv.norm(), 1-lgw_mask-lgw_mask_inv, lgw_mask, lgw_mask_inv)
                     
                 elif self.guide_mode in {"epsilon_projection"}:
-                    if self.EO("slerp_epsilon_guide"):
+                    if opts.slerp_epsilon_guide:
                         if eps_substep_guide.sum() != 0:
                             eps_row_slerp = slerp_tensor(self.mask, eps_[row], eps_substep_guide)
                         if eps_substep_guide_inv.sum() != 0:
@@ -1673,21 +1681,21 @@ class LatentGuide:
                                                     channelwise    = True
                                                     )
 
-        temporal_smoothing = self.EO("temporal_smoothing", 0.0)
+        temporal_smoothing = opts.temporal_smoothing
         if temporal_smoothing > 0:
             eps_[row] = apply_temporal_smoothing(eps_[row], temporal_smoothing)
             
-        if self.EO("substep_eps_ch_mean_std"):
+        if opts.substep_eps_ch_mean_std:
             eps_[row] = normalize_latent(eps_[row], eps_orig[row])
-        if self.EO("substep_eps_ch_mean"):
+        if opts.substep_eps_ch_mean:
             eps_[row] = normalize_latent(eps_[row], eps_orig[row], std=False)
-        if self.EO("substep_eps_ch_std"):
+        if opts.substep_eps_ch_std:
             eps_[row] = normalize_latent(eps_[row], eps_orig[row], mean=False)
-        if self.EO("substep_eps_mean_std"):
+        if opts.substep_eps_mean_std:
             eps_[row] = normalize_latent(eps_[row], eps_orig[row], channelwise=False)
-        if self.EO("substep_eps_mean"):
+        if opts.substep_eps_mean:
             eps_[row] = normalize_latent(eps_[row], eps_orig[row], std=False, channelwise=False)
-        if self.EO("substep_eps_std"):
+        if opts.substep_eps_std:
             eps_[row] = normalize_latent(eps_[row], eps_orig[row], mean=False, channelwise=False)
         return eps_, x_
     
@@ -1707,6 +1715,7 @@ class LatentGuide:
                             channelwise           : bool    = False
                             ):
         
+        opts = self.EO.compile()
         avg, avg_inv = 0, 0
         for b, c in itertools.product(range(x_0.shape[0]), range(x_0.shape[1])):
             avg     += torch.norm(lgw_mask    [b][0] * data_[row][b][c]   -   lgw_mask    [b][0] * y0    [b][c])
@@ -1723,7 +1732,7 @@ class LatentGuide:
                 ratio     = 1.
                 ratio_inv = 1.
                     
-            if self.EO("slerp_epsilon_guide"):
+            if opts.slerp_epsilon_guide:
                 if eps_substep_guide[b][c].sum() != 0:
                     eps_[row][b][c] = slerp_tensor(ratio * lgw_mask[b][0], eps_[row][b][c], eps_substep_guide[b][c])
                 if eps_substep_guide_inv[b][c].sum() != 0:
@@ -1732,7 +1741,7 @@ class LatentGuide:
                 eps_[row][b][c]            = eps_[row][b][c]   +   ratio * lgw_mask[b][0] * (eps_substep_guide[b][c] - eps_[row][b][c])   +   ratio_inv * lgw_mask_inv[b][0] * (eps_substep_guide_inv[b][c] - eps_[row][b][c])
             
             if use_projection:
-                if self.EO("slerp_epsilon_guide"):
+                if opts.slerp_epsilon_guide:
                     if eps_substep_guide[b][c].sum() != 0:
                         eps_row_lerp = slerp_tensor(self.mask[b][0], eps_[row][b][c], eps_substep_guide[b][c])
                     if eps_substep_guide_inv[b][c].sum() != 0:
@@ -1746,7 +1755,7 @@ class LatentGuide:
                 eps_sum                = eps_collinear_eps_lerp + eps_lerp_ortho_eps
 
 
-                if self.EO("slerp_epsilon_guide"):
+                if opts.slerp_epsilon_guide:
                     if eps_substep_guide[b][c].sum() != 0:
                         eps_[row][b][c] = slerp_tensor(ratio * lgw_mask[b][0], eps_[row][b][c], eps_sum)
                     if eps_substep_guide_inv[b][c].sum() != 0:
@@ -1754,7 +1763,7 @@ class LatentGuide:
                 else:
                     eps_[row][b][c]        = eps_[row][b][c]   +   ratio * lgw_mask[b][0] * (eps_sum                 - eps_[row][b][c])   +   ratio_inv * lgw_mask_inv[b][0] * (eps_sum                     - eps_[row][b][c])
             else:
-                if self.EO("slerp_epsilon_guide"):
+                if opts.slerp_epsilon_guide:
                     if eps_substep_guide[b][c].sum() != 0:
                         eps_[row][b][c] = slerp_tensor(ratio * lgw_mask[b][0], eps_[row][b][c], eps_substep_guide[b][c])
                     if eps_substep_guide_inv[b][c].sum() != 0:
@@ -1775,11 +1784,12 @@ class LatentGuide:
             - y0     (may be modified to match mean and std from y0_inv)
             - y0_inv (unchanged)
         """
+        opts = self.EO.compile()
         if self.guide_mode == "epsilon_guide_mean_std_from_bkg":
             y0 = normalize_latent(y0, y0_inv)
 
-        input_norm = self.EO("input_norm", "")
-        input_std  = self.EO("input_std", 1.0)
+        input_norm = opts.input_norm
+        input_std  = opts.input_std
                 
         if input_norm == "input_ch_mean_set_std_to":
             x = normalize_latent(x, set_std=input_std)
@@ -1918,233 +1928,70 @@ def get_guide_epsilon(x_0, x_, y0, sigma, rk_type, b=None, c=None):
 
 
 
-@torch.no_grad
-def noise_cossim_guide_tiled(x_list, guide, cossim_mode="forward", tile_size=2, step=0):
-
-    guide_tiled = rearrange(guide, "b c (h t1) (w t2) -> b (t1 t2) c h w", t1=tile_size, t2=tile_size)
-
-    x_tiled_list = [
-        rearrange(x, "b c (h t1) (w t2) -> b (t1 t2) c h w", t1=tile_size, t2=tile_size)
-        for x in x_list
-    ]
-    x_tiled_stack = torch.stack([x_tiled[0] for x_tiled in x_tiled_list])  # [n_x, n_tiles, c, h, w]
-
-    guide_flat = guide_tiled[0].view(guide_tiled.shape[1], -1).unsqueeze(0)  # [1, n_tiles, c*h*w]
-    x_flat = x_tiled_stack.view(x_tiled_stack.size(0), x_tiled_stack.size(1), -1)  # [n_x, n_tiles, c*h*w]
-
-    cossim_tmp_all = F.cosine_similarity(x_flat, guide_flat, dim=-1)  # [n_x, n_tiles]
-
-    if cossim_mode == "forward":
-        indices = cossim_tmp_all.argmax(dim=0) 
+def get_noise_cossim_indices(cossim:Tensor, cossim_mode:str="forward", step:int=0) -> Tensor:
+    """Pick a candidate along dim 0 of cossim [n_candidates, ...] for every other position. Returns [...] indices."""
+    if   cossim_mode == "forward":
+        indices = cossim.argmax(dim=0)
     elif cossim_mode == "reverse":
-        indices = cossim_tmp_all.argmin(dim=0) 
+        indices = cossim.argmin(dim=0)
     elif cossim_mode == "orthogonal":
-        indices = torch.abs(cossim_tmp_all).argmin(dim=0) 
+        indices = torch.abs(cossim).argmin(dim=0)
+    elif cossim_mode == "orthogonal_pos"    or (cossim_mode == "orthogonal_posneg" and step % 2 == 0) or (cossim_mode == "orthogonal_negpos" and step % 2 == 1):
+        indices = torch.where(cossim > 0, cossim, torch.full_like(cossim, float('inf'))).argmin(dim=0)
+    elif cossim_mode in {"orthogonal_neg", "orthogonal_posneg", "orthogonal_negpos"}:
+        indices = torch.where(cossim < 0, cossim, torch.full_like(cossim, float('-inf'))).argmax(dim=0)
     elif cossim_mode == "forward_reverse":
-        if step % 2 == 0:
-            indices = cossim_tmp_all.argmax(dim=0)
-        else:
-            indices = cossim_tmp_all.argmin(dim=0)
+        indices = cossim.argmax(dim=0) if step % 2 == 0 else cossim.argmin(dim=0)
     elif cossim_mode == "reverse_forward":
-        if step % 2 == 1:
-            indices = cossim_tmp_all.argmax(dim=0)
-        else:
-            indices = cossim_tmp_all.argmin(dim=0)
+        indices = cossim.argmax(dim=0) if step % 2 == 1 else cossim.argmin(dim=0)
     elif cossim_mode == "orthogonal_reverse":
-        if step % 2 == 0:
-            indices = torch.abs(cossim_tmp_all).argmin(dim=0)
-        else:
-            indices = cossim_tmp_all.argmin(dim=0)
+        indices = torch.abs(cossim).argmin(dim=0) if step % 2 == 0 else cossim.argmin(dim=0)
     elif cossim_mode == "reverse_orthogonal":
-        if step % 2 == 1:
-            indices = torch.abs(cossim_tmp_all).argmin(dim=0)
-        else:
-            indices = cossim_tmp_all.argmin(dim=0)
+        indices = torch.abs(cossim).argmin(dim=0) if step % 2 == 1 else cossim.argmin(dim=0)
     else:
         target_value = float(cossim_mode)
-        indices = torch.abs(cossim_tmp_all - target_value).argmin(dim=0)  
-
-    x_tiled_out = x_tiled_stack[indices, torch.arange(indices.size(0))]  # [n_tiles, c, h, w]
+        indices = torch.abs(cossim - target_value).argmin(dim=0)
+    return indices
 
-    x_tiled_out = x_tiled_out.unsqueeze(0) 
-    x_detiled = rearrange(x_tiled_out, "b (t1 t2) c h w -> b c (h t1) (w t2)", t1=tile_size, t2=tile_size)
+@torch.no_grad
+def noise_cossim_select_tiled(x_stack:Tensor, candidates:Tensor, target:Tensor, cossim_mode="forward", tile_size=2, step=0) -> Tensor:
+    """
+    Per tile and batch item, keep the x candidate whose scored tensor best matches target under cossim_mode.
+    x_stack, candidates: [n, B, C, H, W]    target: [B or 1, C, H, W], or stacked like candidates
+    All candidates x batch items x tiles are scored by one cosine_similarity call.
+    """
+    candidates_flat = rearrange(candidates, "... c (h t1) (w t2) -> ... (t1 t2) (c h w)", t1=tile_size, t2=tile_size)
+    target_flat     = rearrange(target,     "... c (h t1) (w t2) -> ... (t1 t2) (c h w)", t1=tile_size, t2=tile_size)
+    cossim          = F.cosine_similarity(candidates_flat, target_flat, dim=-1)                      # [n, B, n_tiles]
+    del candidates_flat, target_flat
+    
+    indices = get_noise_cossim_indices(cossim, cossim_mode, step)                                    # [B, n_tiles]
+    B, n_tiles = indices.shape
+    
+    x_tiled     = rearrange(x_stack, "n b c (h t1) (w t2) -> n b (t1 t2) c h w", t1=tile_size, t2=tile_size)
+    x_tiled_out = x_tiled[indices, torch.arange(B, device=indices.device)[:, None], torch.arange(n_tiles, device=indices.device)[None, :]]
+    
+    return rearrange(x_tiled_out, "b (t1 t2) c h w -> b c (h t1) (w t2)", t1=tile_size, t2=tile_size)
 
-    return x_detiled
 
+def stack_noise_candidates(x_list) -> Tensor:
+    return torch.stack(x_list) if isinstance(x_list, (list, tuple)) else x_list
 
 @torch.no_grad
-def noise_cossim_eps_tiled(x_list, eps, noise_list, cossim_mode="forward", tile_size=2, step=0):
-
-    eps_tiled = rearrange(eps, "b c (h t1) (w t2) -> b (t1 t2) c h w", t1=tile_size, t2=tile_size)
-    x_tiled_list = [
-        rearrange(x, "b c (h t1) (w t2) -> b (t1 t2) c h w", t1=tile_size, t2=tile_size)
-        for x in x_list
-    ]
-    noise_tiled_list = [
-        rearrange(noise, "b c (h t1) (w t2) -> b (t1 t2) c h w", t1=tile_size, t2=tile_size)
-        for noise in noise_list
-    ]
-
-    noise_tiled_stack = torch.stack([noise_tiled[0] for noise_tiled in noise_tiled_list])  # [n_x, n_tiles, c, h, w]
-    eps_expanded = eps_tiled[0].view(eps_tiled.shape[1], -1).unsqueeze(0)  # [1, n_tiles, c*h*w]
-    noise_flat = noise_tiled_stack.view(noise_tiled_stack.size(0), noise_tiled_stack.size(1), -1)  # [n_x, n_tiles, c*h*w]
-    cossim_tmp_all = F.cosine_similarity(noise_flat, eps_expanded, dim=-1)  # [n_x, n_tiles]
-
-    if cossim_mode == "forward":
-        indices = cossim_tmp_all.argmax(dim=0)  
-    elif cossim_mode == "reverse":
-        indices = cossim_tmp_all.argmin(dim=0) 
-    elif cossim_mode == "orthogonal":
-        indices = torch.abs(cossim_tmp_all).argmin(dim=0) 
-    elif cossim_mode == "orthogonal_pos":
-        positive_mask = cossim_tmp_all > 0
-        positive_tmp = torch.where(positive_mask, cossim_tmp_all, torch.full_like(cossim_tmp_all, float('inf')))
-        indices = positive_tmp.argmin(dim=0)
-    elif cossim_mode == "orthogonal_neg":
-        negative_mask = cossim_tmp_all < 0
-        negative_tmp = torch.where(negative_mask, cossim_tmp_all, torch.full_like(cossim_tmp_all, float('-inf')))
-        indices = negative_tmp.argmax(dim=0)
-    elif cossim_mode == "orthogonal_posneg":
-        if step % 2 == 0:
-            positive_mask = cossim_tmp_all > 0
-            positive_tmp = torch.where(positive_mask, cossim_tmp_all, torch.full_like(cossim_tmp_all, float('inf')))
-            indices = positive_tmp.argmin(dim=0)
-        else:
-            negative_mask = cossim_tmp_all < 0
-            negative_tmp = torch.where(negative_mask, cossim_tmp_all, torch.full_like(cossim_tmp_all, float('-inf')))
-            indices = negative_tmp.argmax(dim=0)
-    elif cossim_mode == "orthogonal_negpos":
-        if step % 2 == 1:
-            positive_mask = cossim_tmp_all > 0
-            positive_tmp = torch.where(positive_mask, cossim_tmp_all, torch.full_like(cossim_tmp_all, float('inf')))
-            indices = positive_tmp.argmin(dim=0)
-        else:
-            negative_mask = cossim_tmp_all < 0
-            negative_tmp = torch.where(negative_mask, cossim_tmp_all, torch.full_like(cossim_tmp_all, float('-inf')))
-            indices = negative_tmp.argmax(dim=0)
-    elif cossim_mode == "forward_reverse":
-        if step % 2 == 0:
-            indices = cossim_tmp_all.argmax(dim=0)
-        else:
-            indices = cossim_tmp_all.argmin(dim=0)
-    elif cossim_mode == "reverse_forward":
-        if step % 2 == 1:
-            indices = cossim_tmp_all.argmax(dim=0)
-        else:
-            indices = cossim_tmp_all.argmin(dim=0)
-    elif cossim_mode == "orthogonal_reverse":
-        if step % 2 == 0:
-            indices = torch.abs(cossim_tmp_all).argmin(dim=0)
-        else:
-            indices = cossim_tmp_all.argmin(dim=0)
-    elif cossim_mode == "reverse_orthogonal":
-        if step % 2 == 1:
-            indices = torch.abs(cossim_tmp_all).argmin(dim=0)
-        else:
-            indices = cossim_tmp_all.argmin(dim=0)
-    else:
-        target_value = float(cossim_mode)
-        indices = torch.abs(cossim_tmp_all - target_value).argmin(dim=0)
-    #else:
-    #    raise ValueError(f"Unknown cossim_mode: {cossim_mode}")
-
-    x_tiled_stack = torch.stack([x_tiled[0] for x_tiled in x_tiled_list])  # [n_x, n_tiles, c, h, w]
-    x_tiled_out = x_tiled_stack[indices, torch.arange(indices.size(0))]  # [n_tiles, c, h, w]
+def noise_cossim_guide_tiled(x_list, guide, cossim_mode="forward", tile_size=2, step=0):
+    x_stack = stack_noise_candidates(x_list)
+    return noise_cossim_select_tiled(x_stack, x_stack, guide, cossim_mode, tile_size, step)
 
-    x_tiled_out = x_tiled_out.unsqueeze(0)  # restore batch dim
-    x_detiled = rearrange(x_tiled_out, "b (t1 t2) c h w -> b c (h t1) (w t2)", t1=tile_size, t2=tile_size)
-    return x_detiled
 
+@torch.no_grad
+def noise_cossim_eps_tiled(x_list, eps, noise_list, cossim_mode="forward", tile_size=2, step=0):
+    return noise_cossim_select_tiled(stack_noise_candidates(x_list), stack_noise_candidates(noise_list), eps, cossim_mode, tile_size, step)
 
 
 @torch.no_grad
 def noise_cossim_guide_eps_tiled(x_0, x_list, y0, noise_list, cossim_mode="forward", tile_size=2, step=0, sigma=None, rk_type=None):
-
-    x_tiled_stack = torch.stack([
-        rearrange(x, "b c (h t1) (w t2) -> b (t1 t2) c h w", t1=tile_size, t2=tile_size)[0]
-        for x in x_list
-    ])  # [n_x, n_tiles, c, h, w]
-    eps_guide_stack = torch.stack([
-        rearrange(x - y0, "b c (h t1) (w t2) -> b (t1 t2) c h w", t1=tile_size, t2=tile_size)[0]
-        for x in x_list
-    ])  # [n_x, n_tiles, c, h, w]
-    del x_list
-
-    noise_tiled_stack = torch.stack([
-        rearrange(noise, "b c (h t1) (w t2) -> b (t1 t2) c h w", t1=tile_size, t2=tile_size)[0]
-        for noise in noise_list
-    ])  # [n_x, n_tiles, c, h, w]
-    del noise_list
-
-    noise_flat = noise_tiled_stack.view(noise_tiled_stack.size(0), noise_tiled_stack.size(1), -1)  # [n_x, n_tiles, c*h*w]
-    eps_guide_flat = eps_guide_stack.view(eps_guide_stack.size(0), eps_guide_stack.size(1), -1)  # [n_x, n_tiles, c*h*w]
-
-    cossim_tmp_all = F.cosine_similarity(noise_flat, eps_guide_flat, dim=-1)  # [n_x, n_tiles]
-    del noise_tiled_stack, noise_flat, eps_guide_stack, eps_guide_flat
-
-    if cossim_mode == "forward":
-        indices = cossim_tmp_all.argmax(dim=0) 
-    elif cossim_mode == "reverse":
-        indices = cossim_tmp_all.argmin(dim=0) 
-    elif cossim_mode == "orthogonal":
-        indices = torch.abs(cossim_tmp_all).argmin(dim=0) 
-    elif cossim_mode == "orthogonal_pos":
-        positive_mask = cossim_tmp_all > 0
-        positive_tmp = torch.where(positive_mask, cossim_tmp_all, torch.full_like(cossim_tmp_all, float('inf')))
-        indices = positive_tmp.argmin(dim=0)
-    elif cossim_mode == "orthogonal_neg":
-        negative_mask = cossim_tmp_all < 0
-        negative_tmp = torch.where(negative_mask, cossim_tmp_all, torch.full_like(cossim_tmp_all, float('-inf')))
-        indices = negative_tmp.argmax(dim=0)
-    elif cossim_mode == "orthogonal_posneg":
-        if step % 2 == 0:
-            positive_mask = cossim_tmp_all > 0
-            positive_tmp = torch.where(positive_mask, cossim_tmp_all, torch.full_like(cossim_tmp_all, float('inf')))
-            indices = positive_tmp.argmin(dim=0)
-        else:
-            negative_mask = cossim_tmp_all < 0
-            negative_tmp = torch.where(negative_mask, cossim_tmp_all, torch.full_like(cossim_tmp_all, float('-inf')))
-            indices = negative_tmp.argmax(dim=0)
-    elif cossim_mode == "orthogonal_negpos":
-        if step % 2 == 1:
-            positive_mask = cossim_tmp_all > 0
-            positive_tmp = torch.where(positive_mask, cossim_tmp_all, torch.full_like(cossim_tmp_all, float('inf')))
-            indices = positive_tmp.argmin(dim=0)
-        else:
-            negative_mask = cossim_tmp_all < 0
-            negative_tmp = torch.where(negative_mask, cossim_tmp_all, torch.full_like(cossim_tmp_all, float('-inf')))
-            indices = negative_tmp.argmax(dim=0)
-    elif cossim_mode == "forward_reverse":
-        if step % 2 == 0:
-            indices = cossim_tmp_all.argmax(dim=0)
-        else:
-            indices = cossim_tmp_all.argmin(dim=0)
-    elif cossim_mode == "reverse_forward":
-        if step % 2 == 1:
-            indices = cossim_tmp_all.argmax(dim=0)
-        else:
-            indices = cossim_tmp_all.argmin(dim=0)
-    elif cossim_mode == "orthogonal_reverse":
-        if step % 2 == 0:
-            indices = torch.abs(cossim_tmp_all).argmin(dim=0)
-        else:
-            indices = cossim_tmp_all.argmin(dim=0)
-    elif cossim_mode == "reverse_orthogonal":
-        if step % 2 == 1:
-            indices = torch.abs(cossim_tmp_all).argmin(dim=0)
-        else:
-            indices = cossim_tmp_all.argmin(dim=0)
-    else:
-        target_value = float(cossim_mode)
-        indices = torch.abs(cossim_tmp_all - target_value).argmin(dim=0)  
-
-    x_tiled_out = x_tiled_stack[indices, torch.arange(indices.size(0))]  # [n_tiles, c, h, w]
-    del x_tiled_stack
-
-    x_tiled_out = x_tiled_out.unsqueeze(0)  
-    x_detiled = rearrange(x_tiled_out, "b (t1 t2) c h w -> b c (h t1) (w t2)", t1=tile_size, t2=tile_size)
-
-    return x_detiled
+    x_stack = stack_noise_candidates(x_list)
+    return noise_cossim_select_tiled(x_stack, stack_noise_candidates(noise_list), x_stack - y0, cossim_mode, tile_size, step)
 
 
 
@@ -2234,35 +2081,37 @@ def handle_tiled_etc_noise_steps(
                                 NOISE_COSSIM_MODE,
                                 noise_cossim_tile_size,
                                 noise_cossim_iterations,
-                                extra_options):
+                                EO : ExtraOptions):
     
-    EO = ExtraOptions(extra_options)
+    opts = EO.compile()
     
-    x_tmp          = []
     cossim_tmp     = []
-    noise_tmp_list = []
     
-    if step > EO("noise_cossim_end_step", MAX_STEPS):
-        NOISE_COSSIM_SOURCE       = EO("noise_cossim_takeover_source"    , "eps")
-        NOISE_COSSIM_MODE         = EO("noise_cossim_takeover_mode"      , "forward"              )
-        noise_cossim_tile_size    = EO("noise_cossim_takeover_tile"      , noise_cossim_tile_size )
-        noise_cossim_iterations   = EO("noise_cossim_takeover_iterations", noise_cossim_iterations)
-        
+    if step > (MAX_STEPS if opts.noise_cossim_end_step is None else opts.noise_cossim_end_step):
+        NOISE_COSSIM_SOURCE       = opts.noise_cossim_takeover_source
+        NOISE_COSSIM_MODE         = opts.noise_cossim_takeover_mode
+        noise_cossim_tile_size    = noise_cossim_tile_size  if opts.noise_cossim_takeover_tile       is None else opts.noise_cossim_takeover_tile
+        noise_cossim_iterations   = noise_cossim_iterations if opts.noise_cossim_takeover_iterations is None else opts.noise_cossim_takeover_iterations
+    
+    NOISE_TILED    = NOISE_COSSIM_SOURCE in ("eps_tiled", "guide_epsilon_tiled", "guide_bkg_epsilon_tiled", "iig_tiled")
+    x_tmp          = x.new_empty((noise_cossim_iterations, *x.shape))                       # candidates are drawn straight into stacked buffers, the pick is cloned out of it
+    noise_tmp_list = x.new_empty((noise_cossim_iterations, *x.shape)) if NOISE_TILED else None
+    
     for i in range(noise_cossim_iterations):
         #x_tmp.append(NS.swap_noise(x_0, x, sigma, sigma, sigma_next, ))
-        x_tmp.append(NS.add_noise_post(x, sigma_up, sigma, sigma_next, alpha_ratio, s_noise, noise_mode, SDE_NOISE_EXTERNAL, sde_noise_t)    )#y0, lgw, sigma_down are currently unused
+        x_tmp[i] = NS.add_noise_post(x, sigma_up, sigma, sigma_next, alpha_ratio, s_noise, noise_mode, SDE_NOISE_EXTERNAL, sde_noise_t)    #y0, lgw, sigma_down are currently unused
         noise_tmp = x_tmp[i] - x
-        if EO("noise_noise_zscore_norm"):
+        if opts.noise_noise_zscore_norm:
             noise_tmp = normalize_zscore(noise_tmp, channelwise=False, inplace=True)
-        if EO("noise_noise_zscore_norm_cw"):
+        if opts.noise_noise_zscore_norm_cw:
             noise_tmp = normalize_zscore(noise_tmp, channelwise=True,  inplace=True)
-        if EO("noise_eps_zscore_norm"):
+        if opts.noise_eps_zscore_norm:
             eps       = normalize_zscore(eps,       channelwise=False, inplace=True)
-        if EO("noise_eps_zscore_norm_cw"):
+        if opts.noise_eps_zscore_norm_cw:
             eps       = normalize_zscore(eps,       channelwise=True,  inplace=True)
             
-        if   NOISE_COSSIM_SOURCE in ("eps_tiled", "guide_epsilon_tiled", "guide_bkg_epsilon_tiled", "iig_tiled"):
-            noise_tmp_list.append(noise_tmp)
+        if   NOISE_TILED:
+            noise_tmp_list[i] = noise_tmp
         if   NOISE_COSSIM_SOURCE == "eps":
             cossim_tmp.append(get_cosine_similarity(eps, noise_tmp))
         if   NOISE_COSSIM_SOURCE == "eps_ch":
@@ -2289,8 +2138,8 @@ def handle_tiled_etc_noise_steps(
         elif NOISE_COSSIM_SOURCE == "guide_bkg":
             cossim_tmp.append(get_cosine_similarity(y0_inv, x_tmp[i]))
             
-    if step < EO("noise_cossim_start_step", 0):
-        x = x_tmp[0]
+    if step < opts.noise_cossim_start_step:
+        x = x_tmp[0].clone()
 
     elif (NOISE_COSSIM_SOURCE == "eps_tiled"):
         x = noise_cossim_eps_tiled(x_tmp, eps, noise_tmp_list, cossim_mode=NOISE_COSSIM_MODE, tile_size=noise_cossim_tile_size, step=step)
@@ -2305,16 +2154,16 @@ def handle_tiled_etc_noise_steps(
     else:
         for i in range(len(x_tmp)):
             if   (NOISE_COSSIM_MODE == "forward") and (cossim_tmp[i] == max(cossim_tmp)):
-                x = x_tmp[i]
+                x = x_tmp[i].clone()
                 break
             elif (NOISE_COSSIM_MODE == "reverse") and (cossim_tmp[i] == min(cossim_tmp)):
-                x = x_tmp[i]
+                x = x_tmp[i].clone()
                 break
             elif (NOISE_COSSIM_MODE == "orthogonal") and (abs(cossim_tmp[i]) == min(abs(val) for val in cossim_tmp)):
-                x = x_tmp[i]
+                x = x_tmp[i].clone()
                 break
             elif (NOISE_COSSIM_MODE != "forward") and (NOISE_COSSIM_MODE != "reverse") and (NOISE_COSSIM_MODE != "orthogonal"):
-                x = x_tmp[0]
+                x = x_tmp[0].clone()
                 break
     return x
 
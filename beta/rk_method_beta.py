@@ -3,9 +3,9 @@ from torch import Tensor
 from typing import Optional, Callable, Tuple, List, Dict, Any, Union
 
 import comfy.model_patcher
+import comfy.model_management
 import comfy.supported_models
 
-import itertools 
 
 from .phi_functions        import Phi
 from .rk_coefficients_beta import get_implicit_sampler_name_list, get_rk_methods_beta
@@ -16,6 +16,9 @@ from ..res4lyf             import RESplain
 
 MAX_STEPS = 10000
 
+TABLEAU_CACHE      = {}    # tableau_key() -> (A, B, C, U, V, multistep_stages, hybrid_stages), shared by every sampler instance
+TABLEAU_CACHE_SIZE = 1024
+
 
 def get_data_from_step   (x:Tensor, x_next:Tensor, sigma:Tensor, sigma_next:Tensor) -> Tensor:
     h = sigma_next - sigma
@@ -92,6 +95,15 @@ class RK_Method_Beta:
         self.tile_sizes                  : Optional[List[Tuple[int,int]]] = None
         self.tile_cnt                    : int                      = 0
         self.latent_compression_ratio    : int                      = 8
+        
+        self.bong_iter_counts            : Dict[int, int]           = {}
+        self.bong_iter_residuals         : Dict[int, Tensor]        = {}    # 0-dim, read back once when handed to state_info_out
+        
+        self.tableau_cache_hits          : int                      = 0
+        self.tableau_cache_misses        : int                      = 0
+        
+        self.published_options           : Dict[str, Tuple[Tensor, int, Tensor, int]] = {}
+        self.published_bytes_cloned      : int                      = 0
 
     @staticmethod
     def is_exponential(rk_type:str) -> bool:
@@ -141,24 +153,25 @@ class RK_Method_Beta:
         y0_style_neg = self.extra_args['model_options']['transformer_options'].get("y0_style_neg")
         y0_style_pos_tile, sy0_style_neg_tiles = None, None
         
-        if self.EO("tile_model_calls"):
-            tile_h = self.EO("tile_h", 128)
-            tile_w = self.EO("tile_w", 128)
+        if self.EO.compile().tile_model_calls:
+            tile_h = self.EO.compile().tile_h
+            tile_w = self.EO.compile().tile_w
             
             denoised_tiles = []
             
             tiles, orig_shape, grid, strides = tile_latent(x, tile_size=(tile_h,tile_w))
+            tile_batch_size = self.tile_batch_size(tiles)
             
-            for i in range(tiles.shape[0]):
-                tile = tiles[i].unsqueeze(0)
+            for i in range(0, tiles.shape[0], tile_batch_size):
+                tile = tiles[i:i+tile_batch_size]
                 
-                denoised_tile = self.model(tile, sigma * s_in, **extra_args)
+                denoised_tile = self.model(tile, sigma * tile.new_ones([tile.shape[0]]), **extra_args)
                 
                 denoised_tiles.append(denoised_tile)
                 
             denoised_tiles = torch.cat(denoised_tiles, dim=0)
             
-            denoised = untile_latent(denoised_tiles, orig_shape, grid, strides)
+            denoised = untile_latent(denoised_tiles, orig_shape, grid, strides, feather=self.EO.compile().tile_feather)
             
         elif self.tile_sizes is not None:
             tile_h_full = self.tile_sizes[self.tile_cnt % len(self.tile_sizes)][0]
@@ -185,7 +198,7 @@ class RK_Method_Beta:
             #    tile_h, tile_w = tile_w, tile_h
             #    tile_h_full, tile_w_full = tile_w_full, tile_h_full
             
-            if (self.tile_cnt // len(self.tile_sizes)) % 2 == 1 and self.EO("tiles_autorotate"):
+            if (self.tile_cnt // len(self.tile_sizes)) % 2 == 1 and self.EO.compile().tiles_autorotate:
                 tile_h, tile_w = tile_w, tile_h
                 tile_h_full, tile_w_full = tile_w_full, tile_h_full
             
@@ -216,26 +229,28 @@ class RK_Method_Beta:
             if y0_style_neg is not None:
                 y0_style_neg_tiles, _, _, _ = tile_latent(y0_style_neg, tile_size=(tile_h,tile_w))
             
-            for i in range(tiles.shape[0]):
-                tile = tiles[i].unsqueeze(0)
+            tile_batch_size = self.tile_batch_size(tiles)
+            
+            for i in range(0, tiles.shape[0], tile_batch_size):
+                tile = tiles[i:i+tile_batch_size]
                 
                 if control_tiles is not None:
-                    positive_control.cond_hint = control_tiles[i].unsqueeze(0).to(positive_control.cond_hint)
+                    positive_control.cond_hint = control_tiles[i:i+tile_batch_size].to(positive_control.cond_hint)
                     if negative_control is not None:
-                        negative_control.cond_hint = control_tiles[i].unsqueeze(0).to(positive_control.cond_hint)
+                        negative_control.cond_hint = control_tiles[i:i+tile_batch_size].to(positive_control.cond_hint)
                 
                 if y0_style_pos is not None:
-                    self.extra_args['model_options']['transformer_options']['y0_style_pos'] = y0_style_pos_tiles[i].unsqueeze(0)
+                    self.extra_args['model_options']['transformer_options']['y0_style_pos'] = y0_style_pos_tiles[i:i+tile_batch_size]
                 if y0_style_neg is not None:
-                    self.extra_args['model_options']['transformer_options']['y0_style_neg'] = y0_style_neg_tiles[i].unsqueeze(0)
+                    self.extra_args['model_options']['transformer_options']['y0_style_neg'] = y0_style_neg_tiles[i:i+tile_batch_size]
                 
-                denoised_tile = self.model(tile, sigma * s_in, **extra_args)
+                denoised_tile = self.model(tile, sigma * tile.new_ones([tile.shape[0]]), **extra_args)
                 
                 denoised_tiles.append(denoised_tile)
                 
             denoised_tiles = torch.cat(denoised_tiles, dim=0)
             
-            denoised = untile_latent(denoised_tiles, orig_shape, grid, strides)
+            denoised = untile_latent(denoised_tiles, orig_shape, grid, strides, feather=self.EO.compile().tile_feather)
             
         else:
             denoised = self.model(x, sigma * s_in, **extra_args)
@@ -252,6 +267,33 @@ class RK_Method_Beta:
         
         denoised = self.calc_cfg_channelwise(denoised)
         return denoised
+    
+    def tile_batch_size(self, tiles:Tensor) -> int:
+        """
+        Tiles per model call for tiled sampling. tile_batch_size=N sets it, otherwise it's as many as fit in free VRAM.
+        Always 1 for the models patched by this package: their forwards loop over cond_or_uncond and index img[i], so
+        extra tiles in the batch would never be denoised. The y0_style guides are only read by those forwards, and
+        model_denoised() slices their tiles with the same [i:i+N] as the latent tiles, so a batch of N stays aligned.
+        """
+        n_tiles    = tiles.shape[0]
+        batch_size = self.EO.compile().tile_batch_size
+        
+        base_model = self.model.inner_model.inner_model
+        package    = __package__.rsplit('.', 1)[0]
+        if type(getattr(base_model, "diffusion_model", None)).__module__.startswith(package + "."):
+            if batch_size > 1:
+                RESplain("tile_batch_size ignored, patched models take one tile per call.", debug=True)
+            return 1
+        
+        if batch_size > 0:
+            return min(batch_size, n_tiles)
+        
+        if not hasattr(base_model, "memory_required"):
+            return 1
+        
+        tile_memory = base_model.memory_required([2, *tiles.shape[1:]]) * 1.5       # cond + uncond per tile, same margin comfy batches conds with
+        free_memory = comfy.model_management.get_free_memory(tiles.device)
+        return max(1, min(n_tiles, int(free_memory // tile_memory)))
 
     def update_transformer_options(self,
                 transformer_options : Optional[dict] = None,
@@ -260,6 +302,28 @@ class RK_Method_Beta:
         self.extra_args.setdefault("model_options", {}).setdefault("transformer_options", {}).update(transformer_options)
         return
 
+    def publish_transformer_options(self, transformer_options:dict) -> None:
+        """
+        update_transformer_options() for guide tensors the model patches get their own copy of. The copy is only remade when
+        the source tensor is swapped out or written in place, or the published copy was (tensor._version), not every step.
+        """
+        published = {}
+        for key, value in transformer_options.items():
+            if isinstance(value, Tensor):
+                prev = self.published_options.get(key)
+                if prev is not None and prev[0] is value and prev[1] == value._version and prev[3] == prev[2]._version:
+                    value = prev[2]
+                else:
+                    value_copy = value.clone()
+                    self.published_options[key] = (value, value._version, value_copy, value_copy._version)
+                    self.published_bytes_cloned += value_copy.numel() * value_copy.element_size()
+                    value = value_copy
+            else:
+                self.published_options.pop(key, None)
+            published[key] = value
+        
+        self.update_transformer_options(published)
+
     def set_coeff(self,
                 rk_type    : str,
                 h          : Tensor,
@@ -278,30 +342,51 @@ class RK_Method_Beta:
         sigma            = sigmas[step]
         sigma_next       = sigmas[step+1]
         
-        h_prev = []
-        a, b, u, v, ci, multistep_stages, hybrid_stages, FSAL = get_rk_methods_beta(rk_type,
-                                                                                    h,
-                                                                                    c1,
-                                                                                    c2,
-                                                                                    c3,
-                                                                                    h_prev,
-                                                                                    step,
-                                                                                    sigmas,
-                                                                                    sigma,
-                                                                                    sigma_next,
-                                                                                    sigma_down,
-                                                                                    self.extra_options,
-                                                                                    )
+        key = self.tableau_key(rk_type, h, c1, c2, c3, step, sigmas, sigma_down)
+        
+        if key is not None and key in TABLEAU_CACHE:
+            TABLEAU_CACHE[key] = TABLEAU_CACHE.pop(key)
+            self.tableau_cache_hits += 1
+            
+            A, B, C, U, V, multistep_stages, hybrid_stages = TABLEAU_CACHE[key]
+            
+        else:
+            h_prev = []
+            a, b, u, v, ci, multistep_stages, hybrid_stages, FSAL = get_rk_methods_beta(rk_type,
+                                                                                        h,
+                                                                                        c1,
+                                                                                        c2,
+                                                                                        c3,
+                                                                                        h_prev,
+                                                                                        step,
+                                                                                        sigmas,
+                                                                                        sigma,
+                                                                                        sigma_next,
+                                                                                        sigma_down,
+                                                                                        self.extra_options,
+                                                                                        )
+            
+            A = torch.tensor(a,  dtype=h.dtype, device=h.device)
+            B = torch.tensor(b,  dtype=h.dtype, device=h.device)
+            C = torch.tensor(ci, dtype=h.dtype, device=h.device)
+
+            U = torch.tensor(u,  dtype=h.dtype, device=h.device) if u is not None else None
+            V = torch.tensor(v,  dtype=h.dtype, device=h.device) if v is not None else None
+            
+            if key is not None:
+                self.tableau_cache_misses += 1
+                if len(TABLEAU_CACHE) >= TABLEAU_CACHE_SIZE:
+                    TABLEAU_CACHE.pop(next(iter(TABLEAU_CACHE)))
+                TABLEAU_CACHE[key] = (A, B, C, U, V, multistep_stages, hybrid_stages)
         
         self.multistep_stages = multistep_stages
         self.hybrid_stages    = hybrid_stages
         
-        self.A = torch.tensor(a,  dtype=h.dtype, device=h.device)
-        self.B = torch.tensor(b,  dtype=h.dtype, device=h.device)
-        self.C = torch.tensor(ci, dtype=h.dtype, device=h.device)
-
-        self.U = torch.tensor(u,  dtype=h.dtype, device=h.device) if u is not None else None
-        self.V = torch.tensor(v,  dtype=h.dtype, device=h.device) if v is not None else None
+        self.A = A
+        self.B = B.clone()    # reorder_tableau() writes into B, keep the cached copy intact
+        self.C = C
+        self.U = U
+        self.V = V
         
         self.rows = self.A.shape[0]
         self.cols = self.A.shape[1]
@@ -313,6 +398,33 @@ class RK_Method_Beta:
 
 
 
+    def tableau_key(self,
+                    rk_type    : str,
+                    h          : Tensor,
+                    c1         : float,
+                    c2         : float,
+                    c3         : float,
+                    step       : int,
+                    sigmas     : Tensor,
+                    sigma_down : Optional[Tensor],
+                    ) -> Optional[tuple]:
+        """
+        Everything get_rk_methods_beta() depends on. The step index and full schedule cover the multistep/deis history and
+        the extra options string covers any overrides. None (don't cache) for random c1..c3 or when disabled.
+        """
+        if self.EO.compile().disable_tableau_cache:
+            return None
+        
+        c = tuple(c.item() if isinstance(c, Tensor) else c for c in (c1, c2, c3))
+        if -1 in c:
+            return None
+        
+        sigma_down = sigma_down.item() if isinstance(sigma_down, Tensor) else sigma_down
+        
+        return (rk_type, step, h.item(), c, sigma_down, tuple(sigmas.tolist()), self.extra_options, h.dtype, str(h.device))
+
+
+
     def reorder_tableau(self, indices:list[int]) -> None:
         #if indices[0]:
         self.A    = self.A   [indices]
@@ -362,8 +474,9 @@ class RK_Method_Beta:
         #eps_     [row] = eps_row
         #eps_prev_[row] = eps_prev_row
         
-        if (self.SYNC_SUBSTEP_MEAN_CW and h_new != h_new_orig) or self.EO("sync_mean_noise"):
-            if not self.EO("disable_sync_mean_noise"):
+        opts = self.EO.compile()
+        if (self.SYNC_SUBSTEP_MEAN_CW and h_new != h_new_orig) or opts.sync_mean_noise:
+            if not opts.disable_sync_mean_noise:
                 x_row_down = x_0 + h_new_orig * zr
                 x_[row_tmp_offset] = x_[row_tmp_offset] - x_[row_tmp_offset].mean(dim=(-2,-1), keepdim=True) + x_row_down.mean(dim=(-2,-1), keepdim=True)
         
@@ -371,17 +484,23 @@ class RK_Method_Beta:
 
 
     
+    @staticmethod
+    def coeff_einsum(equation:str, coeff:Tensor, k:Tensor) -> Tensor:
+        # tableau stays in default_dtype, stages may be stored in a lower stage_dtype: accumulate in at least float32
+        dtype = torch.promote_types(k.dtype, torch.float32)
+        return torch.einsum(equation, coeff.to(dtype), k.to(dtype))
+    
     def a_k_einsum(self, row:int, k     :Tensor) -> Tensor:
-        return torch.einsum('i, i... -> ...', self.A[row], k[:self.cols])
+        return self.coeff_einsum('i, i... -> ...', self.A[row], k[:self.cols])
     
     def b_k_einsum(self, row:int, k     :Tensor) -> Tensor:
-        return torch.einsum('i, i... -> ...', self.B[row], k[:self.cols])
+        return self.coeff_einsum('i, i... -> ...', self.B[row], k[:self.cols])
     
     def u_k_einsum(self, row:int, k_prev:Tensor) -> Tensor:
-        return torch.einsum('i, i... -> ...', self.U[row], k_prev[:self.cols]) if (self.U is not None and k_prev is not None) else 0
+        return self.coeff_einsum('i, i... -> ...', self.U[row], k_prev[:self.cols]) if (self.U is not None and k_prev is not None) else 0
     
     def v_k_einsum(self, row:int, k_prev:Tensor) -> Tensor:
-        return torch.einsum('i, i... -> ...', self.V[row], k_prev[:self.cols]) if (self.V is not None and k_prev is not None) else 0
+        return self.coeff_einsum('i, i... -> ...', self.V[row], k_prev[:self.cols]) if (self.V is not None and k_prev is not None) else 0
     
     
     
@@ -392,9 +511,10 @@ class RK_Method_Beta:
             row = row - self.rows
             return self.b_k_einsum(row, k) + self.v_k_einsum(row, k_prev)
         
-    def zum_tableau(self,  k:Tensor, k_prev:Tensor=None,) -> Tensor:
-        a_k_sum = torch.einsum('ij, j... -> i...', self.A, k[:self.cols])
-        u_k_sum = torch.einsum('ij, j... -> i...', self.U, k_prev[:self.cols]) if (self.U is not None and k_prev is not None) else 0
+    def zum_tableau(self,  k:Tensor, k_prev:Tensor=None, rows:Optional[int]=None) -> Tensor:
+        rows    = self.rows if rows is None else rows
+        a_k_sum = self.coeff_einsum('ij, j... -> i...', self.A[:rows], k[:self.cols])
+        u_k_sum = self.coeff_einsum('ij, j... -> i...', self.U[:rows], k_prev[:self.cols]) if (self.U is not None and k_prev is not None) else 0
         return a_k_sum + u_k_sum
         
 
@@ -412,16 +532,12 @@ class RK_Method_Beta:
             
             
     def calc_cfg_channelwise(self, denoised:Tensor) -> Tensor:
-        if self.cfg_cw != 1.0:            
-            avg = 0
-            for b, c in itertools.product(range(denoised.shape[0]), range(denoised.shape[1])):
-                avg     += torch.norm(denoised[b][c] - self.uncond[0][b][c])
-            avg  /= denoised.shape[1]
-            
-            for b, c in itertools.product(range(denoised.shape[0]), range(denoised.shape[1])):
-                ratio     = torch.nan_to_num(torch.norm(denoised[b][c] - self.uncond[0][b][c])   /   avg,     0)
-                denoised_new = self.uncond[0] + ratio * self.cfg_cw * (denoised - self.uncond[0])
-            return denoised_new
+        if self.cfg_cw != 1.0:
+            diff  = denoised - self.uncond[0]
+            norms = diff.flatten(2).norm(dim=-1)                                         # [B, C], one reduction, no host sync
+            ratio = torch.nan_to_num(norms / norms.mean(dim=1, keepdim=True), 0)         # each channel vs. the mean over its batch item
+            ratio = ratio.view(*ratio.shape, *([1] * (denoised.ndim - 2)))
+            return self.uncond[0] + ratio * self.cfg_cw * diff
         else:
             return denoised
         
@@ -622,76 +738,114 @@ class RK_Method_Beta:
                 sync_mask = 1.
             
         
-        if self.EO("bong_start_step", 0) > step or step > self.EO("bong_stop_step", 10000) or (self.unsample_bongmath == False and s_[-1] > s_[0]):
+        opts = self.EO.compile()
+        if opts.bong_start_step > step or step > opts.bong_stop_step or (self.unsample_bongmath == False and s_[-1] > s_[0]):
             return x_0, x_, eps_
         
         bong_iter_max_row = self.rows - row_offset
-        if self.EO("bong_iter_max_row_full"):
+        if opts.bong_iter_max_row_full:
             bong_iter_max_row = self.rows
             
-        if self.EO("bong_iter_lock_x_0_ch_means"):
+        n_rows       = row + row_offset
+        BONG_ROWWISE = opts.bong_iter_rowwise                       # reference row-by-row update, otherwise all rows are updated as one stacked op
+        LOCK_X_0     = opts.bong_iter_lock_x_0_ch_means
+        LOCK_X_ROW   = opts.bong_iter_lock_x_row_ch_means
+        ZONKYTAR     = opts.zonkytar
+        BONG_SYNC    = BONGMATH_Y and not ZONKYTAR and not opts.disable_bongmath_y
+        SYNC_X2Y     = opts.sync_x2y
+        
+        if LOCK_X_0:
             x_0_ch_means = x_0.mean(dim=norm_dim, keepdim=True)
             
-        if self.EO("bong_iter_lock_x_row_ch_means"):
-            x_row_means = []
-            for rr in range(row+row_offset):
-                x_row_mean = x_[rr].mean(dim=norm_dim, keepdim=True)
-                x_row_means.append(x_row_mean)
+        if LOCK_X_ROW:
+            x_row_means = x_[:n_rows].mean(dim=norm_dim, keepdim=True)
         
         if row < bong_iter_max_row   and   self.multistep_stages == 0:
-            bong_strength = self.EO("bong_strength", 1.0)
+            bong_strength = opts.bong_strength
             
             if bong_strength != 1.0:
                 x_0_tmp  = x_0 .clone()
                 x_tmp_   = x_  .clone()
                 eps_tmp_ = eps_.clone()
 
-            for i in range(100):     #bongmath for eps_prev_ not implemented?
-                x_0 = x_[row+row_offset] - h * self.zum(row+row_offset, eps_, eps_prev_)
+            bong_iter_max = opts.bong_iter_max
+            bong_iter_tol = opts.bong_iter_tol                 # relative change in x_0 below which iteration stops early
+            residual      = None
+            
+            s_rows = s_[:n_rows].view(-1, *[1] * x_0.ndim)
+            
+            for i in range(bong_iter_max):     #bongmath for eps_prev_ not implemented?
+                x_0_prev = x_0
+                x_0 = x_[n_rows] - h * self.zum(n_rows, eps_, eps_prev_)
                 
-                if self.EO("bong_iter_lock_x_0_ch_means"):
+                if LOCK_X_0:
                     x_0 = x_0 - x_0.mean(dim=norm_dim, keepdim=True) + x_0_ch_means
                 
-                for rr in range(row+row_offset):
-                    x_[rr] = x_0 + h * self.zum(rr, eps_, eps_prev_)
-                
-                if self.EO("bong_iter_lock_x_row_ch_means"):
-                    for rr in range(row+row_offset):
-                        x_[rr] = x_[rr] - x_[rr].mean(dim=norm_dim, keepdim=True) + x_row_means[rr]
+                if BONG_ROWWISE:
+                    for rr in range(n_rows):
+                        x_[rr] = x_0 + h * self.zum(rr, eps_, eps_prev_)
+                    
+                    if LOCK_X_ROW:
+                        for rr in range(n_rows):
+                            x_[rr] = x_[rr] - x_[rr].mean(dim=norm_dim, keepdim=True) + x_row_means[rr]
+                            
+                elif n_rows > 0:
+                    x_[:n_rows] = x_0 + h * self.zum_tableau(eps_, eps_prev_, rows=n_rows)
+                    
+                    if LOCK_X_ROW:
+                        x_[:n_rows] = x_[:n_rows] - x_[:n_rows].mean(dim=norm_dim, keepdim=True) + x_row_means
                 
-                for rr in range(row+row_offset):
-                    if self.EO("zonkytar"):
-                        #eps_[rr] = self.get_unsample_epsilon(x_[rr], x_0, data_[rr], sigma, s_[rr])
-                        eps_[rr] = self.get_epsilon(x_[rr], x_0, data_[rr], sigma, s_[rr])
-                    else:
-                        if BONGMATH_Y and not self.EO("disable_bongmath_y"):
-                            if self.EXPONENTIAL:
-                                eps_x_ = data_x_ - x_0
-                                eps_x2y_ = data_y_ - x_0
-                                if self.VE_MODEL:
-                                    eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (-eps_y_+sigma*(-noise_sync))
-                                    if self.EO("sync_x2y"):
-                                        eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (-eps_x2y_+sigma*(-noise_sync))
-                                else:
-                                    eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (-eps_y_+sigma*(y0_bongflow-noise_sync))
-                                    if self.EO("sync_x2y"):
-                                        eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (-eps_x2y_+sigma*(y0_bongflow-noise_sync))
+                if BONG_SYNC:
+                    if n_rows > 0:                  # does not depend on the row, so only needs computing once
+                        if self.EXPONENTIAL:
+                            eps_x_ = data_x_ - x_0
+                            eps_x2y_ = data_y_ - x_0
+                            if self.VE_MODEL:
+                                eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (-eps_y_+sigma*(-noise_sync))
+                                if SYNC_X2Y:
+                                    eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (-eps_x2y_+sigma*(-noise_sync))
                             else:
-                                eps_x_  [:s_.shape[0]] = (x_[:s_.shape[0]] - data_x_[:s_.shape[0]]) / s_.view(-1,1,1,1,1)   # or should it be vs x_0???
-                                eps_x2y_ = torch.zeros_like(eps_x_)
-                                eps_x2y_[:s_.shape[0]] = (x_[:s_.shape[0]] - data_y_[:s_.shape[0]]) / s_.view(-1,1,1,1,1)   # or should it be vs x_0???
-
-                                if self.VE_MODEL:
-                                    eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (noise_sync-eps_y_)
-                                    if self.EO("sync_x2y"):
-                                        eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (noise_sync-eps_x2y_)
-                                else: 
-                                    eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (noise_sync-eps_y_-y0_bongflow)
-                                    if self.EO("sync_x2y"):
-                                        eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (noise_sync-eps_x2y_-y0_bongflow)
-
+                                eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (-eps_y_+sigma*(y0_bongflow-noise_sync))
+                                if SYNC_X2Y:
+                                    eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (-eps_x2y_+sigma*(y0_bongflow-noise_sync))
+                        else:
+                            eps_x_  [:s_.shape[0]] = (x_[:s_.shape[0]] - data_x_[:s_.shape[0]]) / s_.view(-1,1,1,1,1)   # or should it be vs x_0???
+                            eps_x2y_ = torch.zeros_like(eps_x_)
+                            eps_x2y_[:s_.shape[0]] = (x_[:s_.shape[0]] - data_y_[:s_.shape[0]]) / s_.view(-1,1,1,1,1)   # or should it be vs x_0???
+
+                            if self.VE_MODEL:
+                                eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (noise_sync-eps_y_)
+                                if SYNC_X2Y:
+                                    eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (noise_sync-eps_x2y_)
+                            else: 
+                                eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (noise_sync-eps_y_-y0_bongflow)
+                                if SYNC_X2Y:
+                                    eps_ = sync_mask * eps_x_   +   (1-sync_mask) * eps_x2y_   +   weight_mask * (noise_sync-eps_x2y_-y0_bongflow)
+                
+                elif BONG_ROWWISE:
+                    for rr in range(n_rows):
+                        if ZONKYTAR:
+                            #eps_[rr] = self.get_unsample_epsilon(x_[rr], x_0, data_[rr], sigma, s_[rr])
+                            eps_[rr] = self.get_epsilon(x_[rr], x_0, data_[rr], sigma, s_[rr])
                         else:
                             eps_[rr] = self.get_epsilon(x_0, x_[rr], data_[rr], sigma, s_[rr])
+                            
+                elif n_rows > 0:
+                    if ZONKYTAR:
+                        eps_[:n_rows] = self.get_epsilon(x_[:n_rows], x_0, data_[:n_rows], sigma, s_rows)
+                    else:
+                        eps_[:n_rows] = self.get_epsilon(x_0, x_[:n_rows], data_[:n_rows], sigma, s_rows)
+                
+                if bong_iter_tol > 0:
+                    residual = self.bong_residual(x_0, x_0_prev)
+                    if residual < bong_iter_tol:
+                        break
+            
+            if bong_iter_max > 0:
+                if residual is None:
+                    residual = self.bong_residual(x_0, x_0_prev)
+                self.bong_iter_counts   [step] = self.bong_iter_counts.get(step, 0) + i + 1
+                self.bong_iter_residuals[step] = residual.detach()
                     
             if bong_strength != 1.0:
                 x_0  = x_0_tmp  + bong_strength * (x_0  - x_0_tmp)
@@ -701,6 +855,12 @@ class RK_Method_Beta:
         return x_0, x_, eps_ #,   yt_0, yt_
 
 
+    @staticmethod
+    def bong_residual(x_0:Tensor, x_0_prev:Tensor) -> Tensor:
+        """Relative change in x_0 as a 0-dim tensor, so only comparing it against bong_iter_tol syncs with the device."""
+        return torch.norm(x_0 - x_0_prev) / torch.norm(x_0_prev).clamp(min=1e-12)
+
+
     def newton_iter(self,
                     x_0        : Tensor,
                     x_         : Tensor,
@@ -717,23 +877,25 @@ class RK_Method_Beta:
                     ) -> Tuple[Tensor, Tensor]:
         if SYNC_GUIDE_ACTIVE:
             return x_, eps_
+        opts             = self.EO.compile()
         newton_iter_name = "newton_iter_" + newton_name
         
         default_anchor_x_all = False
         if newton_name == "lying":
             default_anchor_x_all = True
         
-        newton_iter                 = self.EO(newton_iter_name,                      100)
-        newton_iter_skip_last_steps = self.EO(newton_iter_name + "_skip_last_steps",   0)
-        newton_iter_mixing_rate     = self.EO(newton_iter_name + "_mixing_rate",     1.0)
+        newton_iter                 = getattr(opts, newton_iter_name)
+        newton_iter_skip_last_steps = getattr(opts, newton_iter_name + "_skip_last_steps")
+        newton_iter_mixing_rate     = getattr(opts, newton_iter_name + "_mixing_rate")
         
-        newton_iter_anchor          = self.EO(newton_iter_name + "_anchor",            0)
-        newton_iter_anchor_x_all    = self.EO(newton_iter_name + "_anchor_x_all",    default_anchor_x_all)
-        newton_iter_type            = self.EO(newton_iter_name + "_type",           "from_epsilon")
-        newton_iter_sequence        = self.EO(newton_iter_name + "_sequence",       "double")
+        newton_iter_anchor          = getattr(opts, newton_iter_name + "_anchor")
+        newton_iter_anchor_x_all    = getattr(opts, newton_iter_name + "_anchor_x_all")
+        newton_iter_anchor_x_all    = default_anchor_x_all if newton_iter_anchor_x_all is None else newton_iter_anchor_x_all
+        newton_iter_type            = getattr(opts, newton_iter_name + "_type")
+        newton_iter_sequence        = getattr(opts, newton_iter_name + "_sequence")
         
         row_b_offset = 0
-        if self.EO(newton_iter_name + "_include_row_b"):
+        if getattr(opts, newton_iter_name + "_include_row_b"):
             row_b_offset = 1
         
         if step >= len(sigmas)-1-newton_iter_skip_last_steps   or   sigmas[step+1] == 0   or   not self.IMPLICIT:
@@ -780,8 +942,8 @@ class RK_Method_Beta:
                     elif newton_iter_type == "from_epsilon":
                         eps_ [r_] = self.get_epsilon(x_0, x_[r_], data_[r_], sigma, s_[r_])
                     
-                    if self.EO(newton_iter_name + "_opt"):
-                        opt_timing, opt_type, opt_subtype = self.EO(newton_iter_name+"_opt", [str])
+                    if newton_iter_name + "_opt" in opts.given:
+                        opt_timing, opt_type, opt_subtype = getattr(opts, newton_iter_name + "_opt")
                         
                         opt_start, opt_stop = 0, self.rows+row_b_offset
                         if    opt_timing == "early":
@@ -927,7 +1089,7 @@ class RK_Method_Exponential(RK_Method_Beta):
         else:
             eps_unmoored = y - x 
         
-        if self.EO("manually_anchor_unsampler"):
+        if self.EO.compile().manually_anchor_unsampler:
             if sigma_down > sigma:
                 eps_anchored = (sigma    /(self.sigma_max - sigma)) * (x_0 - y)
             else:
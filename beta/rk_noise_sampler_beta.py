@@ -258,18 +258,19 @@ class RK_NoiseSampler:
         self.overshoot_substep   = overshoot_substep
 
 
+        opts = self.EO.compile()
         if row < self.rows   and   self.s_[row+self.row_offset+multistep_stages] > 0:
-            if   diag_iter > 0 and diag_iter == implicit_steps_diag and self.EO("implicit_substep_skip_final_eta"):
+            if   diag_iter > 0 and diag_iter == implicit_steps_diag and opts.implicit_substep_skip_final_eta:
                 pass
-            elif diag_iter > 0 and                                      self.EO("implicit_substep_only_first_eta"):
+            elif diag_iter > 0 and                                      opts.implicit_substep_only_first_eta:
                 pass
-            elif full_iter > 0 and full_iter == implicit_steps_full and self.EO("implicit_step_skip_final_eta"):
+            elif full_iter > 0 and full_iter == implicit_steps_full and opts.implicit_step_skip_final_eta:
                 pass
-            elif full_iter > 0 and                                      self.EO("implicit_step_only_first_eta"):
+            elif full_iter > 0 and                                      opts.implicit_step_only_first_eta:
                 pass
             elif (full_iter > 0 or diag_iter > 0)                   and self.noise_sampler_type2 == "brownian":
                 pass # brownian noise does not increment its seed when generated, deactivate on implicit repeats to avoid burn
-            elif full_iter > 0 and                                      self.EO("implicit_step_only_first_all_eta"):
+            elif full_iter > 0 and                                      opts.implicit_step_only_first_all_eta:
                 self.sigma_down_eta   = self.sigma_next
                 self.sigma_up_eta    *= 0
                 self.alpha_ratio_eta /= self.alpha_ratio_eta
@@ -280,7 +281,7 @@ class RK_NoiseSampler:
                 
                 self.h_new = self.h = self.h_no_eta
             
-            elif (row < self.rows-self.row_offset-multistep_stages   or   diag_iter < implicit_steps_diag)   or   self.EO("substep_eta_use_final"):
+            elif (row < self.rows-self.row_offset-multistep_stages   or   diag_iter < implicit_steps_diag)   or   opts.substep_eta_use_final:
                 self.sub_sigma_up,     self.sub_sigma,     self.sub_sigma_down,     self.sub_alpha_ratio     = self.get_sde_substep(sigma               = self.s_[row],
                                                                                                                                     sigma_next          = self.s_[row+self.row_offset+multistep_stages],
                                                                                                                                     eta                 = overshoot_substep,
@@ -444,7 +445,7 @@ class RK_NoiseSampler:
         if brownian_sigma == brownian_sigma_next:
             brownian_sigma_next *= 0.999
             
-        if brownian_sigma_next > brownian_sigma and not self.EO("disable_brownian_swap"): # should this really be done?
+        if brownian_sigma_next > brownian_sigma and not self.EO.compile().disable_brownian_swap: # should this really be done?
             brownian_sigma, brownian_sigma_next = brownian_sigma_next, brownian_sigma
         
         noise = self.noise_sampler(sigma=brownian_sigma, sigma_next=brownian_sigma_next)
@@ -475,7 +476,7 @@ class RK_NoiseSampler:
         if brownian_sigma == brownian_sigma_next:
             brownian_sigma_next *= 0.999
 
-        if brownian_sigma_next > brownian_sigma and not self.EO("disable_brownian_swap"): # should this really be done?
+        if brownian_sigma_next > brownian_sigma and not self.EO.compile().disable_brownian_swap: # should this really be done?
             brownian_sigma, brownian_sigma_next = brownian_sigma_next, brownian_sigma
         
         noise = self.noise_sampler2(sigma=brownian_sigma, sigma_next=brownian_sigma_next)
@@ -507,7 +508,7 @@ class RK_NoiseSampler:
         eps_next      = (x_0 - x_next) / (self.sigma - self.sigma_next)
         denoised_next = x_0 - self.sigma * eps_next
         
-        if brownian_sigma_next > brownian_sigma and not self.EO("disable_brownian_swap"): # should this really be done?
+        if brownian_sigma_next > brownian_sigma and not self.EO.compile().disable_brownian_swap: # should this really be done?
             brownian_sigma, brownian_sigma_next = brownian_sigma_next, brownian_sigma
         
         noise = self.noise_sampler(sigma=brownian_sigma, sigma_next=brownian_sigma_next)
@@ -536,7 +537,7 @@ class RK_NoiseSampler:
         eps_next      = (x_0 - x_next) / (self.sigma - self.sub_sigma_next)
         denoised_next = x_0 - self.sigma * eps_next
         
-        if brownian_sigma_next > brownian_sigma and not self.EO("disable_brownian_swap"): # should this really be done?
+        if brownian_sigma_next > brownian_sigma and not self.EO.compile().disable_brownian_swap: # should this really be done?
             brownian_sigma, brownian_sigma_next = brownian_sigma_next, brownian_sigma
         
         noise = self.noise_sampler2(sigma=brownian_sigma, sigma_next=brownian_sigma_next)
@@ -567,7 +568,7 @@ class RK_NoiseSampler:
         eps_next      = (x_0 - x_next) / ((1-self.sigma) - (1-self.sub_sigma_next))
         denoised_next = x_0 - (1-self.sigma) * eps_next
         
-        if brownian_sigma_next > brownian_sigma and not self.EO("disable_brownian_swap"): # should this really be done?
+        if brownian_sigma_next > brownian_sigma and not self.EO.compile().disable_brownian_swap: # should this really be done?
             brownian_sigma, brownian_sigma_next = brownian_sigma_next, brownian_sigma
         
         noise = self.noise_sampler2(sigma=brownian_sigma, sigma_next=brownian_sigma_next)
@@ -0,0 +1,134 @@
+import torch
+
+from torch  import Tensor
+from typing import Tuple, List, Dict, Any, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .rk_method_beta        import RK_Method_Exponential, RK_Method_Linear
+    from .rk_noise_sampler_beta import RK_NoiseSampler
+
+
+
+RK_PLAN_ATTRS = ("rk_type",
+                 "IMPLICIT",
+                 "EXPONENTIAL",
+                 "multistep_stages",
+                 "hybrid_stages",
+                 "A",
+                 "B",
+                 "C",
+                 "U",
+                 "V",
+                 "rows",
+                 "cols",
+                 "row_offset",
+                 )
+
+NS_PLAN_SCALARS = ("sigma_up_eta",
+                   "sigma_eta",
+                   "sigma_down_eta",
+                   "alpha_ratio_eta",
+                   "sigma_up",
+                   "sigma",
+                   "sigma_down",
+                   "alpha_ratio",
+                   "h",
+                   "h_no_eta",
+                   )
+
+
+
+class RK_Plan:
+    """
+    Tableau, SDE coefficients and substep sigmas for every step of a schedule, computed before the sampling loop starts so that
+    each step only indexes into it. The per-step scalars (sigma_up/down, alpha_ratio, h, ...) are stacked into one tensor each.
+
+    A step is only served from the plan if the schedule, rk_type and eta/overshoot/s_noise it was planned with still hold.
+    Anything that changes them mid-run (rk_swap, d_noise, restarts) falls back to the usual set_sde_step()/set_coeff() path.
+    """
+    def __init__(self, sigmas:Tensor):
+        self.sigmas  = sigmas
+        self.index   : Dict[int, int]             = {}   # step -> row in the stacked tensors
+        self.inputs  : List[Tuple]                = []   # (rk_type, eta, overshoot, s_noise) each step was planned with
+        self.rk      : List[Dict[str, Any]]       = []
+        self.s_      : List[Tensor]               = []
+        self.stacked : Dict[str, Tensor]          = {}
+
+        self.hits    = 0
+        self.misses  = 0
+
+    @staticmethod
+    def plan_inputs(rk_type:str, eta, overshoot, s_noise) -> Tuple:
+        return (rk_type, float(eta), float(overshoot), float(s_noise))
+
+    def add_step(self,
+                RK        : Union["RK_Method_Exponential", "RK_Method_Linear"],
+                NS        : "RK_NoiseSampler",
+                rk_type   : str,
+                step      : int,
+                eta,
+                overshoot,
+                s_noise,
+                c1        : float = 0.0,
+                c2        : float = 0.5,
+                c3        : float = 1.0,
+                ) -> None:
+
+        sigma, sigma_next = self.sigmas[step], self.sigmas[step+1]
+
+        NS.set_sde_step(sigma, sigma_next, eta, overshoot, s_noise)
+        RK.set_coeff(rk_type, NS.h, c1, c2, c3, step, self.sigmas, NS.sigma_down)
+        NS.set_substep_list(RK)
+
+        self.index[step] = len(self.inputs)
+        self.inputs.append(self.plan_inputs(rk_type, eta, overshoot, s_noise))
+        self.rk    .append({attr: getattr(RK, attr) for attr in RK_PLAN_ATTRS})
+        self.rk[-1]['B'] = RK.B.clone()
+        self.s_    .append(NS.s_.clone())
+
+        for attr in NS_PLAN_SCALARS:
+            self.stacked.setdefault(attr, []).append(torch.as_tensor(getattr(NS, attr), dtype=self.sigmas.dtype, device=self.sigmas.device))
+
+    def finalize(self) -> "RK_Plan":
+        self.stacked = {attr: torch.stack(values) for attr, values in self.stacked.items()}
+        return self
+
+    def apply(self,
+            RK        : Union["RK_Method_Exponential", "RK_Method_Linear"],
+            NS        : "RK_NoiseSampler",
+            rk_type   : str,
+            step      : int,
+            sigmas    : Tensor,
+            eta,
+            overshoot,
+            s_noise,
+            ) -> bool:
+        """
+        Load the planned step into RK and NS, same end state as set_sde_step() + set_coeff() + set_substep_list().
+        Returns False without touching anything if the step wasn't planned for these inputs.
+        """
+        idx = self.index.get(step)
+        if idx is None or sigmas is not self.sigmas or self.inputs[idx] != self.plan_inputs(rk_type, eta, overshoot, s_noise):
+            self.misses += 1
+            return False
+        self.hits += 1
+
+        NS.sigma_0    = sigmas[step]
+        NS.sigma_next = sigmas[step+1]
+        NS.s_noise    = s_noise
+        NS.eta        = eta
+        NS.overshoot  = overshoot
+
+        for attr, values in self.stacked.items():            # clone: set_sde_substep() updates some of these in place
+            setattr(NS, attr, values[idx].clone())
+
+        for attr, value in self.rk[idx].items():
+            setattr(RK, attr, value)
+        RK.B = RK.B.clone()                                  # reorder_tableau() writes into B
+
+        NS.multistep_stages = RK.multistep_stages
+        NS.rows             = RK.rows
+        NS.C                = RK.C
+        NS.s_               = self.s_[idx].clone()
+
+        return True
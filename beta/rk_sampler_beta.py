@@ -12,11 +12,13 @@ import comfy
 
 from ..res4lyf              import RESplain
 from ..helper               import ExtraOptions, FrameWeightsManager
-from ..latents              import lagrange_interpolation, get_collinear, get_orthogonal, get_cosine_similarity, get_pearson_similarity, get_slerp_weight_for_cossim, get_slerp_ratio, slerp_tensor, get_edge_mask, normalize_zscore, compute_slerp_ratio_for_target, find_slerp_ratio_grid
+from ..latents              import lagrange_interpolation, get_collinear, get_orthogonal, get_cosine_similarity, get_pearson_similarity, get_slerp_weight_for_cossim, get_slerp_ratio, slerp_tensor, get_edge_mask, normalize_zscore, compute_slerp_ratio_for_target, find_slerp_ratio_grid, adain_patchwise_row_batch
 
 from .rk_method_beta        import RK_Method_Beta
 from .rk_noise_sampler_beta import RK_NoiseSampler
 from .rk_guide_func_beta    import LatentGuide
+from .rk_state_beta         import RK_StateHandoff, RK_History
+from .rk_plan_beta          import RK_Plan
 from .phi_functions         import Phi
 from .constants             import MAX_STEPS, GUIDE_MODE_NAMES_PSEUDOIMPLICIT
 
@@ -38,8 +40,9 @@ def init_implicit_sampling(
         SYNC_GUIDE_ACTIVE,
         ):
     
+    opts  = EO.compile()
     sigma = sigmas[step]
-    if EO("implicit_skip_model_call_at_start") and denoised.sum() + eps.sum() != 0:
+    if opts.implicit_skip_model_call_at_start and denoised.sum() + eps.sum() != 0:
         if denoised_prev2.sum() == 0:
             eps_ [0] = eps.clone()
             data_[0] = denoised.clone()
@@ -48,7 +51,7 @@ def init_implicit_sampling(
             sratio = sigma - s_[0]
             data_[0] = denoised + sratio * (denoised - denoised_prev2)
             
-    elif EO("implicit_full_skip_model_call_at_start") and denoised.sum() + eps.sum() != 0:
+    elif opts.implicit_full_skip_model_call_at_start and denoised.sum() + eps.sum() != 0:
         if denoised_prev2.sum() == 0:
             eps_ [0] = eps.clone()
             data_[0] = denoised.clone()
@@ -59,7 +62,7 @@ def init_implicit_sampling(
                 data_[r] = denoised + sratio * (denoised - denoised_prev2)
                 eps_ [r] = RK.get_epsilon_anchored(x_0, data_[r], s_[r])
 
-    elif EO("implicit_lagrange_skip_model_call_at_start") and denoised.sum() + eps.sum() != 0:
+    elif opts.implicit_lagrange_skip_model_call_at_start and denoised.sum() + eps.sum() != 0:
         if denoised_prev2.sum() == 0:
             eps_ [0] = eps.clone()
             data_[0] = denoised.clone()
@@ -75,13 +78,13 @@ def init_implicit_sampling(
                 data_[r] = lagrange_interpolation([0,1], [denoised_prev2, denoised], 1 + w*RK.C[r]).squeeze(0) + denoised_prev2 - denoised
                 eps_ [r] = RK.get_epsilon_anchored(x_0, data_[r], s_[r])      
                 
-            if EO("implicit_lagrange_skip_model_call_at_start_0_only"):
+            if opts.implicit_lagrange_skip_model_call_at_start_0_only:
                 for r in range(RK.rows):
                     eps_ [r] = eps_ [0].clone() * s_[0] / s_[r]
                     data_[r] = denoised.clone()
 
 
-    elif EO("implicit_lagrange_init") and denoised.sum() + eps.sum() != 0:
+    elif opts.implicit_lagrange_init and denoised.sum() + eps.sum() != 0:
         sigma_prev    = sigmas[step-1]
         h_prev        = sigma - sigma_prev
         w             = h / h_prev
@@ -97,7 +100,7 @@ def init_implicit_sampling(
         
         eps_[0], data_[0] = RK(x_[0], sigma, x_0, sigma)
 
-    if not EO(("implicit_lagrange_init", "radaucycle", "implicit_full_skip_model_call_at_start", "implicit_lagrange_skip_model_call_at_start")):
+    if not any((opts.implicit_lagrange_init, opts.radaucycle, opts.implicit_full_skip_model_call_at_start, opts.implicit_lagrange_skip_model_call_at_start)):
         for r in range(RK.rows):
             eps_ [r] = eps_ [0].clone() * sigma / s_[r]
             data_[r] = data_[0].clone()
@@ -239,11 +242,18 @@ def sample_rk_beta(
         return x
     
     EO             = ExtraOptions(extra_options)
-    default_dtype  = EO("default_dtype", torch.float64)
+    opts           = EO.compile()                                                                           # read in the step loop instead of EO()
+    unknown_opts   = EO.unknown_options()
+    if unknown_opts:
+        RESplain("Unknown extra_options, check spelling:", ", ".join(unknown_opts))
+    default_dtype  = opts.default_dtype                                                                     # sigmas, h, tableau, SDE coefficients
+    stage_dtype    = getattr(torch, opts.stage_dtype) if opts.stage_dtype else default_dtype                # storage for the stage buffers x_, data_, eps_...
+    work_dtype     = torch.promote_types(stage_dtype, torch.float32) if opts.stage_dtype else default_dtype  # x, denoised, stage combinations: at least float32
     
     extra_args     = {} if extra_args     is None else extra_args
     model_device   = model.inner_model.inner_model.device #x.device
-    work_device    = 'cpu' if EO("work_device_cpu") else model_device
+    work_device    = 'cpu' if opts.work_device_cpu else model_device
+    HANDOFF        = RK_StateHandoff(EO, work_device)
 
     state_info     = {} if state_info     is None else state_info
     state_info_out = {} if state_info_out is None else state_info_out
@@ -253,9 +263,9 @@ def sample_rk_beta(
     RENOISE = False
     if 'raw_x' in state_info and sampler_mode in {"resample", "unsample"}:
         if x.shape == state_info['raw_x'].shape:
-            x = state_info['raw_x'].to(work_device) #clone()
+            x = HANDOFF.load(state_info, 'raw_x')
         else:
-            denoised = comfy.utils.bislerp(state_info['denoised'], x.shape[-1], x.shape[-2])
+            denoised = comfy.utils.bislerp(HANDOFF.load(state_info, 'denoised'), x.shape[-1], x.shape[-2])
             x = denoised.to(x)
             RENOISE = True
         RESplain("Continuing from raw latent from previous sampler.", debug=False)
@@ -287,7 +297,7 @@ def sample_rk_beta(
         sde_mask = sde_mask.to(x.device).to(x.dtype)
     
 
-    x      = x     .to(dtype=default_dtype, device=work_device)
+    x      = x     .to(dtype=work_dtype,    device=work_device)
     sigmas = sigmas.to(dtype=default_dtype, device=work_device)
     
 
@@ -303,9 +313,9 @@ def sample_rk_beta(
     pseudoimplicit_row_weights  = EO("pseudoimplicit_row_weights" , [1. for _ in range(100)])
     pseudoimplicit_step_weights = EO("pseudoimplicit_step_weights", [1. for _ in range(max(implicit_steps_diag, implicit_steps_full)+1)])
 
-    noise_scaling_cycles = EO("noise_scaling_cycles", 1)
-    noise_boost_step     = EO("noise_boost_step",     0.0)
-    noise_boost_substep  = EO("noise_boost_substep",  0.0)
+    noise_scaling_cycles = opts.noise_scaling_cycles
+    noise_boost_step     = opts.noise_boost_step
+    noise_boost_substep  = opts.noise_boost_substep
     
     # SETUP SAMPLER
     if implicit_sampler_name not in ("use_explicit", "none"):
@@ -365,10 +375,7 @@ def sample_rk_beta(
 
     data_               = None
     eps_                = None
-    eps                 = torch.zeros_like(x, dtype=default_dtype, device=work_device)
-    denoised            = torch.zeros_like(x, dtype=default_dtype, device=work_device)
-    denoised_prev       = torch.zeros_like(x, dtype=default_dtype, device=work_device)
-    denoised_prev2      = torch.zeros_like(x, dtype=default_dtype, device=work_device)
+    eps, denoised, denoised_prev, denoised_prev2 = (torch.zeros_like(x, dtype=work_dtype, device=work_device) for _ in range(4))
     x_                  = None
     eps_prev_           = None
     denoised_data_prev  = None
@@ -392,8 +399,8 @@ def sample_rk_beta(
     y0_standard_guide   = state_info.get('y0_standard_guide')
     y0_inv_standard_guide = state_info.get('y0_inv_standard_guide')
     
-    data_prev_y_        = state_info.get('data_prev_y_')
-    data_prev_x_        = state_info.get('data_prev_x_')
+    data_prev_y_        = RK_History(state_info['data_prev_y_']) if state_info.get('data_prev_y_') is not None else None
+    data_prev_x_        = RK_History(state_info['data_prev_x_']) if state_info.get('data_prev_x_') is not None else None
     data_prev_x2y_      = state_info.get('data_prev_x2y_')
 
     # BEGIN SAMPLING LOOP    
@@ -444,7 +451,7 @@ def sample_rk_beta(
             denoised_prev = LG.y0_inv
     data_cached = None
         
-    if EO("pseudo_mix_strength"):
+    if "pseudo_mix_strength" in opts.given:
         orig_y0     = LG.y0.clone()
         orig_y0_inv = LG.y0_inv.clone()
     
@@ -457,10 +464,10 @@ def sample_rk_beta(
     FLOW_RESUMED = False
     if state_info.get('FLOW_STARTED', False) and not state_info.get('FLOW_STOPPED', False):
         FLOW_RESUMED = True
-        y0 = state_info['y0'].to(work_device) 
-        data_cached = state_info['data_cached'].to(work_device) 
-        data_x_prev_ = state_info['data_x_prev_'].to(work_device) 
-    if EO("flow_use_init_noise") or EO("flow_use_smart_noise"):
+        y0           = HANDOFF.load(state_info, 'y0')
+        data_cached  = HANDOFF.load(state_info, 'data_cached')
+        data_x_prev_ = RK_History(HANDOFF.load(state_info, 'data_x_prev_'))
+    if opts.flow_use_init_noise or opts.flow_use_smart_noise:
         x_init = x.clone()
 
     #progress_bar = trange(len(sigmas)-1-start_step, disable=disable)
@@ -472,11 +479,14 @@ def sample_rk_beta(
     if AttnMask_neg is not None:
         RK.update_transformer_options({'AttnMask_neg'  : AttnMask_neg})
         RK.update_transformer_options({'RegContext_neg': RegContext_neg})
+    
+    attn_masks = [attn_mask for attn_mask in (AttnMask, AttnMask_neg) if attn_mask is not None]
+    attn_mask_bytes_start = sum(attn_mask.bytes_transferred for attn_mask in attn_masks)
         
-    if EO("y0_to_transformer_options"):
+    if opts.y0_to_transformer_options:
         RK.update_transformer_options({'y0':  LG.y0.clone()})
     
-    if EO("y0_inv_to_transformer_options"):
+    if opts.y0_inv_to_transformer_options:
         RK.update_transformer_options({'y0_inv':  LG.y0_inv.clone()})
         for block in model.inner_model.inner_model.diffusion_model.double_stream_blocks:
             for attr in ["txt_q_cache", "txt_k_cache", "txt_v_cache", "img_q_cache", "img_k_cache", "img_v_cache"]:
@@ -489,27 +499,27 @@ def sample_rk_beta(
                 if hasattr(block.block.attn1, attr):
                     delattr(block.block.attn1, attr)
 
-    RK.update_transformer_options({'ExtraOptions': copy.deepcopy(EO)})
-    if EO("update_cross_attn"):
+    RK.update_transformer_options({'ExtraOptions': copy.copy(EO)})        # parsed options are never mutated, only the lookup counter needs its own copy
+    if opts.update_cross_attn:
         update_cross_attn = {
-            'src_llama_start': EO('src_llama_start', 0),
-            'src_llama_end':   EO('src_llama_end', 0),
-            'src_t5_start':    EO('src_t5_start', 0),
-            'src_t5_end':      EO('src_t5_end', 0),
-
-            'tgt_llama_start': EO('tgt_llama_start', 0),
-            'tgt_llama_end':   EO('tgt_llama_end', 0),
-            'tgt_t5_start':    EO('tgt_t5_start', 0),
-            'tgt_t5_end':      EO('tgt_t5_end', 0),
-            'skip_cross_attn': EO('skip_cross_attn', False),
+            'src_llama_start': opts.src_llama_start,
+            'src_llama_end':   opts.src_llama_end,
+            'src_t5_start':    opts.src_t5_start,
+            'src_t5_end':      opts.src_t5_end,
+
+            'tgt_llama_start': opts.tgt_llama_start,
+            'tgt_llama_end':   opts.tgt_llama_end,
+            'tgt_t5_start':    opts.tgt_t5_start,
+            'tgt_t5_end':      opts.tgt_t5_end,
+            'skip_cross_attn': opts.skip_cross_attn,
             
-            'update_q':        EO('update_q', False),
-            'update_k':        EO('update_k', True),
-            'update_v':        EO('update_v', True),
+            'update_q':        opts.update_q,
+            'update_k':        opts.update_k,
+            'update_v':        opts.update_v,
             
             
-            'lamb':  EO('lamb', 0.01),
-            'erase': EO('erase', 10.0),
+            'lamb':  opts.lamb,
+            'erase': opts.erase,
         }
         RK.update_transformer_options({'update_cross_attn':  update_cross_attn})
     else:
@@ -526,8 +536,8 @@ def sample_rk_beta(
         
     sigmas_scheduled = sigmas.clone() # store for return in state_info_out
     
-    if EO("sigma_restarts"):
-        sigma_restarts = 1 + EO("sigma_restarts", 0)
+    if "sigma_restarts" in opts.given:
+        sigma_restarts = 1 + opts.sigma_restarts
         sigmas = sigmas[step:num_steps+1].repeat(sigma_restarts)
         step = 0
         num_steps = 2 * sigma_restarts - 1
@@ -550,6 +560,19 @@ def sample_rk_beta(
         RK.update_transformer_options({"freqsep_highpass_weight":guides.get("freqsep_highpass_weight")})
         RK.update_transformer_options({"freqsep_mask":           guides.get("freqsep_mask")})
 
+    RK_PLAN = None
+    if not opts.disable_step_plan and -1 not in (c1, c2, c3):
+        RK_PLAN = RK_Plan(sigmas)
+        for plan_step in range(step, num_steps):
+            if sigmas[plan_step+1] > sigmas[plan_step]:
+                plan_step_sched = torch.where(torch.flip(sigmas, dims=[0]) == sigmas[plan_step])[0][0].item()
+            else:
+                plan_step_sched = plan_step
+            plan_eta     = etas    [plan_step_sched] if etas     is not None else eta
+            plan_s_noise = s_noises[plan_step_sched] if s_noises is not None else s_noise
+            RK_PLAN.add_step(RK, NS, rk_type, plan_step, plan_eta, overshoot, plan_s_noise, c1, c2, c3)
+        RK_PLAN.finalize()
+
     # BEGIN SAMPLING LOOP
                 
     while step < num_steps:
@@ -563,10 +586,10 @@ def sample_rk_beta(
         
         if LG.HAS_LATENT_GUIDE_ADAIN:
             if LG.lgw_adain[step_sched] == 0.0:
-                RK.update_transformer_options({'y0_adain': None})
+                RK.publish_transformer_options({'y0_adain': None})
                 RK.update_transformer_options({'blocks_adain': {}})
             else:
-                RK.update_transformer_options({'y0_adain': LG.y0_adain.clone()})
+                RK.publish_transformer_options({'y0_adain': LG.y0_adain})
                 if 'blocks_adain_mmdit' in guides:
                     blocks_adain = {
                         "double_weights": [val * LG.lgw_adain[step_sched] for val in guides['blocks_adain_mmdit']['double_weights']],
@@ -578,11 +601,11 @@ def sample_rk_beta(
         
         if LG.HAS_LATENT_GUIDE_ATTNINJ:
             if LG.lgw_attninj[step_sched] == 0.0:
-                RK.update_transformer_options({'y0_attninj': None})
+                RK.publish_transformer_options({'y0_attninj': None})
                 RK.update_transformer_options({'blocks_attninj'    : {}})
                 RK.update_transformer_options({'blocks_attninj_qkv': {}})
             else:
-                RK.update_transformer_options({'y0_attninj': LG.y0_attninj.clone()})
+                RK.publish_transformer_options({'y0_attninj': LG.y0_attninj})
                 if 'blocks_attninj_mmdit' in guides:
                     blocks_attninj = {
                         "double_weights": [val * LG.lgw_attninj[step_sched] for val in guides['blocks_attninj_mmdit']['double_weights']],
@@ -595,19 +618,19 @@ def sample_rk_beta(
 
         if LG.HAS_LATENT_GUIDE_STYLE_POS:
             if LG.lgw_style_pos[step_sched] == 0.0:
-                RK.update_transformer_options({'y0_style_pos':        None})
+                RK.publish_transformer_options({'y0_style_pos':       None})
                 RK.update_transformer_options({'y0_style_pos_weight': 0.0})
                 RK.update_transformer_options({'y0_style_pos_synweight': 0.0})
                 RK.update_transformer_options({'y0_style_pos_mask': None})
             else:
-                RK.update_transformer_options({'y0_style_pos':        LG.y0_style_pos.clone()})
+                RK.publish_transformer_options({'y0_style_pos':       LG.y0_style_pos})
                 RK.update_transformer_options({'y0_style_pos_weight': LG.lgw_style_pos[step_sched]})
                 RK.update_transformer_options({'y0_style_pos_synweight': guides['synweight_style_pos']})
                 RK.update_transformer_options({'y0_style_pos_mask': LG.mask_style_pos})
                 RK.update_transformer_options({'y0_style_pos_mask_edge': guides.get('mask_edge_style_pos')})
                 RK.update_transformer_options({'y0_style_method': guides['style_method']})
                 
-                if EO("style_edge_width"):
+                if opts.style_edge_width:
                     RK.update_transformer
                 
                 #if LG.HAS_LATENT_GUIDE:
@@ -621,12 +644,12 @@ def sample_rk_beta(
 
         if LG.HAS_LATENT_GUIDE_STYLE_NEG:
             if LG.lgw_style_neg[step_sched] == 0.0:
-                RK.update_transformer_options({'y0_style_neg':        None})
+                RK.publish_transformer_options({'y0_style_neg':       None})
                 RK.update_transformer_options({'y0_style_neg_weight': 0.0})
                 RK.update_transformer_options({'y0_style_neg_synweight': 0.0})
                 RK.update_transformer_options({'y0_style_neg_mask': None})
             else:
-                RK.update_transformer_options({'y0_style_neg':        LG.y0_style_neg.clone()})
+                RK.publish_transformer_options({'y0_style_neg':       LG.y0_style_neg})
                 RK.update_transformer_options({'y0_style_neg_weight': LG.lgw_style_neg[step_sched]})
                 RK.update_transformer_options({'y0_style_neg_synweight': guides['synweight_style_neg']})
                 RK.update_transformer_options({'y0_style_neg_mask': LG.mask_style_neg})
@@ -653,9 +676,10 @@ def sample_rk_beta(
         noise_scaling_eta    = noise_scaling_etas   [step_sched]  if noise_scaling_etas    is not None else noise_scaling_eta
         noise_scaling_weight = noise_scaling_weights[step_sched]  if noise_scaling_weights is not None else noise_scaling_weight
         
-        NS.set_sde_step(sigma, sigma_next, eta, overshoot, s_noise)
-        RK.set_coeff(rk_type, NS.h, c1, c2, c3, step, sigmas, NS.sigma_down)
-        NS.set_substep_list(RK)
+        if RK_PLAN is None or not RK_PLAN.apply(RK, NS, rk_type, step, sigmas, eta, overshoot, s_noise):
+            NS.set_sde_step(sigma, sigma_next, eta, overshoot, s_noise)
+            RK.set_coeff(rk_type, NS.h, c1, c2, c3, step, sigmas, NS.sigma_down)
+            NS.set_substep_list(RK)
 
         if (noise_scaling_eta > 0 or noise_scaling_weight != 0) and noise_scaling_type != "model_d":
             if noise_scaling_type == "model_alpha":
@@ -681,32 +705,27 @@ def sample_rk_beta(
                 lying_s_ = NS.s_.clone()
         
 
-        rk_swap_stages = 3 if rk_swap_type != "" else 0
-        data_prev_len = len(data_prev_)-1 if data_prev_ is not None else 3
-        recycled_stages = max(rk_swap_stages, RK.multistep_stages, RK.hybrid_stages, data_prev_len)
-        
         if INIT_SAMPLE_LOOP:
             INIT_SAMPLE_LOOP = False
-            x_, data_, eps_, eps_prev_ = (torch.zeros(RK.rows+2, *x.shape, dtype=default_dtype, device=work_device) for _ in range(4))
+            x_, data_, eps_, eps_prev_ = (torch.zeros(RK.rows+2, *x.shape, dtype=stage_dtype, device=work_device) for _ in range(4))
             
             if sampler_mode in {"unsample", "resample"}:
                 data_prev_ = state_info.get('data_prev_')
                 if data_prev_ is not None:
                     if x.shape == state_info['raw_x'].shape:
-                        data_prev_ = state_info['data_prev_'].clone().to(dtype=default_dtype, device=work_device)
+                        data_prev_ = HANDOFF.load(state_info, 'data_prev_').to(dtype=stage_dtype)
                     else:
-                        data_prev_ = torch.stack([comfy.utils.bislerp(data_prev_item, x.shape[-1], x.shape[-2]) for data_prev_item in state_info['data_prev_']])
-                        data_prev_ = data_prev_.to(x)
+                        data_prev_ = torch.stack([comfy.utils.bislerp(data_prev_item, x.shape[-1], x.shape[-2]) for data_prev_item in HANDOFF.load(state_info, 'data_prev_')])
+                        data_prev_ = data_prev_.to(dtype=stage_dtype, device=work_device)
                 else:
-                    data_prev_ =  torch.zeros(4, *x.shape, dtype=default_dtype, device=work_device) # multistep max is 4m... so 4 needed
+                    data_prev_ =  torch.zeros(4, *x.shape, dtype=stage_dtype, device=work_device) # multistep max is 4m... so 4 needed
             else:
-                data_prev_ =  torch.zeros(4, *x.shape, dtype=default_dtype, device=work_device) # multistep max is 4m... so 4 needed
-            
-            recycled_stages = len(data_prev_)-1
+                data_prev_ =  torch.zeros(4, *x.shape, dtype=stage_dtype, device=work_device) # multistep max is 4m... so 4 needed
+            data_prev_ = RK_History(data_prev_)
         
         if RK.rows+2 > x_.shape[0]:
             row_gap = RK.rows+2 - x_.shape[0]
-            x_gap_, data_gap_, eps_gap_, eps_prev_gap_ = (torch.zeros(row_gap, *x.shape, dtype=default_dtype, device=work_device) for _ in range(4))
+            x_gap_, data_gap_, eps_gap_, eps_prev_gap_ = (torch.zeros(row_gap, *x.shape, dtype=stage_dtype, device=work_device) for _ in range(4))
             x_        = torch.cat((x_       ,x_gap_)       , dim=0)
             data_     = torch.cat((data_    ,data_gap_)    , dim=0)
             eps_      = torch.cat((eps_     ,eps_gap_)     , dim=0)
@@ -721,8 +740,8 @@ def sample_rk_beta(
         
         x_[0] = x.clone()
         # PRENOISE METHOD HERE!
-        x_0   = x_[0].clone()
-        if EO("guide_step_cutoff") or EO("guide_step_min"):
+        x_0   = x.to(dtype=work_dtype, copy=True)     # not x_[0], which may be stored in a lower stage_dtype
+        if "guide_step_cutoff" in opts.given or "guide_step_min" in opts.given:
             x_0_orig = x_0.clone()
         
         # RECYCLE STAGES FOR MULTISTEP
@@ -751,20 +770,20 @@ def sample_rk_beta(
                     if RK.EXPONENTIAL:
                         if VE_MODEL:
                             eps_[ms] = sync_mask * eps_x  +  (1-sync_mask) * eps_x2y  +  weight_mask * (-eps_y + sigma*(-noise_bongflow))
-                            if EO("sync_x2y"):
+                            if opts.sync_x2y:
                                 eps_[ms] = sync_mask * eps_x  +  (1-sync_mask) * eps_x2y  +  weight_mask * (-eps_x2y + sigma*(-noise_bongflow))
                         else:
                             eps_[ms] = sync_mask * eps_x  +  (1-sync_mask) * eps_x2y  +  weight_mask * (-eps_y + sigma*(y0_bongflow-noise_bongflow))
-                            if EO("sync_x2y"):
+                            if opts.sync_x2y:
                                 eps_[ms] = sync_mask * eps_x  +  (1-sync_mask) * eps_x2y  +  weight_mask * (-eps_x2y + sigma*(y0_bongflow-noise_bongflow))
                     else:
                         if VE_MODEL:
                             eps_[ms] = sync_mask * eps_x  +  (1-sync_mask) * eps_x2y  +  weight_mask * (-eps_y + (noise_bongflow))
-                            if EO("sync_x2y"):
+                            if opts.sync_x2y:
                                 eps_[ms] = sync_mask * eps_x  +  (1-sync_mask) * eps_x2y  +  weight_mask * (-eps_x2y + (noise_bongflow))
                         else:
                             eps_[ms] = sync_mask * eps_x  +  (1-sync_mask) * eps_x2y  +  weight_mask * (-eps_y + (noise_bongflow-y0_bongflow))
-                            if EO("sync_x2y"):
+                            if opts.sync_x2y:
                                 eps_[ms] = sync_mask * eps_x  +  (1-sync_mask) * eps_x2y  +  weight_mask * (-eps_x2y + (noise_bongflow-y0_bongflow))
 
                     #if RK.EXPONENTIAL:
@@ -779,12 +798,12 @@ def sample_rk_beta(
                     #    else:
                     #        #eps_[ms] = (lgw_mask_sync_+lgw_mask_sync_inv_) * (1-(lgw_mask_+lgw_mask_inv_)) * (eps_x - (lgw_mask_+lgw_mask_inv_) * eps_y) +  (lgw_mask_+lgw_mask_inv_) *       (noise_bongflow-y0_bongflow)
                     #        eps_[ms] = sync_mask * weight_mask_inv * (eps_x - weight_mask * eps_y) +  weight_mask *       (noise_bongflow-y0_bongflow)
-                eps_prev_ = eps_.clone()
+                eps_prev_.copy_(eps_)
             
             else:
                 for ms in range(min(len(data_prev_), len(eps_))):
                     eps_[ms] = RK.get_epsilon_anchored(x_0, data_prev_[ms], sigma)
-                eps_prev_ = eps_.clone()
+                eps_prev_.copy_(eps_)
 
 
 
@@ -805,16 +824,16 @@ def sample_rk_beta(
 
             # PREPARE FULLY PSEUDOIMPLICIT GUIDES
             if step > 0 or not SKIP_PSEUDO:
-                if full_iter > 0 and EO("fully_implicit_reupdate_x"):
+                if full_iter > 0 and opts.fully_implicit_reupdate_x:
                     x_[0] = NS.sigma_from_to(x_0, x, sigma, sigma_next, NS.s_[0])
                     x_0   = NS.sigma_from_to(x_0, x, sigma, sigma_next, sigma)
                 
-                if EO("fully_pseudo_init") and full_iter == 0:
+                if opts.fully_pseudo_init and full_iter == 0:
                     guide_mode_tmp = LG.guide_mode
                     LG.guide_mode = "fully_" + LG.guide_mode
                 x_0, x_, eps_ = LG.prepare_fully_pseudoimplicit_guides_substep(x_0, x_, eps_, eps_prev_, data_, denoised_prev, 0, step, step_sched, sigmas, eta_substep, overshoot_substep, s_noise_substep, \
                                                                                 NS, RK, pseudoimplicit_row_weights, pseudoimplicit_step_weights, full_iter, BONGMATH)
-                if EO("fully_pseudo_init") and full_iter == 0:
+                if opts.fully_pseudo_init and full_iter == 0:
                     LG.guide_mode = guide_mode_tmp
 
             # TABLEAU LOOP
@@ -845,22 +864,22 @@ def sample_rk_beta(
                             s_tmp = sub_sigma_pseudoimplicit 
 
                         # Fully implicit iteration (explicit only)                   # or... Fully implicit iteration (implicit only... not standard) 
-                        elif (full_iter > 0 and RK.row_offset == 1 and row == 0)   or   (full_iter > 0 and RK.row_offset == 0 and row == 0 and EO("fully_implicit_update_x")):
-                            if EO("fully_explicit_pogostick_eta"): 
+                        elif (full_iter > 0 and RK.row_offset == 1 and row == 0)   or   (full_iter > 0 and RK.row_offset == 0 and row == 0 and opts.fully_implicit_update_x):
+                            if opts.fully_explicit_pogostick_eta: 
                                 super_alpha_ratio, super_sigma_down, super_sigma_up = NS.get_sde_coeff(sigma, sigma_next, None, eta)
                                 x = super_alpha_ratio * x + super_sigma_up * NS.noise_sampler(sigma=sigma_next, sigma_next=sigma)
                                 
                                 x_tmp = x
                                 s_tmp = sigma
-                            elif EO("enable_fully_explicit_lagrange_rebound1"):
+                            elif opts.enable_fully_explicit_lagrange_rebound1:
                                 substeps_prev = len(RK.C[:-1]) 
                                 x_tmp = lagrange_interpolation(RK.C[1:-1], x_[1:substeps_prev], RK.C[0]).squeeze(0)
                                 
-                            elif EO("enable_fully_explicit_lagrange_rebound2"):
+                            elif opts.enable_fully_explicit_lagrange_rebound2:
                                 substeps_prev = len(RK.C[:-1]) 
                                 x_tmp = lagrange_interpolation(RK.C[1:], x_[1:substeps_prev+1], RK.C[0]).squeeze(0)
 
-                            elif EO("enable_fully_explicit_rebound1"):  # 17630, faded dots, just crap
+                            elif opts.enable_fully_explicit_rebound1:  # 17630, faded dots, just crap
                                 eps_tmp, denoised_tmp = RK(x, sigma_next, x, sigma_next)
                                 eps_tmp = (x - denoised_tmp) / sigma_next
                                 x_[0] = denoised_tmp + sigma * eps_tmp
@@ -897,7 +916,7 @@ def sample_rk_beta(
                         else:
                             # three potential toggle options: force rebound/model call, force PC style, force pogostick style
                             if diag_iter > 0: # Diagonally implicit iteration (explicit or implicit)
-                                if EO("diag_explicit_pogostick_eta"): 
+                                if opts.diag_explicit_pogostick_eta: 
                                     super_alpha_ratio, super_sigma_down, super_sigma_up = NS.get_sde_coeff(NS.s_[row], NS.s_[row+RK.row_offset+RK.multistep_stages], None, eta)
                                     x_[row+RK.row_offset] = super_alpha_ratio * x_[row+RK.row_offset] + super_sigma_up * NS.noise_sampler(sigma=NS.s_[row+RK.row_offset+RK.multistep_stages], sigma_next=NS.s_[row])
                                     
@@ -918,7 +937,7 @@ def sample_rk_beta(
                                     x_tmp = NS.sigma_from_to(x_0,   x_[row+RK.row_offset],    sigma,    NS.s_[row+RK.row_offset+RK.multistep_stages],    NS.s_[row])
                                     s_tmp = NS.s_[row]
                                     
-                                elif implicit_type_substeps == "bongmath" and (NS.sub_sigma_up > 0 or NS.sub_sigma_up_eta > 0) and not EO("disable_diag_explicit_bongmath_rebound"): 
+                                elif implicit_type_substeps == "bongmath" and (NS.sub_sigma_up > 0 or NS.sub_sigma_up_eta > 0) and not opts.disable_diag_explicit_bongmath_rebound: 
                                     if BONGMATH:
                                         x_tmp =    x_[row]
                                         s_tmp = NS.s_[row]
@@ -934,10 +953,10 @@ def sample_rk_beta(
                                 s_tmp = NS.sub_sigma 
 
                             if RK.IMPLICIT: 
-                                if not EO("disable_implicit_guide_preproc"):
+                                if not opts.disable_implicit_guide_preproc:
                                     eps_, x_      = LG.process_guides_substep(x_0, x_, eps_,      data_, row, step_sched, sigma, sigma_next, NS.sigma_down, NS.s_, epsilon_scale, RK)
                                     eps_prev_, x_ = LG.process_guides_substep(x_0, x_, eps_prev_, data_, row, step_sched, sigma, sigma_next, NS.sigma_down, NS.s_, epsilon_scale, RK)
-                                if row == 0 and (EO("implicit_lagrange_init")  or   EO("radaucycle")):
+                                if row == 0 and (opts.implicit_lagrange_init  or   opts.radaucycle):
                                     pass
                                 else:
                                     x_[row+RK.row_offset] = x_0 + NS.h_new * RK.zum(row+RK.row_offset, eps_, eps_prev_)
@@ -952,7 +971,7 @@ def sample_rk_beta(
                                                 noise_bongflow_new = (x_row_tmp - x_[row+RK.row_offset]) / s_tmp + noise_bongflow
                                                 yt_[row+RK.row_offset] += s_tmp * (noise_bongflow_new - noise_bongflow)
                                                 x_0 += sigma * (noise_bongflow_new - noise_bongflow)
-                                                if not EO("disable_i_bong"):
+                                                if not opts.disable_i_bong:
                                                     for i_bong in range(len(NS.s_)):
                                                         x_[i_bong] += NS.s_[i_bong] * (noise_bongflow_new - noise_bongflow)
                                                 noise_bongflow = noise_bongflow_new
@@ -994,24 +1013,24 @@ def sample_rk_beta(
                                                 if RK.EXPONENTIAL:
                                                     if VE_MODEL:         # ZERO IS THIS                      # ONE IS THIS
                                                         eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_y_[ms] + sigma*(-noise_bongflow))
-                                                        if EO("sync_x2y"):
+                                                        if opts.sync_x2y:
                                                             eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_x2y_[ms] + sigma*(-noise_bongflow))
                                                     else:
                                                         eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_y_[ms] + sigma*(y0_bongflow-noise_bongflow))
-                                                        if EO("sync_x2y"):
+                                                        if opts.sync_x2y:
                                                             eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_x2y_[ms] + sigma*(y0_bongflow-noise_bongflow))
                                                 else:
                                                     if VE_MODEL:
                                                         eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_y_[ms] + (noise_bongflow))
-                                                        if EO("sync_x2y"):
+                                                        if opts.sync_x2y:
                                                             eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_x2y_[ms] + (noise_bongflow))
                                                     else:
                                                         eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_y_[ms] + (noise_bongflow-y0_bongflow))
-                                                        if EO("sync_x2y"):
+                                                        if opts.sync_x2y:
                                                             eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_x2y_[ms] + (noise_bongflow-y0_bongflow))
 
                                             
-                                        if BONGMATH and step < sigmas.shape[0]-1 and sigma > 0.03 and not EO("disable_implicit_prebong"):
+                                        if BONGMATH and step < sigmas.shape[0]-1 and sigma > 0.03 and not opts.disable_implicit_prebong:
                                             BONGMATH_Y = SYNC_GUIDE_ACTIVE
                                             
                                             x_0, x_, eps_ = RK.bong_iter(x_0, x_, eps_, eps_prev_, data_, sigma, NS.s_, row, RK.row_offset, NS.h, step, step_sched,
@@ -1021,7 +1040,7 @@ def sample_rk_beta(
 
                         lying_eps_row_factor = 1.0
                         # MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL MODEL CALL
-                        if RK.IMPLICIT   and   row == 0   and   (EO("implicit_lazy_recycle_first_model_call_at_start")   or   EO("radaucycle")  or RK.C[0] == 0.0):
+                        if RK.IMPLICIT   and   row == 0   and   (opts.implicit_lazy_recycle_first_model_call_at_start   or   opts.radaucycle  or RK.C[0] == 0.0):
                             pass
                         else: 
                             if s_tmp == 0:
@@ -1057,21 +1076,21 @@ def sample_rk_beta(
                                 lure_y_mask  = lgw_mask_lure_y_  + lgw_mask_lure_y_inv_
                                 
                                 if eps_x_ is None:
-                                    eps_x_       = torch.zeros(RK.rows+2, *x.shape, dtype=default_dtype, device=work_device)
-                                    data_x_      = torch.zeros(RK.rows+2, *x.shape, dtype=default_dtype, device=work_device)
-                                    eps_y2x_     = torch.zeros(RK.rows+2, *x.shape, dtype=default_dtype, device=work_device)
-                                    eps_x2y_     = torch.zeros(RK.rows+2, *x.shape, dtype=default_dtype, device=work_device)
-                                    eps_yt_      = torch.zeros(RK.rows+2, *x.shape, dtype=default_dtype, device=work_device)
-                                    eps_y_       = torch.zeros(RK.rows+2, *x.shape, dtype=default_dtype, device=work_device)
-                                    eps_prev_y_  = torch.zeros(RK.rows+2, *x.shape, dtype=default_dtype, device=work_device)
-                                    data_y_      = torch.zeros(RK.rows+2, *x.shape, dtype=default_dtype, device=work_device)
-                                    yt_          = torch.zeros(RK.rows+2, *x.shape, dtype=default_dtype, device=work_device)
+                                    eps_x_       = torch.zeros(RK.rows+2, *x.shape, dtype=stage_dtype, device=work_device)
+                                    data_x_      = torch.zeros(RK.rows+2, *x.shape, dtype=stage_dtype, device=work_device)
+                                    eps_y2x_     = torch.zeros(RK.rows+2, *x.shape, dtype=stage_dtype, device=work_device)
+                                    eps_x2y_     = torch.zeros(RK.rows+2, *x.shape, dtype=stage_dtype, device=work_device)
+                                    eps_yt_      = torch.zeros(RK.rows+2, *x.shape, dtype=stage_dtype, device=work_device)
+                                    eps_y_       = torch.zeros(RK.rows+2, *x.shape, dtype=stage_dtype, device=work_device)
+                                    eps_prev_y_  = torch.zeros(RK.rows+2, *x.shape, dtype=stage_dtype, device=work_device)
+                                    data_y_      = torch.zeros(RK.rows+2, *x.shape, dtype=stage_dtype, device=work_device)
+                                    yt_          = torch.zeros(RK.rows+2, *x.shape, dtype=stage_dtype, device=work_device)
                                     
                                     RUN_X_0_COPY = False
                                     if noise_bongflow is None:
                                         RUN_X_0_COPY = True
-                                        data_prev_x_ = torch.zeros(4, *x.shape, dtype=default_dtype, device=work_device)
-                                        data_prev_y_ = torch.zeros(4, *x.shape, dtype=default_dtype, device=work_device)
+                                        data_prev_x_ = RK_History(torch.zeros(4, *x.shape, dtype=stage_dtype, device=work_device))
+                                        data_prev_y_ = RK_History(torch.zeros(4, *x.shape, dtype=stage_dtype, device=work_device))
                                         
                                         noise_bongflow = normalize_zscore(NS.noise_sampler(sigma=sigma, sigma_next=NS.sigma_min), channelwise=True, inplace=True)
 
@@ -1113,7 +1132,7 @@ def sample_rk_beta(
                                                               + LG.drift_y_sync  * drift_y_mask * (data_barf_y      - y0_bongflow) \
                                                               + LG.drift_y_guide * drift_y_mask * (y0_bongflow_orig - y0_bongflow)
                                     
-                                    if not EO("skip_yt"):
+                                    if not opts.skip_yt:
                                         if VE_MODEL:
                                             yt_0 = y0_bongflow + sigma * noise_bongflow
                                             yt   = y0_bongflow + s_tmp * noise_bongflow
@@ -1123,7 +1142,7 @@ def sample_rk_beta(
 
                                         yt_[row] = yt
 
-                                if ((LG.lgw[step_sched].item() in {1,0} and LG.lgw_inv[step_sched].item() in {1,0} and LG.lgw[step_sched] == 1-LG.lgw_sync[step_sched] and LG.lgw_inv[step_sched] == 1-LG.lgw_sync_inv[step_sched]) or EO("sync_speed_mode")) and not EO("disable_sync_speed_mode"):
+                                if ((LG.lgw[step_sched].item() in {1,0} and LG.lgw_inv[step_sched].item() in {1,0} and LG.lgw[step_sched] == 1-LG.lgw_sync[step_sched] and LG.lgw_inv[step_sched] == 1-LG.lgw_sync_inv[step_sched]) or opts.sync_speed_mode) and not opts.disable_sync_speed_mode:
                                     data_y = y0_bongflow.clone()
                                     if RK.EXPONENTIAL:
                                         eps_y = data_y - yt_0
@@ -1216,22 +1235,22 @@ def sample_rk_beta(
                                         
                                         
                                 
-                                if EO("sync_proj_y"):
+                                if opts.sync_proj_y:
                                     d_collinear_d_lerp = get_collinear(eps_x, eps_y)  
                                     d_lerp_ortho_d     = get_orthogonal(eps_y, eps_x)  
                                     eps_y             = d_collinear_d_lerp + d_lerp_ortho_d
                                     
-                                if EO("sync_proj_y2"):
+                                if opts.sync_proj_y2:
                                     d_collinear_d_lerp = get_collinear(eps_y, eps_x)  
                                     d_lerp_ortho_d     = get_orthogonal(eps_x, eps_y)  
                                     eps_y             = d_collinear_d_lerp + d_lerp_ortho_d
                                     
-                                if EO("sync_proj_x"):
+                                if opts.sync_proj_x:
                                     d_collinear_d_lerp = get_collinear(eps_y, eps_x)  
                                     d_lerp_ortho_d     = get_orthogonal(eps_x, eps_y)  
                                     eps_x             = d_collinear_d_lerp + d_lerp_ortho_d
 
-                                if EO("sync_proj_x2"):
+                                if opts.sync_proj_x2:
                                     d_collinear_d_lerp = get_collinear(eps_x, eps_y)  
                                     d_lerp_ortho_d     = get_orthogonal(eps_y, eps_x)  
                                     eps_x             = d_collinear_d_lerp + d_lerp_ortho_d
@@ -1252,58 +1271,58 @@ def sample_rk_beta(
                                     eps_y2x = (x_0 - data_y) / sigma
                                 eps_y2x_[row] = eps_y2x
                                 
-                                if sigma_next > sigma and EO("sync_unsample"):
+                                if sigma_next > sigma and opts.sync_unsample:
                                     eps_x   = RK.get_guide_epsilon(x_0,   x_[row], data_x, sigma, NS.s_[row], NS.sigma_down, None)
                                     eps_x2y = RK.get_guide_epsilon(x_0,   x_[row], data_y, sigma, NS.s_[row], NS.sigma_down, None)
                                     eps_y   = RK.get_guide_epsilon(yt_0, yt_[row], data_y, sigma, NS.s_[row], NS.sigma_down, None)
-                                if sigma_next > sigma and EO("sync_unsample2"):
+                                if sigma_next > sigma and opts.sync_unsample2:
                                     eps_x   = RK.get_guide_epsilon(x_0,   x_[row], data_y, sigma, NS.s_[row], NS.sigma_down, None)
                                     eps_x2y = RK.get_guide_epsilon(x_0,   x_[row], data_y, sigma, NS.s_[row], NS.sigma_down, None)
                                     eps_y   = RK.get_guide_epsilon(yt_0, yt_[row], data_y, sigma, NS.s_[row], NS.sigma_down, None)
 
-                                eps_x *= EO("eps_x_mult", 1.0)
-                                eps_y *= EO("eps_y_mult", 1.0)
-                                eps_x2y *= EO("eps_x2y_mult", 1.0)
-                                eps_y2x *= EO("eps_y2x_mult", 1.0)
+                                eps_x *= opts.eps_x_mult
+                                eps_y *= opts.eps_y_mult
+                                eps_x2y *= opts.eps_x2y_mult
+                                eps_y2x *= opts.eps_y2x_mult
                                 
                                 if RK.EXPONENTIAL:
                                     if VE_MODEL:         # ZERO IS THIS                      # ONE IS THIS 
                                         eps_[row]  = sync_mask * eps_x   +   (1-sync_mask) * eps_x2y   +   weight_mask * (-eps_y + sigma*(-noise_bongflow)) 
-                                        if EO("sync_x2y"):
+                                        if opts.sync_x2y:
                                             eps_[row]  = sync_mask * eps_x   +   (1-sync_mask) * eps_x2y   +   weight_mask * (-eps_x2y + sigma*(-noise_bongflow)) 
                                     else:
                                         eps_[row]  = sync_mask * eps_x   +   (1-sync_mask) * eps_x2y   +   weight_mask * (-eps_y + sigma*(y0_bongflow-noise_bongflow))   #+   lure_x_mask * sigma*(data_y - data_x) 
-                                        if EO("sync_x2y"):
+                                        if opts.sync_x2y:
                                             eps_[row]  = sync_mask * eps_x   -   (1-sync_mask) * eps_x2y   +   weight_mask * (-eps_x2y + sigma*(y0_bongflow-noise_bongflow)) 
                                         eps_yt_[row]  = sync_mask * eps_y   +   (1-sync_mask) * eps_y2x   +   weight_mask * (-eps_x + sigma*(y0_bongflow-noise_bongflow))         # differentiate guide as well toward the x pred?
                                 else:
                                     if VE_MODEL:
                                         eps_[row]  = sync_mask * eps_x   +   (1-sync_mask) * eps_x2y   +   weight_mask * (noise_bongflow - eps_y)
-                                        if EO("sync_x2y"):
+                                        if opts.sync_x2y:
                                             eps_[row]  = sync_mask * eps_x   +   (1-sync_mask) * eps_x2y   +   weight_mask * (noise_bongflow - eps_x2y)
                                     else:
                                         eps_[row]  = sync_mask * eps_x   +   (1-sync_mask) * eps_x2y   +   weight_mask * (noise_bongflow - eps_y - y0_bongflow)
-                                        if EO("sync_x2y"):
+                                        if opts.sync_x2y:
                                             eps_[row]  = sync_mask * eps_x   +   (1-sync_mask) * eps_x2y   +   weight_mask * (noise_bongflow - eps_x2y - y0_bongflow)
                                         eps_yt_[row]  = sync_mask * eps_y   +   (1-sync_mask) * eps_y2x   +   weight_mask * (noise_bongflow - eps_x - y0_bongflow)         # differentiate guide as well toward the x pred?
 
                                 if VE_MODEL:
                                     data_[row] = x_0   +   sync_mask * NS.h * eps_x   +   (1-sync_mask) * NS.h * eps_x2y   -   weight_mask * (sigma*(eps_y + noise_bongflow))   # -   lure_x_mask * (sigma*(eps_y + eps_x)) 
                                     data_barf_y = yt_0   +   sync_mask * NS.h * eps_y   +   (1-sync_mask) * NS.h * eps_y2x   -   weight_mask * (sigma*(eps_x + noise_bongflow))
-                                    if EO("sync_x2y"):
+                                    if opts.sync_x2y:
                                         data_[row] = x_0   +   sync_mask * NS.h * eps_x   +   (1-sync_mask) * NS.h * eps_x2y   -   weight_mask * (sigma*(eps_x2y + noise_bongflow)) 
 
                                 else:
 
                                     data_[row] = x_0   +   sync_mask * NS.h * eps_x   +   (1-sync_mask) * NS.h * eps_x2y   -   weight_mask * (NS.h * eps_y + sigma*(noise_bongflow-y0_bongflow)) 
                                     data_barf_y = yt_0   +   sync_mask * NS.h * eps_y   +   (1-sync_mask) * NS.h * eps_y2x   -   weight_mask * (NS.h * eps_x + sigma*(noise_bongflow-y0_bongflow)) 
-                                    if EO("sync_x2y"):
+                                    if opts.sync_x2y:
                                         data_[row] = x_0   +   sync_mask * NS.h * eps_x   +   (1-sync_mask) * NS.h * eps_x2y   -   weight_mask * (NS.h * eps_x2y + sigma*(noise_bongflow-y0_bongflow)) 
 
-                                if EO("data_is_y0_with_lure_x_mask"):
+                                if opts.data_is_y0_with_lure_x_mask:
                                     data_[row] = data_[row] + lure_x_mask * (y0_bongflow - data_[row])
 
-                                if EO("eps_is_y0_with_lure_x_mask"):
+                                if opts.eps_is_y0_with_lure_x_mask:
                                     if RK.EXPONENTIAL:
                                         eps_[row] = eps_[row] + lure_x_mask * ((y0_bongflow - x_0) - eps_[row])
                                     else:
@@ -1317,7 +1336,7 @@ def sample_rk_beta(
                                 eps_y_ [row] = eps_y
                                 data_y_[row] = data_y
 
-                                if EO("sync_use_fake_eps_y"):
+                                if opts.sync_use_fake_eps_y:
                                     if RK.EXPONENTIAL:
                                         if VE_MODEL:
                                             eps_y_ [row] = sigma * ( - noise_bongflow)
@@ -1328,102 +1347,102 @@ def sample_rk_beta(
                                             eps_y_ [row] = noise_bongflow
                                         else:
                                             eps_y_ [row] = noise_bongflow - y0_bongflow
-                                if EO("sync_use_fake_data_y"):
+                                if opts.sync_use_fake_data_y:
                                     data_y_[row] = y0_bongflow
                                     
 
                                 
                             
-                            elif LG.guide_mode.startswith("flow") and (LG.lgw[step_sched] > 0 or LG.lgw_inv[step_sched] > 0) and not FLOW_STOPPED and not EO("flow_sync") :
+                            elif LG.guide_mode.startswith("flow") and (LG.lgw[step_sched] > 0 or LG.lgw_inv[step_sched] > 0) and not FLOW_STOPPED and not opts.flow_sync :
                                 lgw_mask_, lgw_mask_inv_ = LG.get_masks_for_step(step)
                                 if not FLOW_STARTED and not FLOW_RESUMED:
                                     FLOW_STARTED = True
-                                    data_x_prev_ = torch.zeros_like(data_prev_)
+                                    data_x_prev_ = RK_History(torch.zeros_like(data_prev_.storage))
 
                                     y0 = LG.HAS_LATENT_GUIDE * LG.mask * LG.y0   +   LG.HAS_LATENT_GUIDE_INV * LG.mask_inv * LG.y0_inv 
                                     
                                     yx0 = y0.clone()
                                     
-                                    if EO("flow_slerp"):
+                                    if opts.flow_slerp:
                                         y0_inv                 = LG.HAS_LATENT_GUIDE * LG.mask * LG.y0_inv   +   LG.HAS_LATENT_GUIDE_INV * LG.mask_inv * LG.y0 
                                         y0 = LG.y0.clone()
                                         y0_inv = LG.y0_inv.clone()
-                                        flow_slerp_guide_ratio = EO("flow_slerp_guide_ratio", 0.5)
+                                        flow_slerp_guide_ratio = opts.flow_slerp_guide_ratio
                                         y_slerp                = slerp_tensor(flow_slerp_guide_ratio, y0, y0_inv)
                                         yx0                    = y_slerp.clone()
                                     
                                     x_[row], x_0 =  yx0.clone(), yx0.clone()
-                                    if EO("guide_step_cutoff") or EO("guide_step_min"):
+                                    if "guide_step_cutoff" in opts.given or "guide_step_min" in opts.given:
                                         x_0_orig = yx0.clone()
                                     
-                                    if EO("flow_yx0_init_y0_inv"):
+                                    if opts.flow_yx0_init_y0_inv:
                                         yx0 = LG.HAS_LATENT_GUIDE * LG.mask * LG.y0_inv   +   LG.HAS_LATENT_GUIDE_INV * LG.mask_inv * LG.y0
                                     
                                     if step > 0:
-                                        if EO("flow_manual_masks"):
+                                        if opts.flow_manual_masks:
                                             y0  = (1 - (LG.HAS_LATENT_GUIDE * LG.lgw[step_sched] * LG.mask + LG.HAS_LATENT_GUIDE_INV * LG.lgw_inv[step_sched] * LG.mask_inv)) * denoised   +   LG.HAS_LATENT_GUIDE * LG.lgw[step_sched] * LG.mask * LG.y0   +   LG.HAS_LATENT_GUIDE_INV * LG.lgw_inv[step_sched] * LG.mask_inv * LG.y0_inv
                                         else:
                                             y0  = (1 - (lgw_mask_ + lgw_mask_inv_)) * denoised   +   lgw_mask_ * LG.y0   +   lgw_mask_inv_ * LG.y0_inv
                                         yx0 = y0.clone()
                                         
-                                        if EO("flow_slerp"):
-                                            if EO("flow_manual_masks"):
+                                        if opts.flow_slerp:
+                                            if opts.flow_manual_masks:
                                                 y0_inv                 = (1 - (LG.HAS_LATENT_GUIDE * LG.lgw[step_sched] * LG.mask + LG.HAS_LATENT_GUIDE_INV * LG.lgw_inv[step_sched] * LG.mask_inv)) * denoised   +   LG.HAS_LATENT_GUIDE * LG.lgw[step_sched] * LG.mask * LG.y0_inv   +   LG.HAS_LATENT_GUIDE_INV * LG.lgw_inv[step_sched] * LG.mask_inv * LG.y0
                                             else:
                                                 y0_inv  = (1 - (lgw_mask_ + lgw_mask_inv_)) * denoised   +   lgw_mask_ * LG.y0_inv   +   lgw_mask_inv_ * LG.y0
-                                            flow_slerp_guide_ratio = EO("flow_slerp_guide_ratio", 0.5)
+                                            flow_slerp_guide_ratio = opts.flow_slerp_guide_ratio
                                             y_slerp                = slerp_tensor(flow_slerp_guide_ratio, y0, y0_inv)
                                             yx0                    = y_slerp.clone()
                                 
                                 else:
                                     yx0_prev = data_cached
-                                    if EO("flow_manual_masks"):
+                                    if opts.flow_manual_masks:
                                         yx0 = (1 - (LG.HAS_LATENT_GUIDE * LG.lgw[step_sched] * LG.mask + LG.HAS_LATENT_GUIDE_INV * LG.lgw_inv[step_sched] * LG.mask_inv)) * yx0_prev   +   LG.HAS_LATENT_GUIDE * LG.lgw[step_sched] * LG.mask * x_tmp   +   LG.HAS_LATENT_GUIDE_INV * LG.lgw_inv[step_sched] * LG.mask_inv * x_tmp
                                     else:
                                         yx0 = (1 - (lgw_mask_ + lgw_mask_inv_)) * yx0_prev   +   (lgw_mask_ + lgw_mask_inv_) * x_tmp
 
-                                    if not EO("flow_static_guides"):
-                                        if EO("flow_manual_masks"):
+                                    if not opts.flow_static_guides:
+                                        if opts.flow_manual_masks:
                                             y0 = (1 - (LG.HAS_LATENT_GUIDE * LG.lgw[step_sched] * LG.mask + LG.HAS_LATENT_GUIDE_INV * LG.lgw_inv[step_sched] * LG.mask_inv)) * yx0_prev   +   LG.HAS_LATENT_GUIDE * LG.lgw[step_sched] * LG.mask * LG.y0   +   LG.HAS_LATENT_GUIDE_INV * LG.lgw_inv[step_sched] * LG.mask_inv * LG.y0_inv
                                         else:
                                             y0 = (1 - (lgw_mask_ + lgw_mask_inv_)) * yx0_prev   +   lgw_mask_ * LG.y0   +   lgw_mask_inv_ * LG.y0_inv
                                         
-                                        if EO("flow_slerp"):
-                                            if EO("flow_manual_masks"):
+                                        if opts.flow_slerp:
+                                            if opts.flow_manual_masks:
                                                 y0_inv = (1 - (LG.HAS_LATENT_GUIDE * LG.lgw[step_sched] * LG.mask + LG.HAS_LATENT_GUIDE_INV * LG.lgw_inv[step_sched] * LG.mask_inv)) * yx0_prev   +   LG.HAS_LATENT_GUIDE * LG.lgw[step_sched] * LG.mask * LG.y0_inv   +   LG.HAS_LATENT_GUIDE_INV * LG.lgw_inv[step_sched] * LG.mask_inv * LG.y0
                                             else:
                                                 y0_inv = (1 - (lgw_mask_ + lgw_mask_inv_)) * yx0_prev   +   lgw_mask_ * LG.y0_inv   +   lgw_mask_inv_ * LG.y0
 
                                 y0_orig = y0.clone()
-                                if EO("flow_proj_xy"):
+                                if opts.flow_proj_xy:
                                     d_collinear_d_lerp = get_collinear(yx0, y0_orig)  
                                     d_lerp_ortho_d     = get_orthogonal(y0_orig, yx0)  
                                     y0                 = d_collinear_d_lerp + d_lerp_ortho_d
                                 
-                                if EO("flow_proj_yx"):
+                                if opts.flow_proj_yx:
                                     d_collinear_d_lerp = get_collinear(y0_orig, yx0)  
                                     d_lerp_ortho_d     = get_orthogonal(yx0, y0_orig)  
                                     yx0                = d_collinear_d_lerp + d_lerp_ortho_d
                                 
                                 y0_inv_orig = None
-                                if EO("flow_proj_xy_inv"):
+                                if opts.flow_proj_xy_inv:
                                     y0_inv_orig = y0_inv.clone()
                                     d_collinear_d_lerp = get_collinear(yx0, y0_inv)  
                                     d_lerp_ortho_d     = get_orthogonal(y0_inv, yx0)  
                                     y0_inv             = d_collinear_d_lerp + d_lerp_ortho_d
                                     
-                                if EO("flow_proj_yx_inv"):
+                                if opts.flow_proj_yx_inv:
                                     y0_inv_orig = y0_inv if y0_inv_orig is None else y0_inv_orig
                                     d_collinear_d_lerp = get_collinear(y0_inv_orig, yx0)  
                                     d_lerp_ortho_d     = get_orthogonal(yx0, y0_inv_orig)  
                                     yx0                = d_collinear_d_lerp + d_lerp_ortho_d
                                 del y0_orig
 
-                                flow_cossim_iter = EO("flow_cossim_iter", 1)
+                                flow_cossim_iter = opts.flow_cossim_iter
 
                                 if step == 0:
                                     noise_yt = noise_fn(y0, sigma, sigma_next, NS.noise_sampler, flow_cossim_iter) # normalize_zscore(NS.noise_sampler(sigma=sigma, sigma_next=sigma_next), channelwise=True, inplace=True)
-                                if not EO("flow_disable_renoise_y0"):
+                                if not opts.flow_disable_renoise_y0:
                                     if noise_yt is None:
                                         noise_yt = noise_fn(x_0, sigma, sigma_next, NS.noise_sampler, flow_cossim_iter)
                                     else:
@@ -1433,7 +1452,7 @@ def sample_rk_beta(
                                     yt        = y0 + s_tmp * noise_yt
                                 else:
                                     yt        = (NS.sigma_max-s_tmp) * y0 + (s_tmp/NS.sigma_max) * noise_yt
-                                if not EO("flow_disable_doublenoise_y0"):
+                                if not opts.flow_disable_doublenoise_y0:
                                     if noise_yt is None:
                                         noise_yt = noise_fn(x_0, sigma, sigma_next, NS.noise_sampler, flow_cossim_iter)
                                     else:
@@ -1444,22 +1463,22 @@ def sample_rk_beta(
                                 else:
                                     y0_noised = (NS.sigma_max-sigma) * y0 + sigma * noise_yt
                                 
-                                if EO("flow_slerp"):
+                                if opts.flow_slerp:
                                     noise = noise_fn(y0_inv, sigma, sigma_next, NS.noise_sampler, flow_cossim_iter) 
                                     yt_inv        = (NS.sigma_max-s_tmp) * y0_inv + (s_tmp/NS.sigma_max) * noise
-                                    if not EO("flow_disable_doublenoise_y0_inv"):
+                                    if not opts.flow_disable_doublenoise_y0_inv:
                                         noise = noise_fn(y0_inv, sigma, sigma_next, NS.noise_sampler, flow_cossim_iter) 
                                     y0_noised_inv = (NS.sigma_max-sigma) * y0_inv + sigma * noise
                                 
                                 if step == 0:
                                     noise_xt = noise_fn(yx0, sigma, sigma_next, NS.noise_sampler, flow_cossim_iter) 
-                                if EO("flow_slerp"):
+                                if opts.flow_slerp:
                                     xt         = yx0 + (s_tmp/NS.sigma_max) * (noise - y_slerp)
-                                    if not EO("flow_disable_doublenoise_x_0"):
+                                    if not opts.flow_disable_doublenoise_x_0:
                                         noise = noise_fn(x_0, sigma, sigma_next, NS.noise_sampler, flow_cossim_iter) 
                                     x_0_noised = x_0 + sigma * (noise - y_slerp)
                                 else:
-                                    if not EO("flow_disable_renoise_x_0"):
+                                    if not opts.flow_disable_renoise_x_0:
                                         if noise_xt is None:
                                             noise_xt = noise_fn(x_0, sigma, sigma_next, NS.noise_sampler, flow_cossim_iter)
                                         else:
@@ -1469,7 +1488,7 @@ def sample_rk_beta(
                                         xt         = yx0 + (s_tmp) * yx0 + (s_tmp) * (noise_xt - y0)
                                     else:
                                         xt         = yx0 + (s_tmp/NS.sigma_max) * (noise_xt - y0)
-                                    if not EO("flow_disable_doublenoise_x_0"):
+                                    if not opts.flow_disable_doublenoise_x_0:
                                         if noise_xt is None:
                                             noise_xt = noise_fn(x_0, sigma, sigma_next, NS.noise_sampler, flow_cossim_iter)
                                         else:
@@ -1482,18 +1501,18 @@ def sample_rk_beta(
                                 eps_y, data_y = RK(yt, s_tmp, y0_noised,  sigma, transformer_options={'latent_type': 'yt'})
                                 eps_x, data_x = RK(xt, s_tmp, x_0_noised, sigma, transformer_options={'latent_type': 'xt'})
                     
-                                if EO("flow_slerp"):
+                                if opts.flow_slerp:
                                     eps_y_inv, data_y_inv = RK(yt_inv, s_tmp, y0_noised_inv, sigma, transformer_options={'latent_type': 'yt_inv'})
                                 
                                 if LG.lgw[step+1] == 0 and LG.lgw_inv[step+1] == 0:    # break out of differentiating x0 and return to differentiating eps/velocity field
-                                    if EO("flow_shit_out_yx0"):
+                                    if opts.flow_shit_out_yx0:
                                         eps_ [row]       = eps_x - eps_y
                                         data_[row]       = yx0
                                         if row == 0:
                                             x_[row] = x_0 = xt 
                                         else:
                                             x_[row] = xt
-                                    if not EO("flow_shit_out_new"):
+                                    if not opts.flow_shit_out_new:
                                         eps_ [row]       = eps_x
                                         data_[row]       = data_x
                                         if row == 0:
@@ -1511,7 +1530,7 @@ def sample_rk_beta(
                                 
                                     FLOW_STOPPED = True
                                 else:
-                                    if not EO("flow_slerp"):
+                                    if not opts.flow_slerp:
                                         if RK.EXPONENTIAL:
                                             eps_y_alt = data_y - x_0
                                             eps_x_alt = data_x - x_0
@@ -1519,19 +1538,19 @@ def sample_rk_beta(
                                             eps_y_alt = (x_0 - data_y) / sigma
                                             eps_x_alt = (x_0 - data_x) / sigma
                                             
-                                        if EO("flow_y_zero"):
+                                        if opts.flow_y_zero:
                                             eps_y_alt *= LG.mask
                                         
                                         eps_[row]  = eps_yx = (eps_y_alt - eps_x_alt)
                                         eps_y_lin           = (x_0 - data_y) / sigma
-                                        if EO("flow_y_zero"):
+                                        if opts.flow_y_zero:
                                             eps_y_lin *= LG.mask
                                         eps_x_lin           = (x_0 - data_x) / sigma
                                         eps_yx_lin          = (eps_y_lin - eps_x_lin)
                                         
                                         data_[row] = (1 - (lgw_mask_ + lgw_mask_inv_)) * data_x   +   (lgw_mask_ + lgw_mask_inv_) * data_y
                                         
-                                        if EO("flow_reverse_data_masks"):
+                                        if opts.flow_reverse_data_masks:
                                             data_[row] = (1 - (lgw_mask_ + lgw_mask_inv_)) * data_y   +   (lgw_mask_ + lgw_mask_inv_) * data_x
 
                                         if flow_sync_eps != 0.0:
@@ -1540,35 +1559,35 @@ def sample_rk_beta(
                                             else:
                                                 eps_[row] = (1-flow_sync_eps) * eps_[row] + flow_sync_eps * (x_0 - data_[row]) / sigma
                                         
-                                        if EO("flow_sync_eps_mask"): 
-                                            flow_sync_eps = EO("flow_sync_eps_mask", 1.0)
+                                        if "flow_sync_eps_mask" in opts.given: 
+                                            flow_sync_eps = opts.flow_sync_eps_mask
                                             if RK.EXPONENTIAL:
                                                 eps_[row] = (lgw_mask_ + lgw_mask_inv_) * (1-flow_sync_eps) * eps_[row] + (1 - (lgw_mask_ + lgw_mask_inv_)) * flow_sync_eps * (data_[row] - x_0) 
                                             else:
                                                 eps_[row] = (lgw_mask_ + lgw_mask_inv_) * (1-flow_sync_eps) * eps_[row] + (1 - (lgw_mask_ + lgw_mask_inv_)) * flow_sync_eps * (x_0 - data_[row]) / sigma
 
-                                        if EO("flow_sync_eps_revmask"): 
-                                            flow_sync_eps = EO("flow_sync_eps_revmask", 1.0)
+                                        if "flow_sync_eps_revmask" in opts.given: 
+                                            flow_sync_eps = opts.flow_sync_eps_revmask
                                             if RK.EXPONENTIAL:
                                                 eps_[row] = (1 - (lgw_mask_ + lgw_mask_inv_)) * (1-flow_sync_eps) * eps_[row] + (lgw_mask_ + lgw_mask_inv_) * flow_sync_eps * (data_[row] - x_0) 
                                             else:
                                                 eps_[row] = (1 - (lgw_mask_ + lgw_mask_inv_)) * (1-flow_sync_eps) * eps_[row] + (lgw_mask_ + lgw_mask_inv_) * flow_sync_eps * (x_0 - data_[row]) / sigma
 
-                                        if EO("flow_sync_eps_maskonly"):
-                                            flow_sync_eps = EO("flow_sync_eps_maskonly", 1.0)
+                                        if "flow_sync_eps_maskonly" in opts.given:
+                                            flow_sync_eps = opts.flow_sync_eps_maskonly
                                             if RK.EXPONENTIAL:
                                                 eps_[row] = (lgw_mask_ + lgw_mask_inv_) * eps_[row] + (1 - (lgw_mask_ + lgw_mask_inv_)) * (data_[row] - x_0) 
                                             else:
                                                 eps_[row] = (lgw_mask_ + lgw_mask_inv_) * eps_[row] + (1 - (lgw_mask_ + lgw_mask_inv_)) * (x_0 - data_[row]) / sigma
 
-                                        if EO("flow_sync_eps_revmaskonly"): 
-                                            flow_sync_eps = EO("flow_sync_eps_revmaskonly", 1.0)
+                                        if "flow_sync_eps_revmaskonly" in opts.given: 
+                                            flow_sync_eps = opts.flow_sync_eps_revmaskonly
                                             if RK.EXPONENTIAL:
                                                 eps_[row] = (1 - (lgw_mask_ + lgw_mask_inv_)) * eps_[row] + (lgw_mask_ + lgw_mask_inv_) * (data_[row] - x_0) 
                                             else:
                                                 eps_[row] = (1 - (lgw_mask_ + lgw_mask_inv_)) * eps_[row] + (lgw_mask_ + lgw_mask_inv_) * (x_0 - data_[row]) / sigma
 
-                                    if EO("flow_slerp"):
+                                    if opts.flow_slerp:
                                         if RK.EXPONENTIAL:
                                             eps_y_alt     = data_y     - x_0
                                             eps_y_alt_inv = data_y_inv - x_0
@@ -1578,7 +1597,7 @@ def sample_rk_beta(
                                             eps_y_alt_inv = (x_0 - data_y_inv) / sigma
                                             eps_x_alt     = (x_0 - data_x)     / sigma
                                         
-                                        flow_slerp_ratio2 = EO("flow_slerp_ratio2", 0.5)
+                                        flow_slerp_ratio2 = opts.flow_slerp_ratio2
 
                                         eps_yx     = (eps_y_alt - eps_x_alt)
                                         eps_y_lin  = (x_0 - data_y) / sigma
@@ -1593,14 +1612,14 @@ def sample_rk_beta(
                                         data_row     = x_0 - sigma * eps_yx_lin
                                         data_row_inv = x_0 - sigma * eps_yx_lin_inv
                                         
-                                        if EO("flow_slerp_similarity_ratio"):
-                                            flow_slerp_similarity_ratio = EO("flow_slerp_similarity_ratio", 1.0)
+                                        if "flow_slerp_similarity_ratio" in opts.given:
+                                            flow_slerp_similarity_ratio = opts.flow_slerp_similarity_ratio
                                             flow_slerp_ratio2           = find_slerp_ratio_grid(data_row, data_row_inv, LG.y0.clone(), LG.y0_inv.clone(), flow_slerp_similarity_ratio)
                                         
                                         eps_ [row] = slerp_tensor(flow_slerp_ratio2, eps_yx,   eps_yx_inv)
                                         data_[row] = slerp_tensor(flow_slerp_ratio2, data_row, data_row_inv)
                                         
-                                        if EO("flow_slerp_autoalter"):
+                                        if opts.flow_slerp_autoalter:
                                             data_row_slerp = slerp_tensor(0.5, data_row, data_row_inv)
                                             y0_pearsim     = get_pearson_similarity(data_row_slerp, y0)
                                             y0_pearsim_inv = get_pearson_similarity(data_row_slerp, y0_inv)
@@ -1612,13 +1631,13 @@ def sample_rk_beta(
                                                 data_[row] = data_row
                                                 eps_ [row] = (eps_y_alt     - eps_x_alt)
                                             
-                                        if EO("flow_slerp_recalc_eps_row"):
+                                        if opts.flow_slerp_recalc_eps_row:
                                             if RK.EXPONENTIAL:
                                                 eps_[row]  = data_[row] - x_0
                                             else:
                                                 eps_[row]  = (x_0 - data_[row]) / sigma
                                         
-                                        if EO("flow_slerp_recalc_data_row"):
+                                        if opts.flow_slerp_recalc_data_row:
                                             if RK.EXPONENTIAL:
                                                 data_[row] = x_0 + eps_[row]
                                             else:
@@ -1626,8 +1645,8 @@ def sample_rk_beta(
 
                                     data_cached = data_x 
 
-                            if step < EO("direct_pre_pseudo_guide", 0) and step > 0:
-                                for i_pseudo in range(EO("direct_pre_pseudo_guide_iter", 1)):
+                            if step < opts.direct_pre_pseudo_guide and step > 0:
+                                for i_pseudo in range(opts.direct_pre_pseudo_guide_iter):
                                     x_tmp += LG.lgw[step_sched] * LG.mask * (NS.sigma_max - s_tmp) * (LG.y0 - denoised)     +     LG.lgw_inv[step_sched] * LG.mask_inv * (NS.sigma_max - s_tmp) * (LG.y0_inv - denoised)
                                     eps_[row], data_[row] = RK(x_tmp, s_tmp, x_0, sigma)
                             
@@ -1678,14 +1697,14 @@ def sample_rk_beta(
 
 
                         # GUIDE 
-                        if not EO("disable_guides_eps_substep"):
+                        if not opts.disable_guides_eps_substep:
                             eps_, x_      = LG.process_guides_substep(x_0, x_, eps_,      data_, row, step_sched, NS.sigma, NS.sigma_next, NS.sigma_down, NS.s_, epsilon_scale, RK)
-                        if not EO("disable_guides_eps_prev_substep"):
+                        if not opts.disable_guides_eps_prev_substep:
                             eps_prev_, x_ = LG.process_guides_substep(x_0, x_, eps_prev_, data_, row, step_sched, NS.sigma, NS.sigma_next, NS.sigma_down, NS.s_, epsilon_scale, RK)
                         
                         if LG.y0_mean is not None and LG.y0_mean.sum() != 0.0:
-                            if EO("guide_mean_pw"):
-                                data_row_new = adain_patchwise_row_batch(data_[row].clone(), LG.y0_mean.clone(), sigma=EO("guide_mean_pw_sigma", 1.0), kernel_size=EO("guide_mean_pw_kernel_size", 7))
+                            if opts.guide_mean_pw:
+                                data_row_new = adain_patchwise_row_batch(data_[row].clone(), LG.y0_mean.clone(), sigma=opts.guide_mean_pw_sigma, kernel_size=opts.guide_mean_pw_kernel_size)
                                 if RK.EXPONENTIAL:
                                     eps_row_mean = data_row_new - x_0
                                 else:
@@ -1698,7 +1717,7 @@ def sample_rk_beta(
                             
                             eps_[row] = eps_[row] + LG.lgw_mean[step_sched] * (eps_row_mean - eps_[row])
                             
-                        if (full_iter == 0 and diag_iter == 0)   or   EO("newton_iter_post_use_on_implicit_steps"):
+                        if (full_iter == 0 and diag_iter == 0)   or   opts.newton_iter_post_use_on_implicit_steps:
                             x_, eps_ = RK.newton_iter(x_0, x_, eps_, eps_prev_, data_, NS.s_, row, NS.h, sigmas, step, "post", SYNC_GUIDE_ACTIVE)
 
                     # UPDATE   #for row in range(RK.rows - RK.multistep_stages - RK.row_offset + 1):
@@ -1769,26 +1788,26 @@ def sample_rk_beta(
                                 if RK.EXPONENTIAL:
                                     if VE_MODEL:
                                         eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_y_[ms] + sigma*(-noise_bongflow))
-                                        if EO("sync_x2y"):
+                                        if opts.sync_x2y:
                                             eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_x2y_[ms] + sigma*(-noise_bongflow))
                                     else:
                                         eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_y_[ms] + sigma*(y0_bongflow-noise_bongflow))
-                                        if EO("sync_x2y"):
+                                        if opts.sync_x2y:
                                             eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_x2y_[ms] + sigma*(y0_bongflow-noise_bongflow))
                                 else:
                                     if VE_MODEL:
                                         eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_y_[ms] + (noise_bongflow))
-                                        if EO("sync_x2y"):
+                                        if opts.sync_x2y:
                                             eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_x2y_[ms] + (noise_bongflow))
                                     else:
                                         eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_y_[ms] + (noise_bongflow-y0_bongflow))
-                                        if EO("sync_x2y"):
+                                        if opts.sync_x2y:
                                             eps_[ms] = sync_mask * eps_x_[ms]  +  (1-sync_mask) * eps_x2y_[ms]  +  weight_mask * (-eps_x2y_[ms] + (noise_bongflow-y0_bongflow))
 
-                    if BONGMATH and NS.s_[row] > RK.sigma_min and NS.h < RK.sigma_max/2   and   (diag_iter == implicit_steps_diag or EO("enable_diag_explicit_bongmath_all"))   and not EO("disable_terminal_bongmath"):
+                    if BONGMATH and NS.s_[row] > RK.sigma_min and NS.h < RK.sigma_max/2   and   (diag_iter == implicit_steps_diag or opts.enable_diag_explicit_bongmath_all)   and not opts.disable_terminal_bongmath:
                         if step == 0 and UNSAMPLE:
                             pass
-                        elif full_iter == implicit_steps_full or not EO("disable_fully_explicit_bongmath_except_final"):
+                        elif full_iter == implicit_steps_full or not opts.disable_fully_explicit_bongmath_except_final:
                             if sigma > 0.03:
                                 BONGMATH_Y = SYNC_GUIDE_ACTIVE
                                 x_0, x_, eps_ = RK.bong_iter(x_0, x_, eps_, eps_prev_, data_, sigma, NS.s_, row, RK.row_offset, NS.h, step, step_sched,
@@ -1830,7 +1849,7 @@ def sample_rk_beta(
                     noise_bongflow_new = (x - x_next) / sigma_next + noise_bongflow
                     yt_next += sigma_next * (noise_bongflow_new - noise_bongflow)
                     x_0 += sigma * (noise_bongflow_new - noise_bongflow)
-                    if not EO("disable_i_bong"):
+                    if not opts.disable_i_bong:
                         for i_bong in range(len(NS.s_)):
                             x_[i_bong] += NS.s_[i_bong] * (noise_bongflow_new - noise_bongflow)
                     #x_[0] += sigma * (noise_bongflow_new - noise_bongflow)
@@ -1839,7 +1858,7 @@ def sample_rk_beta(
             else:
                 x = x_next
             
-            if EO("keep_step_means"):
+            if opts.keep_step_means:
                 x = x - x.mean(dim=(-2,-1), keepdim=True) + x_means_per_step
 
             
@@ -1854,53 +1873,44 @@ def sample_rk_beta(
             
             full_iter += 1
             
-            if LG.lgw[step_sched] > 0 and step >= EO("guide_cutoff_start_step", 0) and cossim_counter < EO("guide_cutoff_max_iter", 10) and (EO("guide_cutoff") or EO("guide_min")):
-                guide_cutoff = EO("guide_cutoff", 1.0)
+            if LG.lgw[step_sched] > 0 and step >= opts.guide_cutoff_start_step and cossim_counter < opts.guide_cutoff_max_iter and ("guide_cutoff" in opts.given or "guide_min" in opts.given):
+                guide_cutoff = opts.guide_cutoff
                 denoised_norm = data_[0] - data_[0].mean(dim=(-2,-1), keepdim=True)
                 y0_norm       = LG.y0    - LG.y0   .mean(dim=(-2,-1), keepdim=True)
                 y0_cossim     = get_cosine_similarity(denoised_norm, y0_norm)
-                if y0_cossim > guide_cutoff and LG.lgw[step_sched] > EO("guide_cutoff_floor", 0.0):
-                    if not EO("guide_cutoff_fast"):
-                        LG.lgw[step_sched] *= EO("guide_cutoff_factor", 0.9)
+                if y0_cossim > guide_cutoff and LG.lgw[step_sched] > opts.guide_cutoff_floor:
+                    if not opts.guide_cutoff_fast:
+                        LG.lgw[step_sched] *= opts.guide_cutoff_factor
                     else:
-                        LG.lgw *= EO("guide_cutoff_factor", 0.9)
+                        LG.lgw *= opts.guide_cutoff_factor
                     full_iter -= 1
-                if y0_cossim < EO("guide_min", 0.0) and LG.lgw[step_sched] < EO("guide_min_ceiling", 1.0):
-                    if not EO("guide_cutoff_fast"):
-                        LG.lgw[step_sched] *= EO("guide_min_factor", 1.1)
+                if y0_cossim < opts.guide_min and LG.lgw[step_sched] < opts.guide_min_ceiling:
+                    if not opts.guide_cutoff_fast:
+                        LG.lgw[step_sched] *= opts.guide_min_factor
                     else:
-                        LG.lgw *= EO("guide_min_factor", 1.1)
+                        LG.lgw *= opts.guide_min_factor
                     full_iter -= 1
         
         if FLOW_STARTED and FLOW_STOPPED:
             data_prev_ = data_x_prev_
         if FLOW_STARTED and not FLOW_STOPPED:
-            data_x_prev_[0] = data_cached       # data_cached is data_x from flow mode. this allows multistep to resume seamlessly.
-            for ms in range(recycled_stages):
-                data_x_prev_[recycled_stages - ms] = data_x_prev_[recycled_stages - ms - 1]
+            data_x_prev_.push(data_cached)       # data_cached is data_x from flow mode. this allows multistep to resume seamlessly.
 
         #if LG.guide_mode.startswith("sync") and (LG.lgw[step_sched] != 0.0 or LG.lgw_inv[step_sched] != 0.0):
         #    data_prev_[0] = x_0 - sigma * eps_[0]
         #else:
-        data_prev_[0] = data_[0]                # with flow mode, this will be the differentiated guide/"denoised"
-        for ms in range(recycled_stages):
-            data_prev_[recycled_stages - ms] = data_prev_[recycled_stages - ms - 1]   # TODO: verify that this does not run on every substep...
+        data_prev_.push(data_[0])                # with flow mode, this will be the differentiated guide/"denoised"   # TODO: verify that this does not run on every substep...
 
         if SYNC_GUIDE_ACTIVE:
-            data_prev_x_[0] = data_x      
-            for ms in range(recycled_stages):
-                data_prev_x_[recycled_stages - ms] = data_prev_x_[recycled_stages - ms - 1] 
-
-            data_prev_y_[0] = data_y     
-            for ms in range(recycled_stages):
-                data_prev_y_[recycled_stages - ms] = data_prev_y_[recycled_stages - ms - 1] 
+            data_prev_x_.push(data_x)
+            data_prev_y_.push(data_y)
         
         rk_type = RK.swap_rk_type_at_step_or_threshold(x_0, data_prev_, NS, sigmas, step, rk_swap_step, rk_swap_threshold, rk_swap_type, rk_swap_print)
         if step > rk_swap_step:
             implicit_steps_full = 0
             implicit_steps_diag = 0
 
-        if EO("bong2m") or EO("bong3m"):
+        if opts.bong2m or opts.bong3m:
             denoised_data_prev2 = denoised_data_prev
             denoised_data_prev = data_[0]
         
@@ -1912,8 +1922,8 @@ def sample_rk_beta(
                 LG.y0_inv = denoised
                 LG.HAS_LATENT_GUIDE_INV = True
                 
-        if EO("pseudo_mix_strength"):
-            pseudo_mix_strength = EO("pseudo_mix_strength", 0.0)
+        if "pseudo_mix_strength" in opts.given:
+            pseudo_mix_strength = opts.pseudo_mix_strength
             LG.y0     = orig_y0     + pseudo_mix_strength * (denoised - orig_y0)
             LG.y0_inv = orig_y0_inv + pseudo_mix_strength * (denoised - orig_y0_inv)
             
@@ -1925,7 +1935,7 @@ def sample_rk_beta(
         progress_bar.update(1)  #THIS WAS HERE
         step += 1
         
-        if EO("skip_step", -1) == step:
+        if opts.skip_step == step:
             step += 1
 
         if d_noise_start_step     == step:
@@ -1937,24 +1947,24 @@ def sample_rk_beta(
             if sigmas.max() > NS.sigma_max:
                 sigmas = sigmas / NS.sigma_max
         
-        if LG.lgw[step_sched] > 0 and step >= EO("guide_step_cutoff_start_step", 0) and cossim_counter < EO("guide_step_cutoff_max_iter", 10) and (EO("guide_step_cutoff") or EO("guide_step_min")):
-            guide_cutoff = EO("guide_step_cutoff", 1.0)
+        if LG.lgw[step_sched] > 0 and step >= opts.guide_step_cutoff_start_step and cossim_counter < opts.guide_step_cutoff_max_iter and ("guide_step_cutoff" in opts.given or "guide_step_min" in opts.given):
+            guide_cutoff = opts.guide_step_cutoff
             eps_trash, data_trash = RK(x, sigma_next, x_0, sigma)
             denoised_norm = data_trash - data_trash.mean(dim=(-2,-1), keepdim=True)
             y0_norm       = LG.y0    - LG.y0   .mean(dim=(-2,-1), keepdim=True)
             y0_cossim     = get_cosine_similarity(denoised_norm, y0_norm)
-            if y0_cossim > guide_cutoff and LG.lgw[step_sched] > EO("guide_step_cutoff_floor", 0.0):
-                if not EO("guide_step_cutoff_fast"):
-                    LG.lgw[step_sched] *= EO("guide_step_cutoff_factor", 0.9)
+            if y0_cossim > guide_cutoff and LG.lgw[step_sched] > opts.guide_step_cutoff_floor:
+                if not opts.guide_step_cutoff_fast:
+                    LG.lgw[step_sched] *= opts.guide_step_cutoff_factor
                 else:
-                    LG.lgw *= EO("guide_step_cutoff_factor", 0.9)
+                    LG.lgw *= opts.guide_step_cutoff_factor
                 step -= 1
                 x_0 = x = x_[0] = x_0_orig.clone()
-            if y0_cossim < EO("guide_step_min", 0.0) and LG.lgw[step_sched] < EO("guide_step_min_ceiling", 1.0):
-                if not EO("guide_step_cutoff_fast"):
-                    LG.lgw[step_sched] *= EO("guide_step_min_factor", 1.1)
+            if y0_cossim < opts.guide_step_min and LG.lgw[step_sched] < opts.guide_step_min_ceiling:
+                if not opts.guide_step_cutoff_fast:
+                    LG.lgw[step_sched] *= opts.guide_step_min_factor
                 else:
-                    LG.lgw *= EO("guide_step_min_factor", 1.1)
+                    LG.lgw *= opts.guide_step_min_factor
                 step -= 1
                 x_0 = x = x_[0] = x_0_orig.clone()
         # END SAMPLING LOOP ---------------------------------------------------------------------------------------------------
@@ -1968,11 +1978,22 @@ def sample_rk_beta(
 
     eps      = eps     .to(model_device)
     denoised = denoised.to(model_device)
-    x        = x       .to(model_device)
-    
+    x        = x       .to(model_device, copy=True)     # may be a view into the pooled x_
+
     progress_bar.close()
 
-    if not (UNSAMPLE and sigmas[1] > sigmas[0]) and not EO("preview_last_step_always") and sigma is not None   and   not (FLOW_STARTED and not FLOW_STOPPED):
+    steps_run = max(step - start_step, 1)
+    RESplain("ExtraOptions lookups per step:", (EO.lookups + RK.EO.lookups + NS.EO.lookups + LG.EO.lookups) // steps_run, debug=True)
+    tableau_lookups = RK.tableau_cache_hits + RK.tableau_cache_misses
+    if tableau_lookups > 0:
+        RESplain("Tableau cache hit rate:", f"{RK.tableau_cache_hits}/{tableau_lookups}", debug=True)
+    if RK_PLAN is not None:
+        RESplain("Step plan hits/misses:", f"{RK_PLAN.hits}/{RK_PLAN.misses}", debug=True)
+    RESplain("Guide tensor bytes cloned into transformer_options per step:", RK.published_bytes_cloned // steps_run, debug=True)
+    if attn_masks:
+        RESplain("Attention mask bytes transferred per step:", (sum(attn_mask.bytes_transferred for attn_mask in attn_masks) - attn_mask_bytes_start) // steps_run, debug=True)
+
+    if not (UNSAMPLE and sigmas[1] > sigmas[0]) and not opts.preview_last_step_always and sigma is not None   and   not (FLOW_STARTED and not FLOW_STOPPED):
         callback_step = len(sigmas)-1 - step if sampler_mode == "unsample" else step
         preview_callback(x, eps, denoised, x_, eps_, data_, callback_step, sigma, sigma_next, callback, EO, preview_override=data_cached, FLOW_STOPPED=FLOW_STOPPED)
 
@@ -1998,9 +2019,12 @@ def sample_rk_beta(
             state_info_out['guide_inversion_y0']     = guide_inversion_y0
             state_info_out['guide_inversion_y0_inv'] = guide_inversion_y0_inv
 
-        state_info_out['raw_x']             = x.to('cpu')
-        state_info_out['denoised']          = denoised.to('cpu')
-        state_info_out['data_prev_']        = data_prev_.to('cpu')
+        handoff = {'raw_x': x, 'denoised': denoised, 'data_prev_': data_prev_.ordered()}
+        if FLOW_STARTED and not FLOW_STOPPED:
+            handoff.update(y0=y0, data_cached=data_cached, data_x_prev_=data_x_prev_.ordered())
+            #handoff['y0_inv'] = y0_inv       # TODO: implement this?
+        HANDOFF.stash(state_info_out, **handoff)
+        
         state_info_out['end_step']          = step
         state_info_out['sigma_next']        = sigma_next.clone()
         state_info_out['sigmas']            = sigmas_scheduled.clone()
@@ -2015,14 +2039,10 @@ def sample_rk_beta(
         state_info_out['y0_bongflow_orig']  = y0_bongflow_orig
         state_info_out['y0_standard_guide']       = y0_standard_guide
         state_info_out['y0_inv_standard_guide']  = y0_inv_standard_guide
-        state_info_out['data_prev_y_']      = data_prev_y_
-        state_info_out['data_prev_x_']      = data_prev_x_
-
-        if FLOW_STARTED and not FLOW_STOPPED:
-            state_info_out['y0']           = y0.to('cpu') 
-            #state_info_out['y0_inv']       = y0_inv.to('cpu')       # TODO: implement this?
-            state_info_out['data_cached']  = data_cached.to('cpu')
-            state_info_out['data_x_prev_'] = data_x_prev_.to('cpu')
+        state_info_out['data_prev_y_']      = data_prev_y_.ordered() if data_prev_y_ is not None else None
+        state_info_out['data_prev_x_']      = data_prev_x_.ordered() if data_prev_x_ is not None else None
+        state_info_out['bong_iter_counts']    = RK.bong_iter_counts
+        state_info_out['bong_iter_residuals'] = dict(zip(RK.bong_iter_residuals, torch.stack(list(RK.bong_iter_residuals.values())).tolist())) if RK.bong_iter_residuals else {}
 
     return x
 
@@ -2057,25 +2077,26 @@ def preview_callback(
                     preview_override : Optional[Tensor] = None,
                     FLOW_STOPPED : bool = False):
 
-    if EO("eps_substep_preview"):
-        row_callback = EO("eps_substep_preview", 0)
+    opts = EO.compile()
+    if "eps_substep_preview" in opts.given:
+        row_callback = opts.eps_substep_preview
         denoised_callback = eps_[row_callback]
         
-    elif EO("denoised_substep_preview"):
-        row_callback = EO("denoised_substep_preview", 0)
+    elif "denoised_substep_preview" in opts.given:
+        row_callback = opts.denoised_substep_preview
         denoised_callback = data_[row_callback]
         
-    elif EO("x_substep_preview"):
-        row_callback = EO("x_substep_preview", 0)
+    elif "x_substep_preview" in opts.given:
+        row_callback = opts.x_substep_preview
         denoised_callback = x_[row_callback]
         
-    elif EO("eps_preview"):
+    elif opts.eps_preview:
         denoised_callback = eps
         
-    elif EO("denoised_preview"):
+    elif opts.denoised_preview:
         denoised_callback = denoised
         
-    elif EO("x_preview"):
+    elif opts.x_preview:
         denoised_callback = x
         
     elif preview_override is not None and FLOW_STOPPED == False:
@@ -2087,56 +2108,3 @@ def preview_callback(
     callback({'x': x, 'i': step, 'sigma': sigma, 'sigma_next': sigma_next, 'denoised': denoised_callback.to(torch.float32)}) if callback is not None else None
     
     return
-
-
-
-
-def adain_patchwise_row_batch(content: torch.Tensor, style: torch.Tensor, sigma: float = 1.0, kernel_size: int = None, eps: float = 1e-5) -> torch.Tensor:
-
-    B, C, H, W = content.shape
-    device, dtype = content.device, content.dtype
-
-    if kernel_size is None:
-        kernel_size = int(2 * math.ceil(3 * sigma) + 1)
-    if kernel_size % 2 == 0:
-        kernel_size += 1
-
-    pad = kernel_size // 2
-    coords = torch.arange(kernel_size, dtype=torch.float64, device=device) - pad
-    gauss = torch.exp(-0.5 * (coords / sigma) ** 2)
-    gauss = (gauss / gauss.sum()).to(dtype)
-    kernel_2d = (gauss[:, None] * gauss[None, :])
-
-    weight = kernel_2d.view(1, 1, kernel_size, kernel_size)
-
-    content_padded = F.pad(content, (pad, pad, pad, pad), mode='reflect')
-    style_padded = F.pad(style, (pad, pad, pad, pad), mode='reflect')
-    result = torch.zeros_like(content)
-
-    for i in range(H):
-        c_row_patches = torch.stack([
-            content_padded[:, :, i:i+kernel_size, j:j+kernel_size]
-            for j in range(W)
-        ], dim=0)  # [W, B, C, k, k]
-
-        s_row_patches = torch.stack([
-            style_padded[:, :, i:i+kernel_size, j:j+kernel_size]
-            for j in range(W)
-        ], dim=0)
-
-        w = weight.expand_as(c_row_patches[0])
-
-        c_mean = (c_row_patches * w).sum(dim=(-1, -2), keepdim=True)
-        c_std  = ((c_row_patches - c_mean) ** 2 * w).sum(dim=(-1, -2), keepdim=True).sqrt() + eps
-        s_mean = (s_row_patches * w).sum(dim=(-1, -2), keepdim=True)
-        s_std  = ((s_row_patches - s_mean) ** 2 * w).sum(dim=(-1, -2), keepdim=True).sqrt() + eps
-
-        center = kernel_size // 2
-        central = c_row_patches[:, :, :, center:center+1, center:center+1]
-        normed = (central - c_mean) / c_std
-        stylized = normed * s_std + s_mean
-
-        result[:, :, i, :] = stylized.squeeze(-1).squeeze(-1).permute(1, 2, 0)  # [B,C,W]
-
-    return result
-
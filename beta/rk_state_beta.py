@@ -0,0 +1,105 @@
+import torch
+
+from torch  import Tensor
+from typing import Optional, Dict, Union
+
+import comfy.model_management
+
+from ..helper   import ExtraOptions
+from ..res4lyf  import RESplain
+
+
+
+STATE_DTYPES = ("float16", "bfloat16")    # compressed storage RK_StateHandoff accepts for state_dtype
+
+
+
+class RK_History:
+    """
+    Multistep history (data_prev_ etc.) as a ring buffer. push() leaves the same order the copy-shift loop did,
+    [new, new, prev, prev2, ...], by rotating slot indices: one latent copied per step instead of the whole stack.
+    """
+    def __init__(self, storage:Tensor):
+        self.storage = storage
+        self.order   = list(range(len(storage)))
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __getitem__(self, index:int) -> Tensor:
+        return self.storage[self.order[index]]
+
+    def push(self, value:Tensor) -> None:
+        slot = self.order[-1]
+        self.storage[slot].copy_(value)
+        self.order = ([slot, slot] + self.order[1:-1])[:len(self.order)]
+
+    def ordered(self) -> Tensor:
+        """The history as one stacked tensor in push order, for handing off to the next sampler."""
+        return self.storage[self.order]
+
+
+
+class RK_StateHandoff:
+    """
+    Moves the latent-sized sampler state (raw_x, denoised, data_prev_, flow state...) between chained samplers.
+    
+    state_residency=cpu     copy to CPU at the end of a run, like before (default)
+    state_residency=device  keep a copy on the work device, the next sampler picks it up without a PCIe round trip
+    state_residency=auto    decided once at stash time: keep it on the device if free VRAM covers it plus comfy's minimum
+                            inference memory, else copy to CPU. It is not moved off the device if VRAM runs short later.
+    state_dtype=float16     store floating point state compressed (float16/bfloat16), restored to its original dtype on load
+    
+    Stashed and loaded tensors are always copies, as the previous sampler's output may be cached and reused.
+    """
+    def __init__(self, EO:ExtraOptions, work_device:Union[str, torch.device]):
+        opts             = EO.compile()
+        self.residency   = opts.state_residency
+        self.dtype       = None
+        self.work_device = torch.device(work_device)
+        
+        if opts.state_dtype in STATE_DTYPES:
+            self.dtype = getattr(torch, opts.state_dtype)
+        elif opts.state_dtype:
+            RESplain(f"Unsupported state_dtype={opts.state_dtype}, use one of {', '.join(STATE_DTYPES)}. Storing state uncompressed.")
+        
+        self.bytes_stashed = 0   # bytes that crossed devices
+        self.bytes_loaded  = 0
+
+    def stash_device(self, nbytes:int) -> torch.device:
+        if self.residency == "device":
+            return self.work_device
+        if self.residency == "auto" and self.work_device.type != "cpu":
+            free_memory = comfy.model_management.get_free_memory(self.work_device)
+            if free_memory > nbytes + comfy.model_management.minimum_inference_memory():
+                return self.work_device
+        return torch.device('cpu')
+
+    def stash(self, state_info_out:Dict, **tensors:Optional[Tensor]) -> None:
+        tensors = {key: tensor for key, tensor in tensors.items() if tensor is not None}
+        dtypes  = state_info_out.setdefault('state_dtypes', {})
+        
+        itemsize = torch.finfo(self.dtype).bits // 8 if self.dtype is not None else None
+        nbytes   = sum(tensor.numel() * (itemsize if itemsize and tensor.is_floating_point() else tensor.element_size()) for tensor in tensors.values())
+        device = self.stash_device(nbytes)
+        
+        for key, tensor in tensors.items():
+            dtype       = self.dtype if self.dtype is not None and tensor.is_floating_point() else tensor.dtype
+            dtypes[key] = tensor.dtype
+            state_info_out[key] = tensor.to(device=device, dtype=dtype, copy=True)
+            
+            if tensor.device.type != device.type:
+                self.bytes_stashed += state_info_out[key].numel() * state_info_out[key].element_size()
+        
+        state_info_out['state_handoff_bytes']        = self.bytes_stashed
+        state_info_out['state_handoff_bytes_loaded'] = self.bytes_loaded
+        RESplain(f"State handoff: {nbytes / 2**20:.1f} MB stashed on {device}, moved across devices: {self.bytes_loaded / 2**20:.1f} MB loaded, {self.bytes_stashed / 2**20:.1f} MB stashed", debug=True)
+
+    def load(self, state_info:Dict, key:str, device:Optional[Union[str, torch.device]]=None) -> Tensor:
+        tensor = state_info[key]
+        device = self.work_device if device is None else torch.device(device)
+        dtype  = state_info.get('state_dtypes', {}).get(key, tensor.dtype)
+        
+        if tensor.device.type != device.type:
+            self.bytes_loaded += tensor.numel() * tensor.element_size()
+        return tensor.to(device=device, dtype=dtype, copy=True)
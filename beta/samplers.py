@@ -613,18 +613,18 @@ class SharkSampler:
                                 latent_up_dummy = F.interpolate(latent_image['samples'].to(torch.float16), size=(latent_image['samples'].shape[-2] * 2, latent_image['samples'].shape[-1] * 2), mode="nearest")
                                 sampler.extra_options['AttnMask'].set_latent(latent_up_dummy)
                                 sampler.extra_options['AttnMask'].generate()
-                                sampler.extra_options['AttnMask'].mask_up   = sampler.extra_options['AttnMask'].attn_mask.mask
+                                sampler.extra_options['AttnMask'].mask_up   = sampler.extra_options['AttnMask'].attn_mask
                                 
                                 latent_down_dummy = F.interpolate(latent_image['samples'].to(torch.float16), size=(latent_image['samples'].shape[-2] // 2, latent_image['samples'].shape[-1] // 2), mode="nearest")
                                 sampler.extra_options['AttnMask'].set_latent(latent_down_dummy)
                                 sampler.extra_options['AttnMask'].generate()
-                                sampler.extra_options['AttnMask'].mask_down = sampler.extra_options['AttnMask'].attn_mask.mask
+                                sampler.extra_options['AttnMask'].mask_down = sampler.extra_options['AttnMask'].attn_mask
                                 
                                 if isinstance(model.model.model_config, comfy.supported_models.SD15):
                                     latent_down_dummy = F.interpolate(latent_image['samples'].to(torch.float16), size=(latent_image['samples'].shape[-2] // 4, latent_image['samples'].shape[-1] // 4), mode="nearest")
                                     sampler.extra_options['AttnMask'].set_latent(latent_down_dummy)
                                     sampler.extra_options['AttnMask'].generate()
-                                    sampler.extra_options['AttnMask'].mask_down2 = sampler.extra_options['AttnMask'].attn_mask.mask
+                                    sampler.extra_options['AttnMask'].mask_down2 = sampler.extra_options['AttnMask'].attn_mask
                                 
                             sampler.extra_options['AttnMask'].set_latent(latent_image['samples'])
                             sampler.extra_options['AttnMask'].generate()
@@ -642,18 +642,18 @@ class SharkSampler:
                                 latent_up_dummy = F.interpolate(latent_image['samples'].to(torch.float16), size=(latent_image['samples'].shape[-2] * 2, latent_image['samples'].shape[-1] * 2), mode="nearest")
                                 sampler.extra_options['AttnMask_neg'].set_latent(latent_up_dummy)
                                 sampler.extra_options['AttnMask_neg'].generate()
-                                sampler.extra_options['AttnMask_neg'].mask_up   = sampler.extra_options['AttnMask_neg'].attn_mask.mask
+                                sampler.extra_options['AttnMask_neg'].mask_up   = sampler.extra_options['AttnMask_neg'].attn_mask
                                 
                                 latent_down_dummy = F.interpolate(latent_image['samples'].to(torch.float16), size=(latent_image['samples'].shape[-2] // 2, latent_image['samples'].shape[-1] // 2), mode="nearest")
                                 sampler.extra_options['AttnMask_neg'].set_latent(latent_down_dummy)
                                 sampler.extra_options['AttnMask_neg'].generate()
-                                sampler.extra_options['AttnMask_neg'].mask_down = sampler.extra_options['AttnMask_neg'].attn_mask.mask
+                                sampler.extra_options['AttnMask_neg'].mask_down = sampler.extra_options['AttnMask_neg'].attn_mask
                                 
                                 if isinstance(model.model.model_config, comfy.supported_models.SD15):
                                     latent_down_dummy = F.interpolate(latent_image['samples'].to(torch.float16), size=(latent_image['samples'].shape[-2] // 4, latent_image['samples'].shape[-1] // 4), mode="nearest")
                                     sampler.extra_options['AttnMask_neg'].set_latent(latent_down_dummy)
                                     sampler.extra_options['AttnMask_neg'].generate()
-                                    sampler.extra_options['AttnMask_neg'].mask_down2 = sampler.extra_options['AttnMask_neg'].attn_mask.mask
+                                    sampler.extra_options['AttnMask_neg'].mask_down2 = sampler.extra_options['AttnMask_neg'].attn_mask
                             
                             sampler.extra_options['AttnMask_neg'].set_latent(latent_image['samples'])
                             sampler.extra_options['AttnMask_neg'].generate()
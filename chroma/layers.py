@@ -49,6 +49,8 @@ class Approximator(nn.Module):
 
 
 class ReChromaDoubleStreamBlock(nn.Module):
+    attn_backend = "dense"      # "regional" is set per block by ReChromaPatcher
+    
     def __init__(self, hidden_size: int, num_heads: int, mlp_ratio: float, qkv_bias: bool = False, flipped_img_txt=False, dtype=None, device=None, operations=None):
         super().__init__()
 
@@ -97,7 +99,7 @@ class ReChromaDoubleStreamBlock(nn.Module):
         attn = attention(torch.cat((txt_q, img_q), dim=2),
                          torch.cat((txt_k, img_k), dim=2),
                          torch.cat((txt_v, img_v), dim=2),
-                         pe=pe, mask=attn_mask)
+                         pe=pe, mask=attn_mask, backend=self.attn_backend)
 
         txt_attn, img_attn = attn[:, : txt.shape[1]], attn[:, txt.shape[1] :]
 
@@ -120,6 +122,8 @@ class ReChromaSingleStreamBlock(nn.Module):
     A DiT block with parallel linear layers as described in
     https://arxiv.org/abs/2302.05442 and adapted modulation interface.
     """
+    attn_backend = "dense"
+    
 
     def __init__(
         self,
@@ -159,7 +163,7 @@ class ReChromaSingleStreamBlock(nn.Module):
         q, k = self.norm(q, k, v)
 
         # compute attention
-        attn = attention(q, k, v, pe=pe, mask=attn_mask)
+        attn = attention(q, k, v, pe=pe, mask=attn_mask, backend=self.attn_backend)
         # compute activation in mlp stream, cat again and run second linear layer
         output = self.linear2(torch.cat((attn, self.mlp_act(mlp)), 2))
         x += mod.gate * output
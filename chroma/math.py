@@ -5,11 +5,16 @@ from comfy.ldm.modules.attention import attention_pytorch
 
 import comfy.model_management
 
-def attention(q: Tensor, k: Tensor, v: Tensor, pe: Tensor, mask=None) -> Tensor:
+from ..flux.math import attention_regional
+
+def attention(q: Tensor, k: Tensor, v: Tensor, pe: Tensor, mask=None, backend="dense") -> Tensor:
     q, k = apply_rope(q, k, pe)
 
     heads = q.shape[1]
-    x = attention_pytorch(q, k, v, heads, skip_reshape=True, mask=mask)
+    if backend == "regional":
+        x = attention_regional(q, k, v, heads, skip_reshape=True, mask=mask)
+    else:
+        x = attention_pytorch(q, k, v, heads, skip_reshape=True, mask=mask)
     #if mask is not None:
     #    x = attention_pytorch(q, k, v, heads, skip_reshape=True, mask=mask)
     #else:
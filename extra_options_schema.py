@@ -0,0 +1,345 @@
+import torch
+
+from typing import NamedTuple, Any, Optional, Dict, List
+
+
+
+# DECLARED EXTRA_OPTIONS
+
+class ExtraOption(NamedTuple):
+    name    : str
+    type    : Optional[Any]   # None for flags, which are set by their presence alone. List[elem_type] for comma separated lists.
+    default : Any             # None when the default depends on the call site (seeds, schedule length, c1..c3...)
+    module  : str = ""
+
+
+
+EXTRA_OPTIONS_SCHEMA : Dict[str, ExtraOption] = {}
+
+def flag(name:str) -> ExtraOption:
+    return ExtraOption(name, None, False)
+
+def option(name:str, option_type:Any, default:Any) -> ExtraOption:
+    return ExtraOption(name, option_type, default)
+
+def declare_extra_options(module:str, *options:ExtraOption) -> None:
+    """Register options under the module that reads them. Every name may only be declared once."""
+    for opt in options:
+        if opt.name in EXTRA_OPTIONS_SCHEMA:
+            raise ValueError(f"extra_option {opt.name} declared by both {EXTRA_OPTIONS_SCHEMA[opt.name].module} and {module}")
+        EXTRA_OPTIONS_SCHEMA[opt.name] = opt._replace(module=module)
+
+
+
+declare_extra_options("beta.rk_sampler_beta",
+    option("default_dtype",                                     torch.dtype, torch.float64),
+    option("stage_dtype",                                       str,         ""),
+    option("cfg_cw",                                            float,       None),
+    option("noise_seed",                                        int,         None),
+    option("noise_seed_substep",                                int,         None),
+    option("pseudoimplicit_row_weights",                        List[float], None),
+    option("pseudoimplicit_step_weights",                       List[float], None),
+    option("noise_scaling_cycles",                              int,         1),
+    option("noise_boost_step",                                  float,       0.0),
+    option("noise_boost_substep",                               float,       0.0),
+    option("pseudo_mix_strength",                               float,       0.0),
+    flag  ("y0_to_transformer_options"),
+    flag  ("y0_inv_to_transformer_options"),
+    flag  ("update_cross_attn"),
+    option("sigma_restarts",                                    int,         0),
+    option("eps_substep_preview",                               int,         0),
+    flag  ("implicit_skip_model_call_at_start"),
+    flag  ("implicit_lagrange_init"),
+    flag  ("radaucycle"),
+    flag  ("implicit_full_skip_model_call_at_start"),
+    flag  ("implicit_lagrange_skip_model_call_at_start"),
+    flag  ("work_device_cpu"),
+    flag  ("flow_use_init_noise"),
+    flag  ("flow_use_smart_noise"),
+    option("denoised_substep_preview",                          int,         0),
+    option("src_llama_start",                                   int,         0),
+    option("src_llama_end",                                     int,         0),
+    option("src_t5_start",                                      int,         0),
+    option("src_t5_end",                                        int,         0),
+    option("tgt_llama_start",                                   int,         0),
+    option("tgt_llama_end",                                     int,         0),
+    option("tgt_t5_start",                                      int,         0),
+    option("tgt_t5_end",                                        int,         0),
+    option("skip_cross_attn",                                   bool,        False),
+    option("update_q",                                          bool,        False),
+    option("update_k",                                          bool,        True),
+    option("update_v",                                          bool,        True),
+    option("lamb",                                              float,       0.01),
+    option("erase",                                             float,       10.0),
+    flag  ("disable_step_plan"),
+    option("guide_step_cutoff",                                 float,       1.0),
+    option("guide_step_min",                                    float,       0.0),
+    flag  ("keep_step_means"),
+    flag  ("bong2m"),
+    flag  ("bong3m"),
+    option("skip_step",                                         int,         -1),
+    flag  ("preview_last_step_always"),
+    option("x_substep_preview",                                 int,         0),
+    flag  ("style_edge_width"),
+    option("guide_cutoff",                                      float,       1.0),
+    option("guide_step_cutoff_start_step",                      int,         0),
+    option("guide_step_cutoff_max_iter",                        int,         10),
+    flag  ("eps_preview"),
+    flag  ("implicit_lagrange_skip_model_call_at_start_0_only"),
+    flag  ("fully_implicit_reupdate_x"),
+    flag  ("fully_pseudo_init"),
+    option("guide_cutoff_start_step",                           int,         0),
+    option("guide_cutoff_max_iter",                             int,         10),
+    option("guide_min",                                         float,       0.0),
+    option("guide_step_cutoff_floor",                           float,       0.0),
+    flag  ("guide_step_cutoff_fast"),
+    option("guide_step_cutoff_factor",                          float,       0.9),
+    option("guide_step_min_ceiling",                            float,       1.0),
+    option("guide_step_min_factor",                             float,       1.1),
+    flag  ("denoised_preview"),
+    option("guide_cutoff_floor",                                float,       0.0),
+    flag  ("guide_cutoff_fast"),
+    option("guide_cutoff_factor",                               float,       0.9),
+    option("guide_min_ceiling",                                 float,       1.0),
+    option("guide_min_factor",                                  float,       1.1),
+    flag  ("x_preview"),
+    flag  ("disable_guides_eps_substep"),
+    flag  ("disable_guides_eps_prev_substep"),
+    flag  ("guide_mean_pw"),
+    flag  ("newton_iter_post_use_on_implicit_steps"),
+    flag  ("enable_diag_explicit_bongmath_all"),
+    flag  ("disable_terminal_bongmath"),
+    flag  ("disable_i_bong"),
+    flag  ("fully_explicit_pogostick_eta"),
+    flag  ("implicit_lazy_recycle_first_model_call_at_start"),
+    flag  ("fully_implicit_update_x"),
+    flag  ("enable_fully_explicit_lagrange_rebound1"),
+    flag  ("diag_explicit_pogostick_eta"),
+    flag  ("sync_proj_y"),
+    flag  ("sync_proj_y2"),
+    flag  ("sync_proj_x"),
+    flag  ("sync_proj_x2"),
+    option("eps_x_mult",                                        float,       1.0),
+    option("eps_y_mult",                                        float,       1.0),
+    option("eps_x2y_mult",                                      float,       1.0),
+    option("eps_y2x_mult",                                      float,       1.0),
+    flag  ("data_is_y0_with_lure_x_mask"),
+    flag  ("eps_is_y0_with_lure_x_mask"),
+    flag  ("sync_use_fake_eps_y"),
+    flag  ("sync_use_fake_data_y"),
+    option("direct_pre_pseudo_guide",                           int,         0),
+    option("direct_pre_pseudo_guide_iter",                      int,         1),
+    flag  ("disable_fully_explicit_bongmath_except_final"),
+    flag  ("enable_fully_explicit_lagrange_rebound2"),
+    flag  ("disable_implicit_guide_preproc"),
+    flag  ("sync_unsample"),
+    flag  ("sync_unsample2"),
+    flag  ("flow_proj_xy"),
+    flag  ("flow_proj_yx"),
+    flag  ("flow_proj_xy_inv"),
+    flag  ("flow_proj_yx_inv"),
+    option("flow_cossim_iter",                                  int,         1),
+    flag  ("flow_slerp"),
+    option("guide_mean_pw_sigma",                               float,       1.0),
+    option("guide_mean_pw_kernel_size",                         int,         7),
+    flag  ("enable_fully_explicit_rebound1"),
+    flag  ("skip_yt"),
+    flag  ("sync_speed_mode"),
+    flag  ("disable_sync_speed_mode"),
+    flag  ("flow_sync"),
+    flag  ("flow_yx0_init_y0_inv"),
+    flag  ("flow_manual_masks"),
+    flag  ("flow_disable_renoise_y0"),
+    flag  ("flow_disable_doublenoise_y0"),
+    flag  ("flow_shit_out_yx0"),
+    option("flow_slerp_guide_ratio",                            float,       0.5),
+    flag  ("flow_static_guides"),
+    flag  ("flow_disable_doublenoise_y0_inv"),
+    flag  ("flow_disable_doublenoise_x_0"),
+    flag  ("flow_disable_renoise_x_0"),
+    flag  ("flow_shit_out_new"),
+    flag  ("flow_y_zero"),
+    flag  ("flow_reverse_data_masks"),
+    option("flow_sync_eps_mask",                                float,       1.0),
+    option("flow_sync_eps_revmask",                             float,       1.0),
+    option("flow_sync_eps_maskonly",                            float,       1.0),
+    option("flow_sync_eps_revmaskonly",                         float,       1.0),
+    option("flow_slerp_ratio2",                                 float,       0.5),
+    option("flow_slerp_similarity_ratio",                       float,       1.0),
+    flag  ("flow_slerp_autoalter"),
+    flag  ("flow_slerp_recalc_eps_row"),
+    flag  ("flow_slerp_recalc_data_row"),
+    flag  ("disable_implicit_prebong"),
+    flag  ("disable_diag_explicit_bongmath_rebound"),
+)
+
+declare_extra_options("beta.rk_method_beta",
+    option("reorder_tableau_indices",       List[int],   [-1]),
+    flag  ("tile_model_calls"),
+    flag  ("disable_tableau_cache"),
+    flag  ("bong_iter_max_row_full"),
+    flag  ("bong_iter_rowwise"),
+    flag  ("bong_iter_lock_x_0_ch_means"),
+    flag  ("bong_iter_lock_x_row_ch_means"),
+    flag  ("zonkytar"),
+    flag  ("sync_x2y"),
+    flag  ("manually_anchor_unsampler"),
+    option("tile_h",                        int,         128),
+    option("tile_w",                        int,         128),
+    option("tile_batch_size",               int,         0),
+    option("tile_feather",                  str,         "linear"),
+    flag  ("sync_mean_noise"),
+    option("bong_strength",                 float,       1.0),
+    option("bong_iter_max",                 int,         100),
+    option("bong_iter_tol",                 float,       0.0),
+    flag  ("disable_sync_mean_noise"),
+    option("bong_start_step",               int,         0),
+    option("bong_stop_step",                int,         10000),
+    flag  ("disable_bongmath_y"),
+    flag  ("tiles_autorotate"),
+)
+
+for newton_name in ("init", "pre", "post", "lying"):                   # RK_Method_Beta.newton_iter() builds these names from its newton_name
+    newton_iter_name = "newton_iter_" + newton_name
+    declare_extra_options("beta.rk_method_beta",
+        option(newton_iter_name,                       int,         100),
+        option(newton_iter_name + "_skip_last_steps",  int,         0),
+        option(newton_iter_name + "_mixing_rate",      float,       1.0),
+        option(newton_iter_name + "_anchor",           int,         0),
+        option(newton_iter_name + "_anchor_x_all",     bool,        None),
+        option(newton_iter_name + "_type",             str,         "from_epsilon"),
+        option(newton_iter_name + "_sequence",         str,         "double"),
+        flag  (newton_iter_name + "_include_row_b"),
+        option(newton_iter_name + "_opt",              List[str],   None),
+    )
+
+
+declare_extra_options("beta.rk_noise_sampler_beta",
+    flag  ("down_substep"),
+    flag  ("down_step"),
+    flag  ("implicit_substep_skip_final_eta"),
+    flag  ("disable_brownian_swap"),
+    flag  ("implicit_substep_only_first_eta"),
+    flag  ("implicit_step_skip_final_eta"),
+    flag  ("implicit_step_only_first_eta"),
+    flag  ("implicit_step_only_first_all_eta"),
+    flag  ("substep_eta_use_final"),
+)
+
+declare_extra_options("beta.rk_state_beta",
+    option("state_residency",                                   str,         "cpu"),
+    option("state_dtype",                                       str,         ""),
+)
+
+declare_extra_options("beta.rk_coefficients_beta",
+    option("multistep_initial_sampler",     str,         ""),
+    option("multistep_fallback_sampler",    str,         ""),
+    option("multistep_extra_initial_steps", int,         1),
+    flag  ("disable_analytic_solution"),
+    flag  ("h_prev_h_h_no_eta"),
+    option("c2",                            float,       None),
+    flag  ("h_only"),
+    option("c3",                            float,       None),
+    option("c1",                            float,       None),
+)
+
+declare_extra_options("beta.rk_guide_func_beta",
+    flag  ("normalize_frame_weights_per_step"),
+    flag  ("normalize_frame_weights_per_step_inv"),
+    flag  ("pseudoimplicit_denoised_prev"),
+    flag  ("substep_eps_ch_mean_std"),
+    flag  ("substep_eps_ch_mean"),
+    flag  ("substep_eps_ch_std"),
+    flag  ("substep_eps_mean_std"),
+    flag  ("substep_eps_mean"),
+    flag  ("substep_eps_std"),
+    flag  ("dynamic_guides_mean_std"),
+    flag  ("dynamic_guides_mean"),
+    option("temporal_smoothing",                                     float,       0.0),
+    option("input_norm",                                             str,         ""),
+    option("input_std",                                              float,       1.0),
+    option("noise_cossim_end_step",                                  int,         None),
+    option("noise_cossim_takeover_source",                           str,         "eps"),
+    option("noise_cossim_takeover_mode",                             str,         "forward"),
+    option("noise_cossim_takeover_tile",                             int,         None),
+    option("noise_cossim_takeover_iterations",                       int,         None),
+    flag  ("noise_noise_zscore_norm"),
+    flag  ("noise_noise_zscore_norm_cw"),
+    flag  ("noise_eps_zscore_norm"),
+    flag  ("noise_eps_zscore_norm_cw"),
+    option("noise_cossim_start_step",                                int,         0),
+    option("guide_sigma_shift",                                      float,       0.0),
+    flag  ("guide_pseudoimplicit_power_substep_flip_maxmin_scaling"),
+    option("data_targets",                                           List[float], [1.0]),
+    option("eps_targets",                                            List[float], [1.0]),
+    flag  ("dynamic_guides_inv"),
+    flag  ("slerp_epsilon_guide"),
+    flag  ("guide_pseudoimplicit_power_substep_maxmin_scaling"),
+    flag  ("disable_pseudobongmath"),
+    flag  ("fully_pseudoimplicit_denoised_prev"),
+    flag  ("pseudoimplicit_disable_eps_lying"),
+    flag  ("pseudoimplicit_disable_newton_iter"),
+    option("frame_targets",                                          List[float], [1.0]),
+    option("tol",                                                    float,       -1.0),
+    flag  ("disable_pseudoimplicit_bongmath"),
+    flag  ("disable_fully_pseudoimplicit_bongmath"),
+)
+
+declare_extra_options("beta.samplers",
+    flag  ("cond_noise"),
+    flag  ("uncond_noise"),
+    flag  ("uncond_ortho"),
+    flag  ("rescale_floor"),
+    flag  ("disable_dummy_sampler_init"),
+    option("ultracascade_guide_weight",                   float,       0.0),
+    option("ultracascade_guide_type",                     str,         "residual"),
+    option("t5_seed",                                     int,         None),
+    option("clip_seed",                                   int,         None),
+    option("t5_noise_type",                               str,         "gaussian"),
+    option("clip_noise_type",                             str,         "gaussian"),
+    option("t5_noise_sigma_max",                          str,         "gaussian"),
+    option("t5_noise_sigma_min",                          str,         "gaussian"),
+    option("clip_noise_sigma_max",                        str,         "gaussian"),
+    option("clip_noise_sigma_min",                        str,         "gaussian"),
+    option("t5_noise_scale",                              float,       1.0),
+    option("clip_noise_scale",                            float,       1.0),
+    option("latent_vram_factor",                          int,         3),
+    option("ultracascade_stage_up_upscale_align_corners", bool,        False),
+    option("ultracascade_stage_up_upscale_mode",          str,         "bicubic"),
+    flag  ("lock_batch_seed"),
+    flag  ("ultracascade_stage_up_preserve_data_prev"),
+    option("init_noise_normalize_channelwise",            str,         "true"),
+)
+
+declare_extra_options("flux.model",
+    option("style_iter",               int,         0),
+    flag  ("adain_fs_uhp"),
+    option("adain_fs_uhp_sigma",       float,       1.0),
+    option("adain_fs_uhp_kernel_size", int,         3),
+    option("adain_tile",               int,         4),
+    option("lamb_t_factor",            float,       0.1),
+    option("cross_self",               float,       1.0),
+    flag  ("adain_tile_SOT"),
+    option("adain_tile_sort",          int,         4),
+    flag  ("WCT_SVD"),
+    option("adain_tile_sort_dim",      int,         -2),
+    flag  ("adain_mask_sort"),
+    option("adain_tile_SOT_tile_sz",   int,         1),
+    option("adain_tile_SOT_num_proj",  int,         16),
+)
+
+declare_extra_options("hidream.model",
+    option("STYLE_UNCOND",          bool,        False),
+    flag  ("slerp"),
+    flag  ("adain_swap_clip"),
+    flag  ("use_style_neg_as_pos"),
+    flag  ("img_attn_adain"),
+    option("img_attn_adain_weight", float,       0.99),
+)
+
+declare_extra_options("nodes_latents",
+    flag  ("disable_process_latent"),
+    flag  ("disable_mean"),
+    flag  ("disable_masks"),
+    flag  ("enable_std"),
+)
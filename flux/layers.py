@@ -113,6 +113,8 @@ class Modulation(nn.Module):
 
 
 class DoubleStreamBlock(nn.Module):
+    attn_backend = "dense"      # "regional" is set per block by ReFluxPatcher, see flux.math.attention_regional()
+    
     def __init__(self, hidden_size: int, num_heads: int, mlp_ratio: float, qkv_bias: bool = False, dtype=None, device=None, operations=None, idx=-1):
         super().__init__()
 
@@ -193,7 +195,7 @@ class DoubleStreamBlock(nn.Module):
         q, k, v = torch.cat((txt_q, img_q), dim=2), torch.cat((txt_k, img_k), dim=2), torch.cat((txt_v, img_v), dim=2)
 
         #attn = attention(q, k, v, pe=pe, mask=mask, cross_self_mask=None)
-        attn = attention(q, k, v, pe=pe, mask=mask, cross_self_mask=cross_self_mask, sigma=sigma, lamb_t_factor=lamb_t_factor)
+        attn = attention(q, k, v, pe=pe, mask=mask, cross_self_mask=cross_self_mask, sigma=sigma, lamb_t_factor=lamb_t_factor, backend=self.attn_backend)
         
         txt_attn = attn[:, : txt.shape[1]   ]                         # 1, 768,3072
         img_attn = attn[:,   txt.shape[1] : ]  
@@ -278,6 +280,36 @@ class DoubleStreamBlock(nn.Module):
                     #torch.cuda.empty_cache()
                     
         return img, txt
+    
+    def forward_dual_mask(self, img: Tensor, txt: Tensor, vec: Tensor, pe: Tensor, mask, mask_zero, cross_self_mask=None, idx=0, sigma=None, lamb_t_factor=0.1) -> Tuple[Tensor, Tensor]:
+        """
+        Same result as forward() with mask on a copy of img, then forward() with mask_zero on img and the resulting txt. The
+        img side of both passes sees the same input, so its modulation and qkv are computed once and the discarded img update
+        of the first pass (proj + mlp) is skipped. Updates img and txt in place. No update_cross_attn.
+        """
+        img_mod1, img_mod2  = self.img_mod(vec)
+        txt_mod1, txt_mod2  = self.txt_mod(vec)
+        
+        img_q, img_k, img_v = self.img_attn_preproc(img, img_mod1, cross_self_mask=cross_self_mask)
+        
+        for attn_mask, update_img in ((mask, False), (mask_zero, True)):
+            txt_q, txt_k, txt_v = self.txt_attn_preproc(txt, txt_mod1)
+            
+            q, k, v = torch.cat((txt_q, img_q), dim=2), torch.cat((txt_k, img_k), dim=2), torch.cat((txt_v, img_v), dim=2)
+            attn    = attention(q, k, v, pe=pe, mask=attn_mask, cross_self_mask=cross_self_mask, sigma=sigma, lamb_t_factor=lamb_t_factor, backend=self.attn_backend)
+            
+            txt_attn = attn[:, : txt.shape[1]   ]
+            img_attn = attn[:,   txt.shape[1] : ]
+            
+            if update_img:
+                img += img_mod1.gate * self.img_attn.proj(img_attn)
+            txt += txt_mod1.gate * self.txt_attn.proj(txt_attn)
+            
+            if update_img:
+                img += img_mod2.gate * self.img_mlp((1 + img_mod2.scale) * self.img_norm2(img) + img_mod2.shift)
+            txt += txt_mod2.gate * self.txt_mlp((1 + txt_mod2.scale) * self.txt_norm2(txt) + txt_mod2.shift)
+        
+        return img, txt
         
 
 class SingleStreamBlock(nn.Module):      #attn.shape = 1,4608,3072       mlp.shape = 1,4608,12288     4096*3 = 12288
@@ -285,6 +317,8 @@ class SingleStreamBlock(nn.Module):      #attn.shape = 1,4608,3072       mlp.sha
     A DiT block with parallel linear layers as described in
     https://arxiv.org/abs/2302.05442 and adapted modulation interface.
     """
+    attn_backend = "dense"
+    
     def __init__(self, hidden_size: int,  num_heads: int, mlp_ratio: float = 4.0, qk_scale: float = None, dtype=None, device=None, operations=None, idx=-1):
         super().__init__()
         self.idx            = idx
@@ -331,7 +365,7 @@ class SingleStreamBlock(nn.Module):      #attn.shape = 1,4608,3072       mlp.sha
             v *= derp_mask_inv
 
         #attn     = attention(q, k, v, pe=pe, mask=mask, cross_self_mask=None)
-        attn     = attention(q, k, v, pe=pe, mask=mask, cross_self_mask=cross_self_mask, sigma=sigma, lamb_t_factor=0.1)
+        attn     = attention(q, k, v, pe=pe, mask=mask, cross_self_mask=cross_self_mask, sigma=sigma, lamb_t_factor=0.1, backend=self.attn_backend)
         
         return attn, mlp
 
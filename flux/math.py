@@ -1,4 +1,5 @@
 import torch
+import torch.nn.functional as F
 from einops import rearrange
 from torch import Tensor
 from comfy.ldm.modules.attention import attention_pytorch
@@ -6,10 +7,11 @@ from comfy.ldm.modules.attention import attention_pytorch
 import comfy.model_management
 
 import math
+import weakref
 
 USE_LOG_BOOST = False
 
-def attention(q: Tensor, k: Tensor, v: Tensor, pe: Tensor, mask=None, cross_self_mask=None, sigma=None, lamb_t_factor=0.1) -> Tensor:
+def attention(q: Tensor, k: Tensor, v: Tensor, pe: Tensor, mask=None, cross_self_mask=None, sigma=None, lamb_t_factor=0.1, backend="dense") -> Tensor:
     
     #derp_mask = torch.ones_like(q)
     #derp_mask_inv = torch.ones_like(q)
@@ -26,7 +28,10 @@ def attention(q: Tensor, k: Tensor, v: Tensor, pe: Tensor, mask=None, cross_self
     #x = attention_pytorch(q, k, v, heads, skip_reshape=True, mask=mask)
     
     if cross_self_mask is None or cross_self_mask.sum() == 0.0:
-        x = attention_pytorch(q, k, v, heads, skip_reshape=True, mask=mask)
+        if backend == "regional":
+            x = attention_regional(q, k, v, heads, skip_reshape=True, mask=mask)
+        else:
+            x = attention_pytorch(q, k, v, heads, skip_reshape=True, mask=mask)
     else:
         x = attention_rescale(q, k, v, heads, skip_reshape=True, mask=mask, cross_self_mask=cross_self_mask, sigma=sigma, lamb_t_factor=lamb_t_factor)
         
@@ -39,6 +44,69 @@ def attention(q: Tensor, k: Tensor, v: Tensor, pe: Tensor, mask=None, cross_self
     return x
 
 
+REGION_GROUPS_CACHE      = {}    # (id, _version) of a mask -> its query groups, see get_region_groups()
+REGION_GROUPS_CACHE_SIZE = 16
+REGION_GROUPS_MAX        = 64
+
+def get_region_groups(mask, max_groups=REGION_GROUPS_MAX):
+    """
+    Split a bool (L, S) attention mask into groups of query rows that may attend to the same keys, as (query idx, key idx)
+    pairs. Regional masks are unions of text span x region blocks, so there are only a handful. None if the mask isn't
+    bool or has more than max_groups distinct rows. Cached per mask tensor until it is modified in place.
+    """
+    key    = (id(mask), mask._version, max_groups)
+    cached = REGION_GROUPS_CACHE.get(key)
+    if cached is not None and cached[0]() is mask:                       # weakref, so a reused id() can't match a dead mask
+        REGION_GROUPS_CACHE[key] = REGION_GROUPS_CACHE.pop(key)
+        return cached[1]
+    
+    groups = None
+    if mask.dtype == torch.bool and all(n == 1 for n in mask.shape[:-2]):
+        rows, inverse = torch.unique(mask.reshape(mask.shape[-2:]).to(torch.uint8), dim=0, return_inverse=True)
+        if len(rows) <= max_groups:
+            counts = torch.bincount(inverse, minlength=len(rows)).tolist()
+            groups = [(q_idx, row.nonzero().squeeze(-1)) for q_idx, row in zip(inverse.argsort().split(counts), rows)]
+            groups = [(q_idx, k_idx) for q_idx, k_idx in groups if len(k_idx) > 0]    # fully masked rows are left at zero
+    
+    REGION_GROUPS_CACHE.pop(key, None)
+    if len(REGION_GROUPS_CACHE) >= REGION_GROUPS_CACHE_SIZE:
+        REGION_GROUPS_CACHE.pop(next(iter(REGION_GROUPS_CACHE)))
+    REGION_GROUPS_CACHE[key] = (weakref.ref(mask), groups)
+    return groups
+
+
+def attention_regional(q, k, v, heads, mask=None, skip_reshape=False) -> Tensor:
+    """
+    Drop-in for attention_pytorch() that never hands SDPA a mask: query rows are grouped by the keys they may attend to
+    and each group runs unmasked attention against only those keys, so SDPA keeps its flash/memory efficient kernels and
+    no L x L scores are built. Masks that can't be decomposed (float/gradient, too many groups) go to attention_pytorch().
+    """
+    groups = None if mask is None else get_region_groups(mask)
+    if groups is None:
+        return attention_pytorch(q, k, v, heads, skip_reshape=skip_reshape, mask=mask)
+    
+    if skip_reshape:
+        b, _, _, dim_head = q.shape
+    else:
+        b, _, dim_head = q.shape
+        dim_head //= heads
+        q, k, v = map(
+            lambda t: t.view(b, -1, heads, dim_head).transpose(1, 2),
+            (q, k, v),
+        )
+    
+    out = torch.zeros_like(q)
+    for q_idx, k_idx in groups:
+        if len(k_idx) == k.shape[-2]:
+            k_group, v_group = k, v
+        else:
+            k_group, v_group = k[:, :, k_idx], v[:, :, k_idx]
+        out[:, :, q_idx] = F.scaled_dot_product_attention(q[:, :, q_idx], k_group, v_group)
+    
+    return out.transpose(1, 2).reshape(b, -1, heads * dim_head)
+
+
+
 """def attention_rescale(q: Tensor, k: Tensor, v: Tensor, pe: Tensor, mask=None) -> Tensor:
     q, k = apply_rope(q, k, pe)
 
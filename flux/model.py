@@ -28,7 +28,7 @@ import math
 from einops import rearrange, repeat
 import comfy.ldm.common_dit
 
-from ..latents import tile_latent, untile_latent
+from ..latents import tile_latent, untile_latent, adain_patchwise_row_batch, adain_patchwise_row_batch_masked
 
 #from ..latents import interpolate_spd
 
@@ -102,6 +102,7 @@ class ReFlux(Flux):
                         UNCOND : bool = False,
                         SIGMA = None,
                         lamb_t_factor = 0.1,
+                        txt_src : Tensor = None,
                         ) -> Tensor:
         
         if img.ndim != 3 or txt.ndim != 3:
@@ -119,87 +120,77 @@ class ReFlux(Flux):
 
         vec = vec + self.vector_in(y)  #y.shape=1,768  y==all 0s
         
-        txt = self.txt_in(txt)
+        if txt_src is not None:                     # txt comes straight from a RegContext, so its projection is fixed for the run
+            W   = self.txt_in.weight
+            txt = self.get_step_invariant("txt_neg" if UNCOND else "txt", (id(txt_src), txt_src._version, txt.shape, txt.dtype, txt.device, W.data_ptr(), W._version), lambda: self.txt_in(txt), ref=txt_src)
+            txt = txt.clone()                       # the double blocks update txt in place
+        else:
+            txt = self.txt_in(txt)
 
-        ids = torch.cat((txt_ids, img_ids), dim=1) # img_ids.shape=1,8192,3    txt_ids.shape=1,512,3    #ids.shape=1,8704,3
-        pe  = self.pe_embedder(ids)                 # pe.shape 1,1,8704,64,2,2
+        def get_pe():
+            ids = torch.cat((txt_ids, img_ids), dim=1) # img_ids.shape=1,8192,3    txt_ids.shape=1,512,3    #ids.shape=1,8704,3
+            return self.pe_embedder(ids)               # pe.shape 1,1,8704,64,2,2
+        
+        original_shape = transformer_options.get('original_shape')
+        if original_shape is not None:              # txt_ids are zeros and img_ids depend only on the patch grid
+            pe = self.get_step_invariant("pe", (tuple(original_shape[-2:]), txt_ids.shape, img_ids.shape, img_ids.dtype, img_ids.device), get_pe)
+        else:
+            pe = get_pe()
         
         lamb_t_factor = transformer_options.get("regional_conditioning_weight", 0.0)
         
         weight    = -1 * transformer_options.get("regional_conditioning_weight", 0.0)
         floor     = -1 * transformer_options.get("regional_conditioning_floor",  0.0)
         mask_zero = None
+        mask_floor = None
         mask = None
         cross_self_mask = None
         
         text_len = txt.shape[1] 
         
+        AttnMask = None
         if not UNCOND and 'AttnMask' in transformer_options: 
             AttnMask = transformer_options['AttnMask']
-            mask = transformer_options['AttnMask'].attn_mask.mask.to('cuda')
-            cross_self_mask = transformer_options['AttnMask'].cross_self_mask.mask.to('cuda')
-            if mask_zero is None:
-                mask_zero = torch.ones_like(mask)
-                img_len = transformer_options['AttnMask'].img_len
-                mask_zero[:text_len, :] = mask[:text_len, :]
-                mask_zero[:, :text_len] = mask[:, :text_len]
-            if weight == 0:
-                mask = None
-            
         if UNCOND and 'AttnMask_neg' in transformer_options: 
             AttnMask = transformer_options['AttnMask_neg']
-            mask = transformer_options['AttnMask_neg'].attn_mask.mask.to('cuda')
-            cross_self_mask = transformer_options['AttnMask_neg'].cross_self_mask.mask.to('cuda')
-            if mask_zero is None:
-                mask_zero = torch.ones_like(mask)
-                img_len = transformer_options['AttnMask_neg'].img_len
-                mask_zero[:text_len, :] = mask[:text_len, :]
-                mask_zero[:, :text_len] = mask[:, :text_len]
-            if weight == 0:
-                mask = None
-            
         elif UNCOND and 'AttnMask' in transformer_options:
             AttnMask = transformer_options['AttnMask']
-            mask = transformer_options['AttnMask'].attn_mask.mask.to('cuda')
-            cross_self_mask = transformer_options['AttnMask'].cross_self_mask.mask.to('cuda')
-            if mask_zero is None:
-                mask_zero = torch.ones_like(mask)
-                img_len = transformer_options['AttnMask'].img_len
-                mask_zero[:text_len, :] = mask[:text_len, :]
-                mask_zero[:, :text_len] = mask[:, :text_len]
+        
+        if AttnMask is not None:
+            mask            = AttnMask.attn_mask.to_device('cuda')
+            cross_self_mask = AttnMask.cross_self_mask.to_device('cuda')
+            mask, mask_zero, mask_floor = self.get_step_invariant("mask_neg" if UNCOND else "mask", (id(mask), mask._version, text_len, img.dtype), lambda: self.prepare_attn_masks(mask, text_len, img.dtype), ref=mask)
             if weight == 0:
                 mask = None
         
         if not hasattr(self, "cross_self_weight"):
             self.cross_self_weight = 1.0
-
-        if mask is not None and not type(mask[0][0].item()) == bool:
-            mask = mask.to(img.dtype)
-        if mask_zero is not None and not type(mask_zero[0][0].item()) == bool:
-            mask_zero = mask_zero.to(img.dtype)
+        if cross_self_mask is not None and self.cross_self_weight != 1.0 and AttnMask is transformer_options.get('AttnMask'):
+            cross_self_mask = cross_self_mask * self.cross_self_weight     # scaled per call, the resident device copy stays as generated
 
         total_layers = len(self.double_blocks) + len(self.single_blocks)
         
+        dual_mask_fused = update_cross_attn is None or update_cross_attn['skip_cross_attn']    # forward_dual_mask() does not update cross attn weights
+        
         ca_idx = 0
         for i, block in enumerate(self.double_blocks):
 
             if   weight > 0 and mask is not None and     weight  <=      i/total_layers:
                 img, txt = block(img=img, txt=txt, vec=vec, pe=pe, mask=mask_zero, cross_self_mask=cross_self_mask, idx=i, update_cross_attn=update_cross_attn, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
                 
+            elif (weight < 0 and mask is not None and abs(weight) <= (1 - i/total_layers)) and dual_mask_fused:
+                img, txt = block.forward_dual_mask(img=img, txt=txt, vec=vec, pe=pe, mask=mask, mask_zero=mask_zero, cross_self_mask=cross_self_mask, idx=i, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
+                
             elif (weight < 0 and mask is not None and abs(weight) <= (1 - i/total_layers)):
                 img_tmpZ, txt_tmpZ = img.clone(), txt.clone()
                 img_tmpZ, txt = block(img=img_tmpZ, txt=txt_tmpZ, vec=vec, pe=pe, mask=mask, cross_self_mask=cross_self_mask, idx=i, update_cross_attn=update_cross_attn, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
                 img, txt_tmpZ = block(img=img     , txt=txt     , vec=vec, pe=pe, mask=mask_zero, cross_self_mask=cross_self_mask, idx=i, update_cross_attn=update_cross_attn, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
                 
             elif floor > 0 and mask is not None and     floor  >=      i/total_layers:
-                mask_tmp = mask.clone()
-                mask_tmp[text_len:, text_len:] = 1.0
-                img, txt = block(img=img, txt=txt, vec=vec, pe=pe, mask=mask_tmp, cross_self_mask=cross_self_mask, idx=i, update_cross_attn=update_cross_attn, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
+                img, txt = block(img=img, txt=txt, vec=vec, pe=pe, mask=mask_floor, cross_self_mask=cross_self_mask, idx=i, update_cross_attn=update_cross_attn, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
                 
             elif floor < 0 and mask is not None and abs(floor) >= (1 - i/total_layers):
-                mask_tmp = mask.clone()
-                mask_tmp[text_len:, text_len:] = 1.0
-                img, txt = block(img=img, txt=txt, vec=vec, pe=pe, mask=mask_tmp, cross_self_mask=cross_self_mask, idx=i, update_cross_attn=update_cross_attn, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
+                img, txt = block(img=img, txt=txt, vec=vec, pe=pe, mask=mask_floor, cross_self_mask=cross_self_mask, idx=i, update_cross_attn=update_cross_attn, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
 
             else:
                 img, txt = block(img=img, txt=txt, vec=vec, pe=pe, mask=mask, cross_self_mask=cross_self_mask, idx=i, update_cross_attn=update_cross_attn, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
@@ -230,14 +221,10 @@ class ReFlux(Flux):
                 img = block(img, vec=vec, pe=pe, mask=mask_zero, cross_self_mask=cross_self_mask, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
                 
             elif floor > 0 and mask is not None and     floor  >=      (i+len(self.double_blocks))/total_layers:
-                mask_tmp = mask.clone()
-                mask_tmp[text_len:, text_len:] = 1.0
-                img = block(img, vec=vec, pe=pe, mask=mask_tmp, cross_self_mask=cross_self_mask, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
+                img = block(img, vec=vec, pe=pe, mask=mask_floor, cross_self_mask=cross_self_mask, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
                 
             elif floor < 0 and mask is not None and abs(floor) >= (1 - (i+len(self.double_blocks))/total_layers):
-                mask_tmp = mask.clone()
-                mask_tmp[text_len:, text_len:] = 1.0
-                img = block(img, vec=vec, pe=pe, mask=mask_tmp, cross_self_mask=cross_self_mask, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
+                img = block(img, vec=vec, pe=pe, mask=mask_floor, cross_self_mask=cross_self_mask, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
                 
             else:
                 img = block(img, vec=vec, pe=pe, mask=mask, cross_self_mask=cross_self_mask, sigma=SIGMA, lamb_t_factor=lamb_t_factor)
@@ -275,6 +262,74 @@ class ReFlux(Flux):
         img_ids[..., 2] += torch.linspace(w_start, w_end - 1, steps=w_len, device=x.device, dtype=x.dtype)[None, :]
         img_ids          = repeat(img_ids, "h w c -> b (h w) c", b=bs)
         return img_ids
+    
+    def get_step_invariant(self, name, key, fn, ref=None):
+        """
+        Per-run cache for tensors that stay fixed across steps (RoPE, regional text projection, prepared masks). One entry
+        per name, recomputed whenever its key changes, e.g. on a new resolution, context or mask.
+        """
+        if not hasattr(self, "step_invariant_cache"):
+            self.step_invariant_cache = {}
+        cached = self.step_invariant_cache.get(name)
+        if cached is None or cached[0] != key:
+            cached = (key, fn(), ref)                                                # ref keeps any id() in key valid
+            self.step_invariant_cache[name] = cached
+        return cached[1]
+    
+    @staticmethod
+    def prepare_attn_masks(mask, text_len, dtype):
+        """mask, mask_zero (text rows/cols only) and mask_floor (img->img fully open) for the block loops."""
+        mask_zero = torch.ones_like(mask)
+        mask_zero[:text_len, :] = mask[:text_len, :]
+        mask_zero[:, :text_len] = mask[:, :text_len]
+        mask_floor = mask.clone()
+        mask_floor[text_len:, text_len:] = 1.0
+        if mask.dtype != torch.bool:                                                 # dtype check instead of mask[0][0].item(), no device sync
+            mask, mask_zero, mask_floor = mask.to(dtype), mask_zero.to(dtype), mask_floor.to(dtype)
+        return mask, mask_zero, mask_floor
+    
+    def get_style_reference(self, slot, y0_style, dtype, h_len, w_len, mask=None, mask_edge=None, sort_regions=False):
+        """
+        img_in embedding of a style guide and, for scattersort, the flattened region indices with the reference sorted within
+        each region. Cached per slot ("pos"/"neg") until the guide, masks, patch geometry or img_in weights change, so each
+        step only has to embed and sort the denoised side.
+        """
+        W = self.img_in.weight
+        key = (dtype, h_len, w_len, sort_regions, W.data_ptr(), W._version) + tuple((id(t), t._version) if t is not None else None for t in (y0_style, mask, mask_edge))
+        
+        if not hasattr(self, "style_ref_cache"):
+            self.style_ref_cache = {}
+        cached = self.style_ref_cache.get(slot)
+        if cached is not None and cached['key'] == key:
+            return cached
+        
+        img_y0_adain = comfy.ldm.common_dit.pad_to_patch_size(y0_style.to(dtype), (self.patch_size, self.patch_size))
+        img_y0_adain = rearrange(img_y0_adain, "b c (h ph) (w pw) -> b (h w) (c ph pw)", ph=self.patch_size, pw=self.patch_size)
+        
+        W = self.img_in.weight.data.to(dtype)
+        b = self.img_in.bias.data.to(dtype)
+        y0_adain_embed = F.linear(img_y0_adain.to(W), W, b).to(img_y0_adain)
+        
+        regions = []
+        if sort_regions:
+            if mask is not None:
+                mask     = mask.unsqueeze(1) if mask.ndim == 3 else mask
+                flatmask = F.interpolate(mask, size=(h_len, w_len)).bool().flatten().to(y0_adain_embed.device)
+            else:
+                flatmask = torch.ones(h_len * w_len, dtype=torch.bool, device=y0_adain_embed.device)
+            region_masks = [flatmask, ~flatmask]
+            
+            if mask_edge is not None:
+                edgemask     = F.interpolate(mask_edge.unsqueeze(0), size=(h_len, w_len)).bool().flatten().to(y0_adain_embed.device)
+                region_masks = [region_mask & ~edgemask for region_mask in region_masks] + [edgemask]
+            
+            for region_mask in region_masks:
+                region_idx = region_mask.nonzero().squeeze(1)                  # index tensors on the device, no host sync when applied
+                regions.append((region_idx, y0_adain_embed[:, region_idx, :].sort(dim=-2).values))
+        
+        cached = {'key': key, 'refs': (y0_style, mask, mask_edge), 'embed': y0_adain_embed, 'regions': regions}    # refs keep the ids in key valid
+        self.style_ref_cache[slot] = cached
+        return cached
 
     def forward(self,
                 x,
@@ -338,37 +393,37 @@ class ReFlux(Flux):
             img = rearrange(img, "b c (h ph) (w pw) -> b (h w) (c ph pw)", ph=patch_size, pw=patch_size) # img 1,9216,64     1,16,128,128 -> 1,4096,64
 
             
-            if EO("cross_self"):
-                AttnMask = transformer_options.get('AttnMask')
-                if AttnMask is not None:
-                    AttnMask.cross_self_mask.mask *= EO("cross_self", 1.0)
+            self.cross_self_weight = EO("cross_self", 1.0) if EO("cross_self") else 1.0
             
             
             context_tmp = None
+            txt_src     = None                      # stable source of context_tmp, lets forward_blocks reuse its txt_in projection
             
             if not UNCOND and 'AttnMask' in transformer_options: # and weight != 0:
                 AttnMask = transformer_options['AttnMask']
-                mask = transformer_options['AttnMask'].attn_mask.mask.to('cuda')
+                mask = transformer_options['AttnMask'].attn_mask.to_device('cuda')
 
                 if weight == 0:
                     context_tmp = transformer_options['RegContext'].context.to(context.dtype).to(context.device)
                     mask = None
                 else:
                     context_tmp = transformer_options['RegContext'].context.to(context.dtype).to(context.device)
+                txt_src = transformer_options['RegContext'].context
                 
             if UNCOND and 'AttnMask_neg' in transformer_options: # and weight != 0:
                 AttnMask = transformer_options['AttnMask_neg']
-                mask = transformer_options['AttnMask_neg'].attn_mask.mask.to('cuda')
+                mask = transformer_options['AttnMask_neg'].attn_mask.to_device('cuda')
 
                 if weight == 0:
                     context_tmp = transformer_options['RegContext_neg'].context.to(context.dtype).to(context.device)
                     mask = None
                 else:
                     context_tmp = transformer_options['RegContext_neg'].context.to(context.dtype).to(context.device)
+                txt_src = transformer_options['RegContext_neg'].context
 
             elif UNCOND and 'AttnMask' in transformer_options:
                 AttnMask = transformer_options['AttnMask']
-                mask = transformer_options['AttnMask'].attn_mask.mask.to('cuda')
+                mask = transformer_options['AttnMask'].attn_mask.to_device('cuda')
                 A       = context
                 B       = transformer_options['RegContext'].context
                 context_tmp = A.repeat(1,    (B.shape[1] // A.shape[1]) + 1, 1)[:,   :B.shape[1], :]
@@ -397,6 +452,7 @@ class ReFlux(Flux):
                                         UNCOND=UNCOND,
                                         SIGMA=SIGMA,
                                         lamb_t_factor=lamb_t_factor,
+                                        txt_src=txt_src,
                                         )  # context 1,256,4096   y 1,768
             out_list.append(out_tmp)
             
@@ -430,7 +486,6 @@ class ReFlux(Flux):
                 mask_flat = mask_down.view(-1)  # shape: (4096,)
                 mask_flat = mask_flat > 0.5     # boolify
             
-            y0_style_pos = y0_style_pos.to(dtype)
             x   = x.to(dtype)
             eps = eps.to(dtype)
             eps_orig = eps.clone()
@@ -444,54 +499,19 @@ class ReFlux(Flux):
             w_len = ((w + (patch_size // 2)) // patch_size) # w_len 96
             img = rearrange(img, "b c (h ph) (w pw) -> b (h w) (c ph pw)", ph=patch_size, pw=patch_size) # img 1,9216,64     1,16,128,128 -> 1,4096,64
 
-            img_y0_adain = comfy.ldm.common_dit.pad_to_patch_size(y0_style_pos, (self.patch_size, self.patch_size))
-
-            h_len = ((h + (patch_size // 2)) // patch_size) # h_len 96
-            w_len = ((w + (patch_size // 2)) // patch_size) # w_len 96
-            img_y0_adain = rearrange(img_y0_adain, "b c (h ph) (w pw) -> b (h w) (c ph pw)", ph=patch_size, pw=patch_size) # img 1,9216,64     1,16,128,128 -> 1,4096,64
-
             W = self.img_in.weight.data.to(dtype)   # shape [2560, 64]
             b = self.img_in.bias.data.to(dtype)     # shape [2560]
             
+            SCATTERSORT = transformer_options['y0_style_method'] == "scattersort"
+            style_ref   = self.get_style_reference("pos", y0_style_pos, dtype, h_len, w_len, transformer_options.get("y0_style_pos_mask"), y0_style_pos_mask_edge, sort_regions=SCATTERSORT)
+            
             denoised_embed = F.linear(img         .to(W), W, b).to(img)
-            y0_adain_embed = F.linear(img_y0_adain.to(W), W, b).to(img_y0_adain)
+            y0_adain_embed = style_ref['embed']
             
-            if transformer_options['y0_style_method'] == "scattersort":
-                flatmask = F.interpolate(y0_style_pos_mask, size=(h_len, w_len)).bool().flatten().cpu()
-                flatunmask = ~flatmask
-                
-                if y0_style_pos_mask_edge is not None:
-                    edgemask = F.interpolate(y0_style_pos_mask_edge.unsqueeze(0), size=(h_len, w_len)).bool().flatten()
-                    denoised_embed_orig = denoised_embed.clone()
-                    flatmask   = flatmask   & (~edgemask)
-                    flatunmask = flatunmask & (~edgemask)
-                
-                denoised_masked = denoised_embed[:, flatmask, :].clone()
-                y0_adain_masked = y0_adain_embed[:, flatmask, :].clone()
-                
-                src_sorted, src_idx = denoised_masked.sort(dim=-2)
-                ref_sorted, ref_idx = y0_adain_masked.sort(dim=-2)
-                
-                denoised_embed[:, flatmask, :] = src_sorted.scatter(dim=-2, index=src_idx, src=ref_sorted)
-                
-                denoised_unmasked = denoised_embed[:, flatunmask, :].clone()
-                y0_adain_unmasked = y0_adain_embed[:, flatunmask, :].clone()
-                
-                src_sorted, src_idx = denoised_unmasked.sort(dim=-2)
-                ref_sorted, ref_idx = y0_adain_unmasked.sort(dim=-2)
-                
-                denoised_embed[:, flatunmask, :] = src_sorted.scatter(dim=-2, index=src_idx, src=ref_sorted)
-                
-                if y0_style_pos_mask_edge is not None:
-                    #denoised_embed[:, edgemask, :] = denoised_embed_orig[:, edgemask, :]
-                    
-                    denoised_edgemasked = denoised_embed[:, edgemask, :].clone()
-                    y0_adain_edgemasked = y0_adain_embed[:, edgemask, :].clone()
-                    
-                    src_sorted, src_idx = denoised_edgemasked.sort(dim=-2)
-                    ref_sorted, ref_idx = y0_adain_edgemasked.sort(dim=-2)
-                    
-                    denoised_embed[:, edgemask, :] = src_sorted.scatter(dim=-2, index=src_idx, src=ref_sorted)
+            if SCATTERSORT:
+                for region_idx, ref_sorted in style_ref['regions']:                # masked, unmasked, edge: disjoint, only the denoised side is sorted per step
+                    src_sorted, src_idx = denoised_embed[:, region_idx, :].sort(dim=-2)
+                    denoised_embed[:, region_idx, :] = src_sorted.scatter(dim=-2, index=src_idx, src=ref_sorted)
                 
 
 
@@ -662,7 +682,7 @@ class ReFlux(Flux):
                     denoised_embed = adain_seq_inplace(denoised_embed, y0_adain_embed)
                     
             elif transformer_options['y0_style_method'] == "WCT":
-                if self.y0_adain_embed is None or self.y0_adain_embed.shape != y0_adain_embed.shape or torch.norm(self.y0_adain_embed - y0_adain_embed) > 0:
+                if self.y0_adain_embed is not y0_adain_embed and (self.y0_adain_embed is None or self.y0_adain_embed.shape != y0_adain_embed.shape or torch.norm(self.y0_adain_embed - y0_adain_embed) > 0):
                     self.y0_adain_embed = y0_adain_embed
                     
                     f_s          = y0_adain_embed[0].clone()
@@ -826,7 +846,6 @@ class ReFlux(Flux):
             y0_style_neg_synweight *= y0_style_neg_weight
             y0_style_neg_mask = transformer_options.get("y0_style_neg_mask")
             
-            y0_style_neg = y0_style_neg.to(dtype)
             x   = x.to(dtype)
             eps = eps.to(dtype)
             eps_orig = eps.clone()
@@ -840,15 +859,11 @@ class ReFlux(Flux):
             w_len = ((w + (patch_size // 2)) // patch_size) # w_len 96
             img = rearrange(img, "b c (h ph) (w pw) -> b (h w) (c ph pw)", ph=patch_size, pw=patch_size) # img 1,9216,64     1,16,128,128 -> 1,4096,64
             
-            img_y0_adain = comfy.ldm.common_dit.pad_to_patch_size(y0_style_neg, (self.patch_size, self.patch_size))
-
-            img_y0_adain = rearrange(img_y0_adain, "b c (h ph) (w pw) -> b (h w) (c ph pw)", ph=patch_size, pw=patch_size) # img 1,9216,64     1,16,128,128 -> 1,4096,64
-
             W = self.img_in.weight.data.to(dtype)   # shape [2560, 64]
             b = self.img_in.bias.data.to(dtype)     # shape [2560]
             
             denoised_embed = F.linear(img         .to(W), W, b).to(img)
-            y0_adain_embed = F.linear(img_y0_adain.to(W), W, b).to(img_y0_adain)
+            y0_adain_embed = self.get_style_reference("neg", y0_style_neg, dtype, h_len, w_len)['embed']
             
             if transformer_options['y0_style_method'] == "AdaIN":
                 denoised_embed = adain_seq_inplace(denoised_embed, y0_adain_embed)
@@ -859,7 +874,7 @@ class ReFlux(Flux):
                     denoised_embed = adain_seq_inplace(denoised_embed, y0_adain_embed)
                     
             elif transformer_options['y0_style_method'] == "WCT":
-                if self.y0_adain_embed is None or self.y0_adain_embed.shape != y0_adain_embed.shape or torch.norm(self.y0_adain_embed - y0_adain_embed) > 0:
+                if self.y0_adain_embed is not y0_adain_embed and (self.y0_adain_embed is None or self.y0_adain_embed.shape != y0_adain_embed.shape or torch.norm(self.y0_adain_embed - y0_adain_embed) > 0):
                     self.y0_adain_embed = y0_adain_embed
                     
                     f_s          = y0_adain_embed[0].clone()
@@ -1077,65 +1092,14 @@ def adain_patchwise(content: torch.Tensor, style: torch.Tensor, sigma: float = 1
 
 
 
-def adain_patchwise_row_batch(content: torch.Tensor, style: torch.Tensor, sigma: float = 1.0, kernel_size: int = None, eps: float = 1e-5) -> torch.Tensor:
-
-    B, C, H, W = content.shape
-    device, dtype = content.device, content.dtype
-
-    if kernel_size is None:
-        kernel_size = int(2 * math.ceil(3 * sigma) + 1)
-    if kernel_size % 2 == 0:
-        kernel_size += 1
-
-    pad = kernel_size // 2
-    coords = torch.arange(kernel_size, dtype=torch.float64, device=device) - pad
-    gauss = torch.exp(-0.5 * (coords / sigma) ** 2)
-    gauss = (gauss / gauss.sum()).to(dtype)
-    kernel_2d = (gauss[:, None] * gauss[None, :])
-
-    weight = kernel_2d.view(1, 1, kernel_size, kernel_size)
-
-    content_padded = F.pad(content, (pad, pad, pad, pad), mode='reflect')
-    style_padded = F.pad(style, (pad, pad, pad, pad), mode='reflect')
-    result = torch.zeros_like(content)
-
-    for i in range(H):
-        c_row_patches = torch.stack([
-            content_padded[:, :, i:i+kernel_size, j:j+kernel_size]
-            for j in range(W)
-        ], dim=0)  # [W, B, C, k, k]
-
-        s_row_patches = torch.stack([
-            style_padded[:, :, i:i+kernel_size, j:j+kernel_size]
-            for j in range(W)
-        ], dim=0)
-
-        w = weight.expand_as(c_row_patches[0])
-
-        c_mean = (c_row_patches * w).sum(dim=(-1, -2), keepdim=True)
-        c_std  = ((c_row_patches - c_mean) ** 2 * w).sum(dim=(-1, -2), keepdim=True).sqrt() + eps
-        s_mean = (s_row_patches * w).sum(dim=(-1, -2), keepdim=True)
-        s_std  = ((s_row_patches - s_mean) ** 2 * w).sum(dim=(-1, -2), keepdim=True).sqrt() + eps
-
-        center = kernel_size // 2
-        central = c_row_patches[:, :, :, center:center+1, center:center+1]
-        normed = (central - c_mean) / c_std
-        stylized = normed * s_std + s_mean
-
-        result[:, :, i, :] = stylized.squeeze(-1).squeeze(-1).permute(1, 2, 0)  # [B,C,W]
-
-    return result
-
-
-
-
-
-
-
 def adain_patchwise_row_batch_medblur(content: torch.Tensor, style: torch.Tensor, sigma: float = 1.0, kernel_size: int = None, eps: float = 1e-5, mask: torch.Tensor = None, use_median_blur: bool = False) -> torch.Tensor:
     B, C, H, W = content.shape
     device, dtype = content.device, content.dtype
 
+    if not use_median_blur:
+        mask = content.new_ones((1, 1, H, W)) if mask is None else mask
+        return adain_patchwise_row_batch_masked(content, style, mask, sigma=sigma, kernel_size=kernel_size, eps=eps)
+
     if kernel_size is None:
         kernel_size = int(2 * math.ceil(3 * abs(sigma)) + 1)
     if kernel_size % 2 == 0:
@@ -1148,7 +1112,6 @@ def adain_patchwise_row_batch_medblur(content: torch.Tensor, style: torch.Tensor
     result = torch.zeros_like(content)
 
     scaling = torch.ones((B, 1, H, W), device=device, dtype=dtype)
-    sigma_scale = torch.ones((H, W), device=device, dtype=torch.float32)
     if mask is not None:
         with torch.no_grad():
             padded_mask = F.pad(mask.float(), (pad, pad, pad, pad), mode="reflect")
@@ -1156,19 +1119,6 @@ def adain_patchwise_row_batch_medblur(content: torch.Tensor, style: torch.Tensor
             blurred_mask = blurred_mask[..., pad:-pad, pad:-pad]
             edge_proximity = blurred_mask * (1.0 - blurred_mask)
             scaling = 1.0 - (edge_proximity / 0.25).clamp(0.0, 1.0)
-            sigma_scale = scaling[0, 0]  # assuming single-channel mask broadcasted across B, C
-
-    if not use_median_blur:
-        coords = torch.arange(kernel_size, dtype=torch.float64, device=device) - pad
-        base_gauss = torch.exp(-0.5 * (coords / sigma) ** 2)
-        base_gauss = (base_gauss / base_gauss.sum()).to(dtype)
-        gaussian_table = {}
-        for s in sigma_scale.unique():
-            sig = float((sigma * s + eps).clamp(min=1e-3))
-            gauss_local = torch.exp(-0.5 * (coords / sig) ** 2)
-            gauss_local = (gauss_local / gauss_local.sum()).to(dtype)
-            kernel_2d = gauss_local[:, None] * gauss_local[None, :]
-            gaussian_table[s.item()] = kernel_2d
 
     for i in range(H):
         row_result = torch.zeros(B, C, W, dtype=dtype, device=device)
@@ -1176,34 +1126,20 @@ def adain_patchwise_row_batch_medblur(content: torch.Tensor, style: torch.Tensor
             c_patch = content_padded[:, :, i:i+kernel_size, j:j+kernel_size]
             s_patch = style_padded[:, :, i:i+kernel_size, j:j+kernel_size]
 
-            if use_median_blur:
-                c_flat = c_patch.reshape(B, C, -1)
-                s_flat = s_patch.reshape(B, C, -1)
-
-                c_median = c_flat.median(dim=-1, keepdim=True).values
-                s_median = s_flat.median(dim=-1, keepdim=True).values
+            c_flat = c_patch.reshape(B, C, -1)
+            s_flat = s_patch.reshape(B, C, -1)
 
-                c_std = (c_flat - c_median).abs().mean(dim=-1, keepdim=True) + eps
-                s_std = (s_flat - s_median).abs().mean(dim=-1, keepdim=True) + eps
+            c_median = c_flat.median(dim=-1, keepdim=True).values
+            s_median = s_flat.median(dim=-1, keepdim=True).values
 
-                center = kernel_size // 2
-                central = c_patch[:, :, center, center].unsqueeze(-1)
+            c_std = (c_flat - c_median).abs().mean(dim=-1, keepdim=True) + eps
+            s_std = (s_flat - s_median).abs().mean(dim=-1, keepdim=True) + eps
 
-                normed = (central - c_median) / c_std
-                stylized = normed * s_std + s_median
-            else:
-                k = gaussian_table[float(sigma_scale[i, j].item())]
-                local_weight = k.view(1, 1, kernel_size, kernel_size).expand(B, C, kernel_size, kernel_size)
+            center = kernel_size // 2
+            central = c_patch[:, :, center, center].unsqueeze(-1)
 
-                c_mean = (c_patch * local_weight).sum(dim=(-1, -2), keepdim=True)
-                c_std = ((c_patch - c_mean) ** 2 * local_weight).sum(dim=(-1, -2), keepdim=True).sqrt() + eps
-                s_mean = (s_patch * local_weight).sum(dim=(-1, -2), keepdim=True)
-                s_std = ((s_patch - s_mean) ** 2 * local_weight).sum(dim=(-1, -2), keepdim=True).sqrt() + eps
-
-                center = kernel_size // 2
-                central = c_patch[:, :, center:center+1, center:center+1]
-                normed = (central - c_mean) / c_std
-                stylized = normed * s_std + s_mean
+            normed = (central - c_median) / c_std
+            stylized = normed * s_std + s_median
 
             local_scaling = scaling[:, :, i, j].view(B, 1, 1, 1)
             stylized = central * (1 - local_scaling) + stylized * local_scaling
@@ -5,20 +5,61 @@ from typing import Optional, Callable, Tuple, Dict, Any, Union, TYPE_CHECKING, T
 import re
 import functools
 import copy
+from collections import namedtuple
+from typing      import get_origin, get_args
 
 from comfy.samplers import SCHEDULER_NAMES
 
 from .res4lyf import RESplain
+from .extra_options_schema import EXTRA_OPTIONS_SCHEMA
 
 
 
 
 # EXTRA_OPTIONS OPS
 
+EXTRA_OPTIONS_VALUE_PATTERN      = re.compile(r"[a-zA-Z0-9_.+-]+")
+EXTRA_OPTIONS_LIST_VALUE_PATTERN = re.compile(r"[a-zA-Z0-9_.,+-]+")
+
+def parse_extra_options(extra_options:str) -> Tuple[set, Dict[str,str], Dict[str,str]]:
+    """Index an extra_options string once: flags, scalar values and list values, first occurrence wins."""
+    flags, values, list_values = set(), {}, {}
+    
+    for line in (extra_options or "").split("\n"):
+        flags.add(line.rstrip())
+        
+        if "=" not in line:
+            continue
+        key, _, value = line.partition("=")
+        flags.add(key)                                                  # "option=" sets the flag, "option =" does not
+        
+        key   = key.rstrip()
+        value = value.strip()
+        if key not in values      and EXTRA_OPTIONS_VALUE_PATTERN     .fullmatch(value):
+            values[key] = value
+        if key not in list_values and EXTRA_OPTIONS_LIST_VALUE_PATTERN.fullmatch(value):
+            list_values[key] = value
+    
+    return flags, values, list_values
+
+
+
 class ExtraOptions():
     def __init__(self, extra_options):
         self.extra_options = extra_options
         self.mute          = False
+        self.lookups       = 0
+    
+    @property
+    def extra_options(self):
+        return self._extra_options
+    
+    @extra_options.setter
+    def extra_options(self, extra_options):
+        self._extra_options = extra_options
+        self._flags, self._values, self._list_values = parse_extra_options(extra_options)
+        self._cache    = {}
+        self._compiled = None
         
     def __call__(self, option, default=None, ret_type=None, match_all_flags=False):
         if isinstance(option, (tuple, list)):
@@ -26,53 +67,84 @@ class ExtraOptions():
                 return all(self(single_option, default, ret_type) for single_option in option)
             else:
                 return any(self(single_option, default, ret_type) for single_option in option)
+        
+        self.lookups += 1
 
         if default is None: # get flag
-            pattern = rf"^(?:{re.escape(option)}\s*$|{re.escape(option)}=)"
-            return bool(re.search(pattern, self.extra_options, flags=re.MULTILINE))
+            return option in self._flags
         elif ret_type is None:
             ret_type = type(default)
+            cache_key = (option, ret_type)
         
             if ret_type.__module__ != "builtins":
                 mod = __import__(default.__module__)
                 ret_type = lambda v: getattr(mod, v, None)
+        else:
+            cache_key = (option, ret_type)
         
         if ret_type == list:
-            pattern = rf"^{re.escape(option)}\s*=\s*([a-zA-Z0-9_.,+-]+)\s*$"
-            match   = re.search(pattern, self.extra_options, flags=re.MULTILINE)
+            if option not in self._list_values:
+                if type(default) == str:
+                    return default.split(',')
+                return default
             
-            if match:
-                value = match.group(1)
-                if not self.mute:
-                    RESplain("Set extra_option: ", option, "=", value)
+            if len(default) == 0:
+                elem_type = str
             else:
-                value = default
-                
-            if type(value) == str: 
-                value = value.split(',')
+                elem_type = default[0] if type(default[0]) == type else type(default[0])
             
-                if type(default[0]) == type:
-                    ret_type = default[0]
-                else:
-                    ret_type = type(default[0])
-                
-                value = [ret_type(value[_]) for _ in range(len(value))]
-        
-        else:
-            pattern = rf"^{re.escape(option)}\s*=\s*([a-zA-Z0-9_.+-]+)\s*$"
-            match = re.search(pattern, self.extra_options, flags=re.MULTILINE)
-            if match:
-                if ret_type == bool:
-                    value_str = match.group(1).lower()
-                    value = value_str in ("true", "1", "yes", "on")
-                else:
-                    value = ret_type(match.group(1))
+            cache_key = (option, list, elem_type)
+            if cache_key not in self._cache:
+                value = self._list_values[option]
                 if not self.mute:
                     RESplain("Set extra_option: ", option, "=", value)
+                self._cache[cache_key] = [elem_type(v) for v in value.split(',')]
+            return list(self._cache[cache_key])
+        
+        if option not in self._values:
+            return default
+        
+        if cache_key not in self._cache:
+            if ret_type == bool:
+                value = self._values[option].lower() in ("true", "1", "yes", "on")
             else:
-                value = default
+                value = ret_type(self._values[option])
+            if not self.mute:
+                RESplain("Set extra_option: ", option, "=", value)
+            self._cache[cache_key] = value
+        return self._cache[cache_key]
+    
+    def compile(self) -> "CompiledExtraOptions":
+        """Resolve every declared option once. Hot paths read the result as attributes instead of calling EO()."""
+        if self._compiled is None:
+            self._compiled = compile_extra_options(self)
+        return self._compiled
+    
+    def unknown_options(self) -> List[str]:
+        """Option names in the string that no module declares, most likely typos."""
+        keys = (line.partition("=")[0].strip() for line in (self.extra_options or "").split("\n"))
+        return list(dict.fromkeys(key for key in keys if key and key not in EXTRA_OPTIONS_SCHEMA))
+
+
+
+CompiledExtraOptions = namedtuple("CompiledExtraOptions", [*EXTRA_OPTIONS_SCHEMA, "given"])     # given: every name present in the string, for valued options also tested as flags
+
+def compile_extra_options(EO:ExtraOptions) -> CompiledExtraOptions:
+    values = []
+    for opt in EXTRA_OPTIONS_SCHEMA.values():
+        if opt.type is None:
+            value = opt.name in EO._flags
+        elif opt.name not in EO._values and opt.name not in EO._list_values:
+            value = opt.default                                                     # unset options cost nothing
+        elif get_origin(opt.type) is list:
+            value = EO(opt.name, list(get_args(opt.type)))                          # a type as first list element is the element type
+        elif opt.default is None:
+            value = EO(opt.name, opt.type(), ret_type=opt.type)
+        else:
+            value = EO(opt.name, opt.default)
         
-        return value
+        values.append(tuple(value) if isinstance(value, list) else value)
+    return CompiledExtraOptions(*values, frozenset(EO._flags))
 
 
 
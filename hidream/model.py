@@ -22,7 +22,8 @@ import comfy.model_management
 import comfy.ldm.common_dit
 
 from ..helper  import ExtraOptions
-from ..latents import slerp_tensor, interpolate_spd
+from ..latents import slerp_tensor, interpolate_spd, adain_patchwise_row_batch, adain_patchwise_row_batch_masked
+from ..flux.math import attention_regional
 
 @dataclass
 class ModulationOut:
@@ -209,9 +210,17 @@ class MOEFeedForwardSwiGLU(nn.Module):
 
 
 
-def attention(q: Tensor, k: Tensor, v: Tensor, rope: Tensor, mask: Optional[Tensor] = None):
+def attention(q: Tensor, k: Tensor, v: Tensor, rope: Tensor, mask: Optional[Tensor] = None, backend: str = "dense"):
     q, k = apply_rope(q, k, rope)
-    if mask is not None:
+    if mask is not None and backend == "regional":
+        return attention_regional(
+            q.view(q.shape[0], -1, q.shape[-1] * q.shape[-2]), 
+            k.view(k.shape[0], -1, k.shape[-1] * k.shape[-2]), 
+            v.view(v.shape[0], -1, v.shape[-1] * v.shape[-2]), 
+            q.shape[2],
+            mask=mask,
+            )
+    elif mask is not None:
         return attention_pytorch(
             q.view(q.shape[0], -1, q.shape[-1] * q.shape[-2]), 
             k.view(k.shape[0], -1, k.shape[-1] * k.shape[-2]), 
@@ -229,6 +238,8 @@ def attention(q: Tensor, k: Tensor, v: Tensor, rope: Tensor, mask: Optional[Tens
             )
 
 class HDAttention(nn.Module):
+    attn_backend = "dense"      # "regional" is set per block by ReHiDreamPatcher
+    
     def __init__(
         self,
         query_dim        : int,
@@ -331,7 +342,7 @@ class HDAttention(nn.Module):
 
 
         if self.single:
-            attn = attention(img_q, img_k, img_v, rope=rope, mask=mask)
+            attn = attention(img_q, img_k, img_v, rope=rope, mask=mask, backend=self.attn_backend)
             return self.to_out(attn)
         else:
             
@@ -383,7 +394,7 @@ class HDAttention(nn.Module):
             
             attn    = attention(torch.cat([img_q, txt_q], dim=1), 
                                 torch.cat([img_k, txt_k], dim=1), 
-                                torch.cat([img_v, txt_v], dim=1), rope=rope, mask=mask)
+                                torch.cat([img_v, txt_v], dim=1), rope=rope, mask=mask, backend=self.attn_backend)
             
             img_attn, txt_attn = torch.split(attn, [img_len, txt_len], dim=1)   #1, 4480, 2560
             
@@ -765,7 +776,7 @@ class HDModel(nn.Module):
             mask = None
             if not UNCOND and 'AttnMask' in transformer_options: # and weight != 0:
                 AttnMask = transformer_options['AttnMask']
-                mask = transformer_options['AttnMask'].attn_mask.mask.to('cuda')
+                mask = transformer_options['AttnMask'].attn_mask.to_device('cuda')
                 if mask_zero is None:
                     mask_zero = torch.ones_like(mask)
                     img_len = transformer_options['AttnMask'].img_len
@@ -784,7 +795,7 @@ class HDModel(nn.Module):
 
             if UNCOND and 'AttnMask_neg' in transformer_options: # and weight != 0:
                 AttnMask = transformer_options['AttnMask_neg']
-                mask = transformer_options['AttnMask_neg'].attn_mask.mask.to('cuda')
+                mask = transformer_options['AttnMask_neg'].attn_mask.to_device('cuda')
                 if mask_zero is None:
                     mask_zero = torch.ones_like(mask)
                     img_len = transformer_options['AttnMask_neg'].img_len
@@ -802,7 +813,7 @@ class HDModel(nn.Module):
 
             elif UNCOND and 'AttnMask' in transformer_options:
                 AttnMask = transformer_options['AttnMask']
-                mask = transformer_options['AttnMask'].attn_mask.mask.to('cuda')
+                mask = transformer_options['AttnMask'].attn_mask.to_device('cuda')
                 
                 if mask_zero is None:
                     mask_zero = torch.ones_like(mask)
@@ -1702,65 +1713,14 @@ def adain_patchwise(content: torch.Tensor, style: torch.Tensor, sigma: float = 1
 
 
 
-def adain_patchwise_row_batch(content: torch.Tensor, style: torch.Tensor, sigma: float = 1.0, kernel_size: int = None, eps: float = 1e-5) -> torch.Tensor:
-
-    B, C, H, W = content.shape
-    device, dtype = content.device, content.dtype
-
-    if kernel_size is None:
-        kernel_size = int(2 * math.ceil(3 * sigma) + 1)
-    if kernel_size % 2 == 0:
-        kernel_size += 1
-
-    pad = kernel_size // 2
-    coords = torch.arange(kernel_size, dtype=torch.float64, device=device) - pad
-    gauss = torch.exp(-0.5 * (coords / sigma) ** 2)
-    gauss = (gauss / gauss.sum()).to(dtype)
-    kernel_2d = (gauss[:, None] * gauss[None, :])
-
-    weight = kernel_2d.view(1, 1, kernel_size, kernel_size)
-
-    content_padded = F.pad(content, (pad, pad, pad, pad), mode='reflect')
-    style_padded = F.pad(style, (pad, pad, pad, pad), mode='reflect')
-    result = torch.zeros_like(content)
-
-    for i in range(H):
-        c_row_patches = torch.stack([
-            content_padded[:, :, i:i+kernel_size, j:j+kernel_size]
-            for j in range(W)
-        ], dim=0)  # [W, B, C, k, k]
-
-        s_row_patches = torch.stack([
-            style_padded[:, :, i:i+kernel_size, j:j+kernel_size]
-            for j in range(W)
-        ], dim=0)
-
-        w = weight.expand_as(c_row_patches[0])
-
-        c_mean = (c_row_patches * w).sum(dim=(-1, -2), keepdim=True)
-        c_std  = ((c_row_patches - c_mean) ** 2 * w).sum(dim=(-1, -2), keepdim=True).sqrt() + eps
-        s_mean = (s_row_patches * w).sum(dim=(-1, -2), keepdim=True)
-        s_std  = ((s_row_patches - s_mean) ** 2 * w).sum(dim=(-1, -2), keepdim=True).sqrt() + eps
-
-        center = kernel_size // 2
-        central = c_row_patches[:, :, :, center:center+1, center:center+1]
-        normed = (central - c_mean) / c_std
-        stylized = normed * s_std + s_mean
-
-        result[:, :, i, :] = stylized.squeeze(-1).squeeze(-1).permute(1, 2, 0)  # [B,C,W]
-
-    return result
-
-
-
-
-
-
-
 def adain_patchwise_row_batch_medblur(content: torch.Tensor, style: torch.Tensor, sigma: float = 1.0, kernel_size: int = None, eps: float = 1e-5, mask: torch.Tensor = None, use_median_blur: bool = False) -> torch.Tensor:
     B, C, H, W = content.shape
     device, dtype = content.device, content.dtype
 
+    if not use_median_blur:
+        mask = content.new_ones((1, 1, H, W)) if mask is None else mask
+        return adain_patchwise_row_batch_masked(content, style, mask, sigma=sigma, kernel_size=kernel_size, eps=eps)
+
     if kernel_size is None:
         kernel_size = int(2 * math.ceil(3 * abs(sigma)) + 1)
     if kernel_size % 2 == 0:
@@ -1773,7 +1733,6 @@ def adain_patchwise_row_batch_medblur(content: torch.Tensor, style: torch.Tensor
     result = torch.zeros_like(content)
 
     scaling = torch.ones((B, 1, H, W), device=device, dtype=dtype)
-    sigma_scale = torch.ones((H, W), device=device, dtype=torch.float32)
     if mask is not None:
         with torch.no_grad():
             padded_mask = F.pad(mask.float(), (pad, pad, pad, pad), mode="reflect")
@@ -1781,19 +1740,6 @@ def adain_patchwise_row_batch_medblur(content: torch.Tensor, style: torch.Tensor
             blurred_mask = blurred_mask[..., pad:-pad, pad:-pad]
             edge_proximity = blurred_mask * (1.0 - blurred_mask)
             scaling = 1.0 - (edge_proximity / 0.25).clamp(0.0, 1.0)
-            sigma_scale = scaling[0, 0]  # assuming single-channel mask broadcasted across B, C
-
-    if not use_median_blur:
-        coords = torch.arange(kernel_size, dtype=torch.float64, device=device) - pad
-        base_gauss = torch.exp(-0.5 * (coords / sigma) ** 2)
-        base_gauss = (base_gauss / base_gauss.sum()).to(dtype)
-        gaussian_table = {}
-        for s in sigma_scale.unique():
-            sig = float((sigma * s + eps).clamp(min=1e-3))
-            gauss_local = torch.exp(-0.5 * (coords / sig) ** 2)
-            gauss_local = (gauss_local / gauss_local.sum()).to(dtype)
-            kernel_2d = gauss_local[:, None] * gauss_local[None, :]
-            gaussian_table[s.item()] = kernel_2d
 
     for i in range(H):
         row_result = torch.zeros(B, C, W, dtype=dtype, device=device)
@@ -1801,34 +1747,20 @@ def adain_patchwise_row_batch_medblur(content: torch.Tensor, style: torch.Tensor
             c_patch = content_padded[:, :, i:i+kernel_size, j:j+kernel_size]
             s_patch = style_padded[:, :, i:i+kernel_size, j:j+kernel_size]
 
-            if use_median_blur:
-                c_flat = c_patch.reshape(B, C, -1)
-                s_flat = s_patch.reshape(B, C, -1)
-
-                c_median = c_flat.median(dim=-1, keepdim=True).values
-                s_median = s_flat.median(dim=-1, keepdim=True).values
+            c_flat = c_patch.reshape(B, C, -1)
+            s_flat = s_patch.reshape(B, C, -1)
 
-                c_std = (c_flat - c_median).abs().mean(dim=-1, keepdim=True) + eps
-                s_std = (s_flat - s_median).abs().mean(dim=-1, keepdim=True) + eps
+            c_median = c_flat.median(dim=-1, keepdim=True).values
+            s_median = s_flat.median(dim=-1, keepdim=True).values
 
-                center = kernel_size // 2
-                central = c_patch[:, :, center, center].unsqueeze(-1)
-
-                normed = (central - c_median) / c_std
-                stylized = normed * s_std + s_median
-            else:
-                k = gaussian_table[float(sigma_scale[i, j].item())]
-                local_weight = k.view(1, 1, kernel_size, kernel_size).expand(B, C, kernel_size, kernel_size)
+            c_std = (c_flat - c_median).abs().mean(dim=-1, keepdim=True) + eps
+            s_std = (s_flat - s_median).abs().mean(dim=-1, keepdim=True) + eps
 
-                c_mean = (c_patch * local_weight).sum(dim=(-1, -2), keepdim=True)
-                c_std = ((c_patch - c_mean) ** 2 * local_weight).sum(dim=(-1, -2), keepdim=True).sqrt() + eps
-                s_mean = (s_patch * local_weight).sum(dim=(-1, -2), keepdim=True)
-                s_std = ((s_patch - s_mean) ** 2 * local_weight).sum(dim=(-1, -2), keepdim=True).sqrt() + eps
+            center = kernel_size // 2
+            central = c_patch[:, :, center, center].unsqueeze(-1)
 
-                center = kernel_size // 2
-                central = c_patch[:, :, center:center+1, center:center+1]
-                normed = (central - c_mean) / c_std
-                stylized = normed * s_std + s_mean
+            normed = (central - c_median) / c_std
+            stylized = normed * s_std + s_median
 
             local_scaling = scaling[:, :, i, j].view(B, 1, 1, 1)
             stylized = central * (1 - local_scaling) + stylized * local_scaling
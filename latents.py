@@ -58,51 +58,57 @@ def get_collinear_flat(x, y):
 
 
 
+def get_channelwise_refs(refs, b:int, c:int, dtype) -> torch.Tensor:
+    """Stack refs as column vectors per channel: [b, c, h*w(*t), n_refs]. Refs with batch 1 are broadcast to b."""
+    return torch.stack([ref.reshape(ref.shape[0], c, -1).to(dtype).expand(b, c, -1) for ref in refs], dim=-1)
+
+def get_channelwise_orthogonality(A_flat:torch.Tensor, refs_flat:torch.Tensor, eps:float=1e-8) -> torch.Tensor:
+    """
+    Largest |cossim| between A [b, c, D] and any ref [b, c, D, n_refs], per channel and over whole batch items.
+    Returns a 0-dim tensor, so checking convergence costs one sync.
+    """
+    dots      = (A_flat.unsqueeze(-1) * refs_flat).sum(dim=-2)                                         # [b, c, n_refs]
+    A_sq      = (A_flat    * A_flat   ).sum(dim=-1, keepdim=True)                                        # [b, c, 1]
+    refs_sq   = (refs_flat * refs_flat).sum(dim=-2)                                                      # [b, c, n_refs]
+    
+    cossim_ch = dots            / (A_sq.sqrt()            * refs_sq.sqrt()           ).clamp(min=eps)
+    cossim    = dots.sum(dim=1) / (A_sq.sum(dim=1).sqrt() * refs_sq.sum(dim=1).sqrt()).clamp(min=eps)     # [b, n_refs]
+    return torch.maximum(cossim_ch.abs().amax(), cossim.abs().amax())
+
 def get_orthogonal_noise_from_channelwise(*refs, max_iter=500, max_score=1e-15):
+    """
+    Remove every ref's component from noise, channelwise and for all batch items. Each pass projects out the span of
+    all refs at once through a QR basis. Passes repeat (re-orthogonalization) until the largest |cossim| < max_score.
+    """
     noise, *refs = refs
-    noise_tmp = noise.clone()
-    #b,c,h,w = noise.shape
-    if (noise.ndim == 4):
-        b,ch,h,w = noise.shape
-    elif (noise.ndim == 5):
-        b,ch,t,h,w = noise.shape
+    b, c  = noise.shape[:2]
+    dtype = noise.dtype
+    work_dtype = torch.promote_types(dtype, torch.float32)
+
+    noise_flat = noise.reshape(b, c, -1).to(work_dtype, copy=True)
+    refs_flat  = get_channelwise_refs(refs, b, c, work_dtype)
+    Q, _       = torch.linalg.qr(refs_flat)                                                                   # [b, c, D, n_refs]
     
     for i in range(max_iter):
-        noise_tmp = gram_schmidt_channels_optimized(noise_tmp, *refs)
+        noise_flat = noise_flat - (Q @ (Q.transpose(-2, -1) @ noise_flat.unsqueeze(-1))).squeeze(-1)
         
-        cossim_scores = []
-        for ref in refs:
-            #for c in range(noise.shape[-3]):
-            for c in range(ch):
-                cossim_scores.append(get_cosine_similarity(noise_tmp[0][c], ref[0][c]).abs())
-            cossim_scores.append(get_cosine_similarity(noise_tmp[0], ref[0]).abs())
-            
-        if max(cossim_scores) < max_score:
+        if get_channelwise_orthogonality(noise_flat, refs_flat) < max_score:
             break
     
-    return noise_tmp
+    return noise_flat.view_as(noise).to(dtype)
 
 
 
 def gram_schmidt_channels_optimized(A, *refs):
-    if (A.ndim == 4):
-        b,c,h,w = A.shape
-    elif (A.ndim == 5):
-        b,c,t,h,w = A.shape
-
-    A_flat = A.view(b, c, -1)  
-    
-    for ref in refs:
-        ref_flat = ref.view(b, c, -1).clone()  
+    """One projection of A [b, c, (t,) h, w] off the span of all refs, per channel. Returns a new tensor."""
+    b, c = A.shape[:2]
+    work_dtype = torch.promote_types(A.dtype, torch.float32)
 
-        ref_flat /= ref_flat.norm(dim=-1, keepdim=True) 
+    A_flat = A.reshape(b, c, -1).to(work_dtype)
+    Q, _   = torch.linalg.qr(get_channelwise_refs(refs, b, c, work_dtype))
+    A_flat = A_flat - (Q @ (Q.transpose(-2, -1) @ A_flat.unsqueeze(-1))).squeeze(-1)
 
-        proj_coeff = torch.sum(A_flat * ref_flat, dim=-1, keepdim=True)  
-        projection = proj_coeff * ref_flat 
-
-        A_flat -= projection
-
-    return A_flat.view_as(A)
+    return A_flat.view_as(A).to(A.dtype)
 
 
 
@@ -696,6 +702,82 @@ def interpolate_spd(cov1, cov2, t, eps=1e-5):
 
 
 
+TILE_BLEND_CACHE      = {}    # (H, W, tile_hw, positions, feather, device, dtype) -> (index, weights)
+TILE_BLEND_CACHE_SIZE = 32
+
+def get_tile_positions(size:int, tile:int) -> List[int]:
+    """Start positions of ceil(size/tile) tiles spread evenly over size, first at 0 and last flush with the edge."""
+    n = (size + tile - 1) // tile
+    if n == 1:
+        return [0]
+    return [round(i*(size - tile)/(n-1)) for i in range(n)]
+
+def get_tile_feather(positions:List[int], tile:int, feather:str="linear", device=None) -> torch.Tensor:
+    """
+    1D blend weights [len(positions), tile]. Each tile ramps up across its overlap with the previous tile and down across
+    its overlap with the next one, so overlapping ramps sum to 1. No ramp at the latent border or where tiles only touch.
+    feather: "linear", "cosine", or "none" (uniform average).
+    """
+    k     = torch.arange(tile, device=device, dtype=torch.float64)
+    ramps = torch.ones(len(positions), tile, device=device, dtype=torch.float64)
+    
+    if feather == "none":
+        return ramps
+    
+    for i, pos in enumerate(positions):
+        if i > 0:
+            overlap = positions[i-1] + tile - pos
+            if overlap > 0:
+                ramps[i] = torch.minimum(ramps[i], ((k + 1)    / (overlap + 1)).clamp(max=1))
+        if i < len(positions) - 1:
+            overlap = pos + tile - positions[i+1]
+            if overlap > 0:
+                ramps[i] = torch.minimum(ramps[i], ((tile - k) / (overlap + 1)).clamp(max=1))
+    
+    if feather == "cosine":
+        ramps = 0.5 - 0.5 * torch.cos(math.pi * ramps)
+    return ramps
+
+def get_tile_blend_weights(H            : int,
+                           W            : int,
+                           tile_hw      : Tuple[int,int],
+                           positions    : Tuple[List[int],List[int]],
+                           feather      : str = "linear",
+                           device       = None,
+                           dtype        = torch.float32,
+                           ) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    Per-geometry blend map, computed once and cached.
+    Returns:
+        index:   [rows*cols*t_h*t_w] flat H*W position of every tile pixel, in (row, col, y, x) order
+        weights: [rows, cols, t_h, t_w] blend weights, already normalized so they sum to 1 over every output pixel
+    """
+    t_h, t_w     = tile_hw
+    pos_h, pos_w = positions
+    key = (H, W, t_h, t_w, tuple(pos_h), tuple(pos_w), feather, str(device), dtype)
+    
+    if key in TILE_BLEND_CACHE:
+        TILE_BLEND_CACHE[key] = TILE_BLEND_CACHE.pop(key)
+        return TILE_BLEND_CACHE[key]
+    
+    ramp_h = get_tile_feather(pos_h, t_h, feather, device)
+    ramp_w = get_tile_feather(pos_w, t_w, feather, device)
+    weights = ramp_h[:, None, :, None] * ramp_w[None, :, None, :]                                  # [rows, cols, t_h, t_w]
+    
+    y = torch.tensor(pos_h, device=device)[:, None] + torch.arange(t_h, device=device)             # [rows, t_h]
+    x = torch.tensor(pos_w, device=device)[:, None] + torch.arange(t_w, device=device)             # [cols, t_w]
+    index = (y[:, None, :, None] * W + x[None, :, None, :]).flatten()
+    
+    total   = weights.new_zeros(H*W).index_add_(0, index, weights.flatten())
+    weights = (weights.flatten() / total[index]).view_as(weights).to(dtype)
+    
+    TILE_BLEND_CACHE[key] = index, weights
+    if len(TILE_BLEND_CACHE) > TILE_BLEND_CACHE_SIZE:
+        TILE_BLEND_CACHE.pop(next(iter(TILE_BLEND_CACHE)))
+    return index, weights
+
+
+
 def tile_latent(latent: torch.Tensor,
                 tile_size: Tuple[int,int]
                 ) -> Tuple[torch.Tensor,
@@ -707,41 +789,26 @@ def tile_latent(latent: torch.Tensor,
     Works on either:
        - 4D [B,C,H,W]
        - 5D [B,C,T,H,W]
+    Tiles are gathered in one op from an unfold() view of every window, nothing is copied per tile.
+    Tile sizes larger than the latent are clamped to it.
     Returns:
-        tiles:      [B*rows*cols, C, (T,), t_h, t_w]
+        tiles:      [rows*cols*B, C, (T,), t_h, t_w], tile position major
         orig_shape: the full shape of `latent`
         tile_hw:    (t_h, t_w)
         positions:  (pos_h, pos_w) lists of start y and x positions
     """
     *lead, H, W = latent.shape
-    B, C = lead[0], lead[1]
-    has_time = (latent.ndim == 5)
-    if has_time:
-        T = lead[2]
-    t_h, t_w = tile_size
+    t_h, t_w = min(tile_size[0], H), min(tile_size[1], W)
 
-    rows = (H + t_h - 1) // t_h
-    cols = (W + t_w - 1) // t_w
+    pos_h = get_tile_positions(H, t_h)
+    pos_w = get_tile_positions(W, t_w)
 
-    if rows == 1:
-        pos_h = [0]
-    else:
-        pos_h = [round(i*(H - t_h)/(rows-1)) for i in range(rows)]
-    if cols == 1:
-        pos_w = [0]
-    else:
-        pos_w = [round(j*(W - t_w)/(cols-1)) for j in range(cols)]
-
-    tiles = []
-    for y in pos_h:
-        for x in pos_w:
-            if has_time:
-                tile = latent[:, :, :, y:y+t_h, x:x+t_w]
-            else:
-                tile = latent[:, :,    y:y+t_h, x:x+t_w]
-            tiles.append(tile)
+    windows = latent.unfold(-2, t_h, 1).unfold(-2, t_w, 1)                          # [..., H-t_h+1, W-t_w+1, t_h, t_w] view
+    idx_h   = torch.tensor(pos_h, device=latent.device)
+    idx_w   = torch.tensor(pos_w, device=latent.device)
+    tiles   = windows[..., idx_h[:, None], idx_w[None, :], :, :]                     # [..., rows, cols, t_h, t_w]
+    tiles   = tiles.movedim((-4, -3), (0, 1)).reshape(-1, *lead[1:], t_h, t_w)
 
-    tiles = torch.cat(tiles, dim=0)
     orig_shape = tuple(latent.shape)
     return tiles, orig_shape, (t_h, t_w), (pos_h, pos_w)
 
@@ -749,52 +816,33 @@ def tile_latent(latent: torch.Tensor,
 def untile_latent(tiles: torch.Tensor,
                   orig_shape: Tuple[int,...],
                   tile_hw: Tuple[int,int],
-                  positions: Tuple[List[int],List[int]]
+                  positions: Tuple[List[int],List[int]],
+                  feather: str = "linear",
                   ) -> torch.Tensor:
     """
-    Reconstruct latent from tiles + their start positions.
+    Reconstruct latent from tiles + their start positions with one index_add over precomputed blend weights.
     Works on either 4D or 5D original.
     Args:
-      tiles:      [B*rows*cols, C, (T,), t_h, t_w]
+      tiles:      [rows*cols*B, C, (T,), t_h, t_w], as returned by tile_latent
       orig_shape: shape of original latent (B,C,H,W) or (B,C,T,H,W)
       tile_hw:    (t_h, t_w)
       positions:  (pos_h, pos_w)
+      feather:    "linear", "cosine" or "none" blend across tile overlaps
     Returns:
       reconstructed latent of shape `orig_shape`
     """
     *lead, H, W = orig_shape
-    B, C = lead[0], lead[1]
-    has_time = (len(orig_shape) == 5)
-    if has_time:
-        T = lead[2]
     t_h, t_w = tile_hw
     pos_h, pos_w = positions
     rows, cols = len(pos_h), len(pos_w)
 
-    if has_time:
-        out = torch.zeros(B, C, T, H, W, device=tiles.device, dtype=tiles.dtype)
-        count = torch.zeros_like(out)
-        tiles = tiles.view(B, rows, cols, C, T, t_h, t_w)
-        for bi in range(B):
-            for i, y in enumerate(pos_h):
-                for j, x in enumerate(pos_w):
-                    tile = tiles[bi, i, j]
-                    out[bi, :, :, y:y+t_h, x:x+t_w] += tile
-                    count[bi, :, :, y:y+t_h, x:x+t_w] += 1
-    else:
-        out = torch.zeros(B, C, H, W, device=tiles.device, dtype=tiles.dtype)
-        count = torch.zeros_like(out)
-        tiles = tiles.view(B, rows, cols, C, t_h, t_w)
-        for bi in range(B):
-            for i, y in enumerate(pos_h):
-                for j, x in enumerate(pos_w):
-                    tile = tiles[bi, i, j]
-                    out[bi, :, y:y+t_h, x:x+t_w] += tile
-                    count[bi, :, y:y+t_h, x:x+t_w] += 1
-
-    valid = count > 0
-    out[valid] = out[valid] / count[valid]
-    return out
+    index, weights = get_tile_blend_weights(H, W, tile_hw, positions, feather, tiles.device, tiles.dtype)
+
+    tiles = tiles.view(rows, cols, *lead, t_h, t_w) * weights.view(rows, cols, *[1] * len(lead), t_h, t_w)
+    tiles = tiles.movedim((0, 1), (-4, -3)).reshape(math.prod(lead), -1)             # [B*C*(T), rows*cols*t_h*t_w]
+
+    out = tiles.new_zeros(tiles.shape[0], H*W).index_add_(1, index, tiles)
+    return out.view(orig_shape)
 
 
 
@@ -819,3 +867,107 @@ def upscale_to_match_spatial(tensor_5d, ref_4d, mode='bicubic'):
 
 
 
+# PATCHWISE ADAIN OPS
+
+def get_gaussian_kernel_1d(sigma:float, kernel_size:int, device=None, dtype=torch.float32) -> torch.Tensor:
+    pad    = kernel_size // 2
+    coords = torch.arange(kernel_size, dtype=torch.float64, device=device) - pad
+    gauss  = torch.exp(-0.5 * (coords / sigma) ** 2)
+    return (gauss / gauss.sum()).to(dtype)
+
+def gaussian_blur_reflect(x:torch.Tensor, gauss:torch.Tensor) -> torch.Tensor:
+    """Depthwise separable blur of [N,C,H,W] with reflect padding, same size out. Equals the gauss x gauss weighted sum over each kxk patch."""
+    C, k = x.shape[1], gauss.shape[0]
+    pad  = k // 2
+    x = F.pad(x, (pad, pad, pad, pad), mode='reflect')
+    x = F.conv2d(x, gauss.view(1, 1, k, 1).expand(C, 1, k, 1), groups=C)
+    x = F.conv2d(x, gauss.view(1, 1, 1, k).expand(C, 1, 1, k), groups=C)
+    return x
+
+def get_patchwise_mean_std(content:torch.Tensor, style:torch.Tensor, gauss:torch.Tensor, eps:float=1e-5) -> Tuple[torch.Tensor, ...]:
+    """
+    Gaussian weighted local mean and std of content and style, all four from one blur: var = E[x^2] - E[x]^2.
+    Both are centered on their per-channel mean first (the blur preserves constants), so the subtraction does not
+    cancel away the precision of latents with a large offset. Style is broadcast to the batch size of content.
+    """
+    C = content.shape[1]
+    style   = style.expand_as(content)
+    c_shift = content.mean(dim=(-2, -1), keepdim=True)
+    s_shift = style  .mean(dim=(-2, -1), keepdim=True)
+    content = content - c_shift
+    style   = style   - s_shift
+    moments = gaussian_blur_reflect(torch.cat([content, content * content, style, style * style], dim=1), gauss)
+    c_mean, c_sq, s_mean, s_sq = moments.split(C, dim=1)
+    c_std = (c_sq - c_mean * c_mean).clamp(min=0).sqrt() + eps
+    s_std = (s_sq - s_mean * s_mean).clamp(min=0).sqrt() + eps
+    return c_mean + c_shift, c_std, s_mean + s_shift, s_std
+
+def adain_patchwise_row_batch(content: torch.Tensor, style: torch.Tensor, sigma: float = 1.0, kernel_size: int = None, eps: float = 1e-5) -> torch.Tensor:
+    """
+    AdaIN of every pixel against Gaussian weighted kxk patch statistics of content and style.
+    Works on 4D [B,C,H,W] or 5D [B,C,T,H,W] (framewise, style may have T=1). Computed in at least float32.
+    """
+    if content.ndim == 5:
+        B, C, T, H, W = content.shape
+        style  = style.expand(B, C, T, H, W)
+        result = adain_patchwise_row_batch(content.movedim(2, 1).reshape(B*T, C, H, W), style.movedim(2, 1).reshape(B*T, C, H, W), sigma, kernel_size, eps)
+        return result.view(B, T, C, H, W).movedim(1, 2)
+    
+    dtype = content.dtype
+    work_dtype = torch.promote_types(dtype, torch.float32)
+
+    if kernel_size is None:
+        kernel_size = int(2 * math.ceil(3 * sigma) + 1)
+    if kernel_size % 2 == 0:
+        kernel_size += 1
+
+    content = content.to(work_dtype)
+    gauss   = get_gaussian_kernel_1d(sigma, kernel_size, content.device, work_dtype)
+    c_mean, c_std, s_mean, s_std = get_patchwise_mean_std(content, style.to(work_dtype), gauss, eps)
+    
+    return ((content - c_mean) / c_std * s_std + s_mean).to(dtype)
+
+def adain_patchwise_row_batch_masked(content: torch.Tensor, style: torch.Tensor, mask: torch.Tensor, sigma: float = 1.0, kernel_size: int = None, eps: float = 1e-5, max_levels: int = 64) -> torch.Tensor:
+    """
+    Vectorized gaussian path of adain_patchwise_row_batch_medblur() with a mask. Towards mask edges the window narrows
+    to sigma * scaling and the result fades back to content, scaling = 1 - 4*m*(1-m) of the box blurred mask.
+    Every distinct scaling value is one blur pass, more than max_levels are rounded to 1/max_levels steps.
+    mask: [1 or B, 1, H, W]. 5D content is framewise with the same spatial mask on every frame.
+    """
+    if content.ndim == 5:
+        B, C, T, H, W = content.shape
+        style  = style.expand(B, C, T, H, W)
+        mask   = mask.expand(-1, T, H, W).reshape(-1, 1, H, W) if mask.shape[0] == B and B > 1 else mask[:1]
+        result = adain_patchwise_row_batch_masked(content.movedim(2, 1).reshape(B*T, C, H, W), style.movedim(2, 1).reshape(B*T, C, H, W), mask, sigma, kernel_size, eps, max_levels)
+        return result.view(B, T, C, H, W).movedim(1, 2)
+    
+    dtype = content.dtype
+    work_dtype = torch.promote_types(dtype, torch.float32)
+
+    if kernel_size is None:
+        kernel_size = int(2 * math.ceil(3 * abs(sigma)) + 1)
+    if kernel_size % 2 == 0:
+        kernel_size += 1
+    pad = kernel_size // 2
+
+    content = content.to(work_dtype)
+    style   = style  .to(work_dtype)
+
+    padded_mask  = F.pad(mask.to(work_dtype), (pad, pad, pad, pad), mode="reflect")
+    blurred_mask = F.avg_pool2d(padded_mask, kernel_size=kernel_size, stride=1, padding=pad)[..., pad:-pad, pad:-pad]
+    scaling      = 1.0 - (blurred_mask * (1.0 - blurred_mask) / 0.25).clamp(0.0, 1.0)
+    sigma_scale  = scaling[0, 0]
+
+    levels = sigma_scale.unique()
+    if len(levels) > max_levels:
+        sigma_scale = (sigma_scale * max_levels).round() / max_levels
+        levels      = sigma_scale.unique()
+
+    stylized = torch.empty_like(content)
+    for level in levels:
+        sig   = float((sigma * level + eps).clamp(min=1e-3))
+        gauss = get_gaussian_kernel_1d(sig, kernel_size, content.device, work_dtype)
+        c_mean, c_std, s_mean, s_std = get_patchwise_mean_std(content, style, gauss, eps)
+        stylized = torch.where(sigma_scale == level, (content - c_mean) / c_std * s_std + s_mean, stylized)
+    
+    return (content * (1 - scaling) + stylized * scaling).to(dtype)
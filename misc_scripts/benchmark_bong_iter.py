@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import torch
+
+
+def load_rk_method(comfyui_path):
+    """The beta modules import comfy, so this has to run against a ComfyUI install."""
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, comfyui_path)
+    sys.path.insert(0, os.path.dirname(repo))
+    return importlib.import_module(os.path.basename(repo) + ".beta.rk_method_beta")
+
+
+def stub_model(dtype):
+    """RK_Method_Beta only reads sigma_min/sigma_max from the model when bong_iter() is all that runs."""
+    model_sampling = SimpleNamespace(sigma_min=torch.tensor(0.0292, dtype=dtype), sigma_max=torch.tensor(14.6146, dtype=dtype))
+    return SimpleNamespace(model=SimpleNamespace(model_sampling=model_sampling))
+
+
+def make_rk(rk_method, rk_type, sigma, sigma_next, extra_options, dtype, device):
+    RK = rk_method.RK_Method_Beta.create(stub_model(dtype), rk_type, VE_MODEL=False, work_device=device, dtype=dtype, extra_options=extra_options)
+    RK.unsample_bongmath = True
+    sigmas = torch.tensor([sigma, sigma_next, 0.0], dtype=dtype, device=device)
+    h      = RK.h_fn(sigmas[1], sigmas[0])
+    RK.set_coeff(rk_type, h, step=0, sigmas=sigmas, sigma_down=sigmas[1])
+    s_     = RK.sigma_fn(RK.t_fn(sigmas[0]) + h * RK.C)
+    return RK, sigmas[0], s_, h
+
+
+def run(RK, sigma, s_, h, x_0, x_, eps_, data_):
+    """bong_iter() on every explicit row, as the diag/fully explicit paths call it, on copies of the same stage buffers."""
+    x_0, x_, eps_ = x_0.clone(), x_.clone(), eps_.clone()
+    eps_prev_ = torch.zeros_like(eps_)
+    for row in range(RK.rows - RK.row_offset):
+        x_0, x_, eps_ = RK.bong_iter(x_0, x_, eps_, eps_prev_, data_, sigma, s_, row, RK.row_offset, h, 0, 0)
+    return x_0, x_, eps_
+
+
+def timed(fn, *args, repeats=5):
+    out = fn(*args)
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        out = fn(*args)
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    return out, (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time stacked bong_iter() against the row-by-row reference (bong_iter_rowwise) and check they agree in float64.")
+    parser.add_argument('--comfyui', type=str, default=os.getcwd(), help="Path to the ComfyUI install (default: current directory).")
+    parser.add_argument('--rk_types', type=str, nargs='+', default=['res_2s', 'res_3s', 'res_4s', 'res_6s'])
+    parser.add_argument('--shape', type=int, nargs='+', default=[1, 16, 128, 128], help="Latent shape.")
+    parser.add_argument('--iters', type=int, default=100, help="bong_iter_max.")
+    parser.add_argument('--sigma', type=float, default=0.8)
+    parser.add_argument('--sigma_next', type=float, default=0.6)
+    parser.add_argument('--dtype', type=str, default='float32', help="dtype for the timings, the equivalence check always runs in float64.")
+    parser.add_argument('--device', type=str, default='cuda' if torch.cuda.is_available() else 'cpu')
+
+    args      = parser.parse_args()
+    rk_method = load_rk_method(args.comfyui)
+    options   = f"bong_iter_max={args.iters}"
+
+    for rk_type in args.rk_types:
+        results = {}
+        for dtype in (torch.float64, getattr(torch, args.dtype)):
+            gen = torch.Generator().manual_seed(0)
+            for rowwise in (False, True):
+                RK, sigma, s_, h = make_rk(rk_method, rk_type, args.sigma, args.sigma_next, options + ("\nbong_iter_rowwise" if rowwise else ""), dtype, args.device)
+                if not results.get(dtype):
+                    x_0   = torch.randn(args.shape, generator=gen, dtype=torch.float64).to(args.device, dtype)
+                    x_    = torch.randn(RK.rows+2, *args.shape, generator=gen, dtype=torch.float64).to(args.device, dtype)
+                    eps_  = torch.randn(RK.rows+2, *args.shape, generator=gen, dtype=torch.float64).to(args.device, dtype)
+                    data_ = torch.randn(RK.rows+2, *args.shape, generator=gen, dtype=torch.float64).to(args.device, dtype)
+                    results[dtype] = (x_0, x_, eps_, data_)
+                results[(dtype, rowwise)] = timed(run, RK, sigma, s_, h, *results[dtype])
+
+        stacked, _ = results[(torch.float64, False)]
+        rowwise, _ = results[(torch.float64, True)]
+        diff       = max((a - b).abs().max().item() for a, b in zip(stacked, rowwise))
+
+        dtype = getattr(torch, args.dtype)
+        t_stacked, t_rowwise = results[(dtype, False)][1], results[(dtype, True)][1]
+        print(f"{rk_type} ({RK.rows} rows, {args.iters} iters): rowwise {t_rowwise*1000:.1f} ms, stacked {t_stacked*1000:.1f} ms, {t_rowwise/t_stacked:.2f}x, float64 max abs diff {diff:.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+import argparse
+import importlib
+import os
+import random
+import re
+import sys
+import time
+
+
+def load_helper(comfyui_path):
+    """helper imports comfy, so this has to run against a ComfyUI install."""
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, comfyui_path)
+    sys.path.insert(0, os.path.dirname(repo))
+    package = os.path.basename(repo)
+    helper  = importlib.import_module(package + ".helper")
+    schema  = importlib.import_module(package + ".extra_options_schema")
+    return helper, schema
+
+
+class ExtraOptionsRegex:
+    """The previous ExtraOptions.__call__, one re.search over the whole string per lookup, kept here as the reference."""
+    def __init__(self, extra_options):
+        self.extra_options = extra_options
+
+    def __call__(self, option, default=None, ret_type=None):
+        if default is None:
+            pattern = rf"^(?:{re.escape(option)}\s*$|{re.escape(option)}=)"
+            return bool(re.search(pattern, self.extra_options, flags=re.MULTILINE))
+        ret_type = type(default) if ret_type is None else ret_type
+
+        if ret_type == list:
+            match = re.search(rf"^{re.escape(option)}\s*=\s*([a-zA-Z0-9_.,+-]+)\s*$", self.extra_options, flags=re.MULTILINE)
+            if not match:
+                return default
+            elem_type = default[0] if type(default[0]) == type else type(default[0])
+            return [elem_type(v) for v in match.group(1).split(',')]
+
+        match = re.search(rf"^{re.escape(option)}\s*=\s*([a-zA-Z0-9_.+-]+)\s*$", self.extra_options, flags=re.MULTILINE)
+        if not match:
+            return default
+        if ret_type == bool:
+            return match.group(1).lower() in ("true", "1", "yes", "on")
+        return ret_type(match.group(1))
+
+
+def lookup_mix(schema, count, seed=0):
+    """count (name, default) pairs drawn from the declared options, flags and scalar options only, as the step loop reads them."""
+    options = [opt for opt in schema.EXTRA_OPTIONS_SCHEMA.values() if opt.type is None or (opt.type in (int, float, str, bool) and opt.default is not None)]
+    rng     = random.Random(seed)
+    return [(opt.name, None if opt.type is None else opt.default) for opt in rng.choices(options, k=count)]
+
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time one sampler step's worth of extra_options lookups: regex per call, parsed table, compiled attributes.")
+    parser.add_argument('--comfyui', type=str, default=os.getcwd(), help="Path to the ComfyUI install (default: current directory).")
+    parser.add_argument('--lookups', type=int, default=300, help="Lookups per step (the debug log of sample_rk_beta reports the real count).")
+    parser.add_argument('--lines', type=int, default=40, help="Lines in the extra_options string.")
+    parser.add_argument('--repeats', type=int, default=200, help="Steps to average over.")
+
+    args           = parser.parse_args()
+    helper, schema = load_helper(args.comfyui)
+
+    names         = list(schema.EXTRA_OPTIONS_SCHEMA)
+    extra_options = "\n".join(f"{name}=1" if i % 2 else name for i, name in enumerate(random.Random(1).sample(names, min(args.lines, len(names)))))
+    lookups       = lookup_mix(schema, args.lookups)
+
+    EO_regex = ExtraOptionsRegex(extra_options)
+    EO       = helper.ExtraOptions(extra_options)
+    EO.mute  = True
+    opts     = EO.compile()
+
+    for name, default in lookups:
+        if EO_regex(name, default) != EO(name, default):
+            print(f"mismatch for {name}: regex {EO_regex(name, default)!r}, parsed {EO(name, default)!r}")
+
+    t_regex    = timed(lambda: [EO_regex(name, default) for name, default in lookups], args.repeats)
+    t_parsed   = timed(lambda: [EO      (name, default) for name, default in lookups], args.repeats)
+    t_compiled = timed(lambda: [getattr(opts, name)     for name, _       in lookups], args.repeats)
+
+    print(f"{args.lookups} lookups per step, {args.lines} line extra_options:")
+    print(f"  regex    {t_regex*1e3:8.3f} ms/step")
+    print(f"  parsed   {t_parsed*1e3:8.3f} ms/step   {t_regex/t_parsed:6.1f}x")
+    print(f"  compiled {t_compiled*1e3:8.3f} ms/step   {t_regex/t_compiled:6.1f}x")
+
+if __name__ == "__main__":
+    main()
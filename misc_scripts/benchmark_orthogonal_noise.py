@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import time
+
+import torch
+import torch.nn.functional as F
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from latents import get_orthogonal_noise_from_channelwise, get_channelwise_refs, get_channelwise_orthogonality
+
+
+def orthogonal_noise_loop(noise, *refs, max_iter=500, max_score=1e-7):
+    """The previous sequential Gram-Schmidt with a per-channel max() check, kept here as the reference. Batch item 0 only."""
+    noise_tmp = noise.clone()
+    b, ch = noise.shape[:2]
+
+    for i in range(max_iter):
+        A_flat = noise_tmp.view(b, ch, -1)
+        for ref in refs:
+            ref_flat = ref.view(b, ch, -1).clone()
+            ref_flat /= ref_flat.norm(dim=-1, keepdim=True)
+            A_flat -= torch.sum(A_flat * ref_flat, dim=-1, keepdim=True) * ref_flat
+
+        cossim_scores = []
+        for ref in refs:
+            for c in range(ch):
+                cossim_scores.append(F.cosine_similarity(noise_tmp[0][c].flatten(), ref[0][c].flatten(), dim=0).abs())
+            cossim_scores.append(F.cosine_similarity(noise_tmp[0].flatten(), ref[0].flatten(), dim=0).abs())
+
+        if max(cossim_scores) < max_score:
+            break
+
+    return noise_tmp, i + 1
+
+
+def orthogonal_noise_qr(noise, *refs, max_iter=500, max_score=1e-7):
+    out = get_orthogonal_noise_from_channelwise(noise, *refs, max_iter=max_iter, max_score=max_score)
+    b, c = noise.shape[:2]
+    refs_flat = get_channelwise_refs(refs, b, c, out.dtype)
+
+    iterations = 1
+    while iterations < max_iter and get_channelwise_orthogonality(get_orthogonal_noise_from_channelwise(noise, *refs, max_iter=iterations, max_score=0.0).reshape(b, c, -1), refs_flat) >= max_score:
+        iterations += 1
+    return out, iterations
+
+
+def timed(fn, *args, **kwargs):
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    out = fn(*args, **kwargs)
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    return out, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Iterations and wall time for orthogonal noise to reach max_score.")
+    parser.add_argument('--size', type=int, default=128, help="Latent height/width.")
+    parser.add_argument('--channels', type=int, default=16)
+    parser.add_argument('--batch', type=int, nargs='+', default=[1, 4])
+    parser.add_argument('--refs', type=int, default=3)
+    parser.add_argument('--max_score', type=float, default=1e-7)
+    parser.add_argument('--dtype', type=str, default='float32')
+    parser.add_argument('--device', type=str, default='cuda' if torch.cuda.is_available() else 'cpu')
+
+    args = parser.parse_args()
+    dtype = getattr(torch, args.dtype)
+
+    for b in args.batch:
+        shape = (b, args.channels, args.size, args.size)
+        noise = torch.randn(shape, device=args.device, dtype=dtype)
+        refs  = [torch.randn(shape, device=args.device, dtype=dtype) for _ in range(args.refs)]
+
+        (_, it_loop), t_loop = timed(orthogonal_noise_loop, noise, *refs, max_score=args.max_score)
+        _,            t_qr   = timed(get_orthogonal_noise_from_channelwise, noise, *refs, max_score=args.max_score)
+        _, it_qr             = orthogonal_noise_qr(noise, *refs, max_score=args.max_score)
+
+        print(f"batch {b}: loop {it_loop} iterations {t_loop*1000:.1f} ms (batch item 0 only), qr {it_qr} iterations {t_qr*1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+import argparse
+import importlib
+import os
+import sys
+import time
+
+import torch
+
+
+def load_flux_math(comfyui_path):
+    """flux.math imports comfy, so this has to run against a ComfyUI install."""
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, comfyui_path)
+    sys.path.insert(0, os.path.dirname(repo))
+    return importlib.import_module(os.path.basename(repo) + ".flux.math")
+
+
+def regional_mask(regions, text_len, h, w, device):
+    """
+    Bool mask laid out like FullAttentionMask: each region owns a text span and a vertical stripe of the image, and
+    mask[q, k] = max_r min(v_r[q], v_r[k]).
+    """
+    img_len  = h * w
+    vectors  = torch.zeros(regions, regions * text_len + img_len, dtype=torch.bool, device=device)
+    stripe   = torch.arange(w, device=device).repeat(h) * regions // w
+    for r in range(regions):
+        vectors[r, r*text_len:(r+1)*text_len] = True
+        vectors[r, regions*text_len:]         = stripe == r
+    return (vectors.unsqueeze(2) & vectors.unsqueeze(1)).any(dim=0)
+
+
+def timed(fn, *args, repeats=3, **kwargs):
+    out = fn(*args, **kwargs)
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        out = fn(*args, **kwargs)
+    if torch.cuda.is_available():
+        torch.cuda.synchronize()
+    return out, (time.perf_counter() - start) / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time attention_regional against dense masked attention_pytorch for a regional mask.")
+    parser.add_argument('--comfyui', type=str, default=os.getcwd(), help="Path to the ComfyUI install (default: current directory).")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[16, 32, 48], help="Image token grid height/width to test.")
+    parser.add_argument('--regions', type=int, nargs='+', default=[2, 4])
+    parser.add_argument('--text_len', type=int, default=64, help="Text tokens per region.")
+    parser.add_argument('--heads', type=int, default=8)
+    parser.add_argument('--dim_head', type=int, default=64)
+    parser.add_argument('--dtype', type=str, default='float32')
+    parser.add_argument('--device', type=str, default='cpu')
+
+    args  = parser.parse_args()
+    fmath = load_flux_math(args.comfyui)
+    dtype = getattr(torch, args.dtype)
+
+    for size in args.sizes:
+        for regions in args.regions:
+            mask = regional_mask(regions, args.text_len, size, size, args.device)
+            L    = mask.shape[0]
+            q, k, v = (torch.randn(1, args.heads, L, args.dim_head, device=args.device, dtype=dtype) for _ in range(3))
+
+            ref, t_dense    = timed(fmath.attention_pytorch,  q, k, v, args.heads, skip_reshape=True, mask=mask)
+            out, t_regional = timed(fmath.attention_regional, q, k, v, args.heads, skip_reshape=True, mask=mask)
+            groups          = len(fmath.get_region_groups(mask))
+
+            print(f"{size}x{size} img, {regions} regions, L={L}, {groups} groups: dense {t_dense*1000:.1f} ms, regional {t_regional*1000:.1f} ms, {t_dense/t_regional:.2f}x, max abs diff {(out - ref).abs().max().item():.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import argparse
+import importlib
+import os
+import sys
+
+import torch
+
+
+def load_attention_masks(comfyui_path):
+    """attention_masks imports comfy, so this has to run against a ComfyUI install."""
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, comfyui_path)
+    sys.path.insert(0, os.path.dirname(repo))
+    return importlib.import_module(os.path.basename(repo) + ".attention_masks")
+
+
+def stripe_masks(regions, frames, h, w, dtype):
+    """Each region owns a vertical stripe of the image, given at the token grid size so generate() interpolates nothing."""
+    stripe = torch.arange(w).expand(frames, h, w) * regions // w
+    return [(stripe == r).to(dtype) for r in range(regions)]
+
+
+def reference_rows(rows, masks, text_len, text_rows):
+    """
+    Dense rows straight from the definition: a text token attends to its own span and its region's image, an image token
+    to the text spans and image tokens of every region it is in.
+    """
+    regions  = len(masks)
+    img      = torch.stack([mask.flatten() for mask in masks])                          # regions, frames*h*w
+    text     = torch.zeros(regions, regions * text_len, dtype=img.dtype)
+    for r in range(regions):
+        text[r, r*text_len:(r+1)*text_len] = 1
+    vectors  = torch.cat([text, img], dim=1)                                            # regions, L
+    row_vecs = vectors if text_rows else img
+    return torch.minimum(row_vecs[:, rows].unsqueeze(2), vectors.unsqueeze(1)).amax(dim=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host memory, transfer size and device peak of the regional attention masks FullAttentionMask (Flux) and SplitAttentionMask (Wan) generate, against their dense size.")
+    parser.add_argument('--comfyui', type=str, default=os.getcwd(), help="Path to the ComfyUI install (default: current directory).")
+    parser.add_argument('--shapes', type=str, nargs='+', default=['full:1x64x64', 'full:1x128x128', 'split:13x30x52', 'split:21x30x52'], help="full|split:frames x height x width of the image token grid.")
+    parser.add_argument('--regions', type=int, default=2)
+    parser.add_argument('--text_len', type=int, default=256, help="Text tokens per region.")
+    parser.add_argument('--dtype', type=str, default='float16')
+    parser.add_argument('--device', type=str, default='cuda' if torch.cuda.is_available() else 'cpu')
+
+    args  = parser.parse_args()
+    am    = load_attention_masks(args.comfyui)
+    dtype = getattr(torch, args.dtype)
+    cuda  = args.device.startswith('cuda')
+
+    for spec in args.shapes:
+        kind, shape  = spec.split(':')
+        frames, h, w = (int(x) for x in shape.split('x'))
+        masks        = stripe_masks(args.regions, frames, h, w, dtype)
+
+        if kind == 'full':
+            AttnMask = am.FullAttentionMask(mask_type="gradient", dtype=dtype)
+            latent   = torch.zeros(1, 16, 2*h, 2*w)
+            masks    = [mask[0] for mask in masks]
+        else:
+            AttnMask = am.SplitAttentionMask(mask_type="gradient", dtype=dtype)
+            latent   = torch.zeros(1, 16, frames, 2*h, 2*w)
+        AttnMask.set_latent(latent)
+        for mask in masks:
+            AttnMask.add_region(torch.zeros(1, args.text_len, 1), mask.clone())
+        AttnMask.generate()
+
+        core     = AttnMask.attn_mask
+        regional = core.regional
+        if cuda:
+            torch.cuda.synchronize()
+            torch.cuda.reset_peak_memory_stats()
+            base = torch.cuda.memory_allocated()
+        mask = core.to_device(args.device)
+        peak = torch.cuda.max_memory_allocated() - base if cuda else float('nan')
+
+        rows = torch.randperm(mask.shape[0])[:256]
+        ref  = reference_rows(rows, masks, args.text_len, text_rows=(kind == 'full'))
+        diff = (mask[rows.to(args.device)].cpu() - ref).abs().max().item()
+
+        print(f"{spec} mask {tuple(mask.shape)}: compact {regional.nbytes/2**10:.1f} KiB on host, {core.bytes_transferred/2**10:.1f} KiB transferred, "
+              f"dense {regional.dense_nbytes/2**20:.1f} MiB, still built on the device: peak {peak/2**20:.1f} MiB, max abs diff {diff:.1e}")
+
+if __name__ == "__main__":
+    main()
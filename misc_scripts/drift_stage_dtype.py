@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import argparse
+import importlib
+import os
+import sys
+from types import SimpleNamespace
+
+import torch
+
+
+def load_beta(comfyui_path):
+    """The beta modules import comfy, so this has to run against a ComfyUI install."""
+    repo = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, comfyui_path)
+    sys.path.insert(0, os.path.dirname(repo))
+    package = os.path.basename(repo)
+    rk_coefficients = importlib.import_module(package + ".beta.rk_coefficients_beta")
+    rk_sampler      = importlib.import_module(package + ".beta.rk_sampler_beta")
+    return rk_coefficients, rk_sampler
+
+
+class GaussianModel:
+    """
+    Stands in for the wrapped model comfy hands to samplers: model(x, sigma, **extra_args) -> denoised, with the
+    attributes sample_rk_beta() reads under inner_model.inner_model. The denoiser is exact for data ~ N(mu, sigma_data^2)
+    under x = x0 + sigma * noise, so every rk_type sees the same smooth ODE.
+    """
+    def __init__(self, mu, sigma_data, device):
+        import comfy.model_sampling
+
+        class ModelSampling(comfy.model_sampling.ModelSamplingDiscrete, comfy.model_sampling.EPS):
+            pass
+
+        self.mu          = mu
+        self.sigma_data  = sigma_data
+        self.inner_model = SimpleNamespace(
+            conds       = {},
+            inner_model = SimpleNamespace(device=torch.device(device), model_sampling=ModelSampling(), diffusion_model=SimpleNamespace()),
+        )
+
+    def __call__(self, x, sigma, **extra_args):
+        sigma = sigma.to(torch.float64).view(-1, *[1] * (x.ndim - 1))
+        return (self.mu + self.sigma_data**2 / (self.sigma_data**2 + sigma**2) * (x.to(torch.float64) - self.mu)).to(x.dtype)   # the model's output dtype, not mu's
+
+
+def sample(rk_sampler, model, rk_type, x, sigmas, extra_options):
+    extra_args = {"model_options": {"transformer_options": {}}, "seed": 0}
+    out = rk_sampler.sample_rk_beta(model, x.clone(), sigmas.clone(), extra_args=extra_args, disable=True, rk_type=rk_type, eta=0.0, eta_substep=0.0, extra_options=extra_options)
+    return out.to(torch.float64)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drift of the final latent from sample_rk_beta() with stage_dtype=float32/bfloat16 against the float64 path, for every explicit rk_type.")
+    parser.add_argument('--comfyui', type=str, default=os.getcwd(), help="Path to the ComfyUI install (default: current directory).")
+    parser.add_argument('--steps', type=int, default=30)
+    parser.add_argument('--size', type=int, default=64, help="Latent height/width.")
+    parser.add_argument('--channels', type=int, default=16)
+    parser.add_argument('--stage_dtypes', type=str, nargs='+', default=['float32', 'bfloat16'])
+    parser.add_argument('--rk_types', type=str, nargs='*', default=None, help="Default: every explicit rk_type.")
+    parser.add_argument('--tolerance', type=float, default=1e-3, help="Relative L2 drift reported as FAIL above this, for float32.")
+    parser.add_argument('--device', type=str, default='cuda' if torch.cuda.is_available() else 'cpu')
+
+    args = parser.parse_args()
+    rk_coefficients, rk_sampler = load_beta(args.comfyui)
+
+    rk_types = args.rk_types or [rk_type for rk_type in rk_coefficients.RK_SAMPLER_NAMES_BETA_NO_FOLDERS if rk_type not in rk_coefficients.IRK_SAMPLER_NAMES_BETA_NO_FOLDERS]
+
+    generator = torch.Generator(device=args.device).manual_seed(0)
+    shape     = (1, args.channels, args.size, args.size)
+    mu        = torch.randn(shape, generator=generator, device=args.device, dtype=torch.float64)
+    model     = GaussianModel(mu, 0.5, args.device)
+    sigmas    = torch.cat((torch.linspace(14.6 ** (1/7), 0.03 ** (1/7), args.steps, dtype=torch.float64, device=args.device) ** 7, torch.zeros(1, dtype=torch.float64, device=args.device)))
+    x         = torch.randn(shape, generator=generator, device=args.device, dtype=torch.float64) * sigmas[0]
+
+    failed = []
+    for rk_type in rk_types:
+        try:
+            ref = sample(rk_sampler, model, rk_type, x, sigmas, "")
+        except Exception as e:
+            print(f"{rk_type:<32} skipped: {type(e).__name__}: {e}")
+            continue
+
+        results = []
+        for stage_dtype in args.stage_dtypes:
+            out   = sample(rk_sampler, model, rk_type, x, sigmas, f"stage_dtype={stage_dtype}")
+            drift = ((out - ref).norm() / ref.norm()).item()
+            results.append(f"{stage_dtype} {drift:.2e}")
+            if stage_dtype == 'float32' and not drift < args.tolerance:
+                failed.append(rk_type)
+
+        print(f"{rk_type:<32} " + "   ".join(results))
+
+    print(f"\n{len(failed)} rk_types above tolerance {args.tolerance:g} for float32" + (": " + ", ".join(failed) if failed else ""))
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
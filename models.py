@@ -195,6 +195,9 @@ class ReWanPatcherAdvanced:
                 "enable"                   : ("BOOLEAN", {"default": True}),
                 "sliding_window_self_attn" : (['false', 'standard', 'circular'], {"default": "false"}),
                 "sliding_window_frames"    : ("INT",   {"default": 60,   "min": 4,    "max": 0xffffffffffffffff, "step": 4, "tooltip": "How many real frames each frame sees. Divide frames by 4 to get real frames."}),
+            },
+            "optional": {
+                "sliding_window_batch"     : ("INT",   {"default": 4,    "min": 1,    "max": 64,                 "step": 1, "tooltip": "How many latent frames with sliding windows share one attention call. Higher is fewer launches, but more memory for the gathered windows."}),
             }
         }
     RETURN_TYPES = ("MODEL",)
@@ -202,7 +205,7 @@ class ReWanPatcherAdvanced:
     CATEGORY     = "RES4LYF/model_patches"
     FUNCTION     = "main"
 
-    def main(self, model, self_attn_blocks, cross_attn_blocks, sliding_window_self_attn="false", sliding_window_frames=60, style_dtype="float32", enable=True, force=False):
+    def main(self, model, self_attn_blocks, cross_attn_blocks, sliding_window_self_attn="false", sliding_window_frames=60, style_dtype="float32", enable=True, force=False, sliding_window_batch=4):
         
         model.model.diffusion_model.style_dtype = getattr(torch, style_dtype) if style_dtype != "default" else None
         model.model.diffusion_model.proj_weights = None
@@ -227,6 +230,7 @@ class ReWanPatcherAdvanced:
                         block.self_attn.__class__ = ReWanSlidingSelfAttention
                         block.self_attn.winderz = sliding_window_size
                         block.self_attn.winderz_type = sliding_window_self_attn
+                        block.self_attn.winderz_batch = sliding_window_batch
                     else:
                         block.self_attn.__class__  = ReWanSelfAttention
                         block.self_attn.winderz_type = "false"
@@ -238,6 +242,7 @@ class ReWanPatcherAdvanced:
                             block.cross_attn.__class__ = ReWanT2VSlidingCrossAttention
                             block.cross_attn.winderz = sliding_window_size
                             block.cross_attn.winderz_type = sliding_window_self_attn
+                            block.cross_attn.winderz_batch = sliding_window_batch
                         else:
                             block.cross_attn.__class__ = ReWanT2VCrossAttention
 
@@ -254,6 +259,7 @@ class ReWanPatcherAdvanced:
                 if i in self_attn_blocks:
                     block.self_attn.winderz = sliding_window_size
                     block.self_attn.winderz_type = sliding_window_self_attn
+                    block.self_attn.winderz_batch = sliding_window_batch
         
         elif not enable and model.model.diffusion_model.__class__ == ReWanModel:
             m = model.clone()
@@ -308,6 +314,9 @@ class ReFluxPatcherAdvanced:
                 "singlestream_blocks" : ("STRING",  {"default": "all", "multiline": True}),
                 "style_dtype"         : (["default", "bfloat16", "float16", "float32", "float64"],  {"default": "float64"}),
                 "enable"              : ("BOOLEAN", {"default": True}),
+            },
+            "optional": {
+                "attn_backend"        : (["dense", "regional"],  {"default": "dense"}),
             }
         }
     RETURN_TYPES = ("MODEL",)
@@ -315,7 +324,7 @@ class ReFluxPatcherAdvanced:
     CATEGORY     = "RES4LYF/model_patches"
     FUNCTION     = "main"
 
-    def main(self, model, doublestream_blocks, singlestream_blocks, style_dtype, enable=True, force=False):
+    def main(self, model, doublestream_blocks, singlestream_blocks, style_dtype, enable=True, force=False, attn_backend="dense"):
         
         doublestream_blocks = parse_range_string(doublestream_blocks)
         singlestream_blocks = parse_range_string(singlestream_blocks)
@@ -324,6 +333,8 @@ class ReFluxPatcherAdvanced:
         model.model.diffusion_model.proj_weights = None
         model.model.diffusion_model.y0_adain_embed = None
         model.model.diffusion_model.adain_pw_cache = None
+        model.model.diffusion_model.style_ref_cache = {}
+        model.model.diffusion_model.step_invariant_cache = {}
         
         if (enable or force) and model.model.diffusion_model.__class__ == Flux:
             m = model.clone()
@@ -335,14 +346,16 @@ class ReFluxPatcherAdvanced:
                     block.__class__ = ReDoubleStreamBlock
                 else:
                     block.__class__ = ReDoubleStreamBlockNoMask
-                block.idx       = i
+                block.idx          = i
+                block.attn_backend = attn_backend
 
             for i, block in enumerate(m.model.diffusion_model.single_blocks):
                 if i in singlestream_blocks:
                     block.__class__ = ReSingleStreamBlock
                 else:
                     block.__class__ = ReSingleStreamBlockNoMask
-                block.idx       = i
+                block.idx          = i
+                block.attn_backend = attn_backend
                 
         
         elif not enable and model.model.diffusion_model.__class__ == ReFlux:
@@ -373,17 +386,21 @@ class ReFluxPatcher(ReFluxPatcherAdvanced):
                 "model"       : ("MODEL",),
                 "style_dtype" : (["default", "bfloat16", "float16", "float32", "float64"],  {"default": "float64"}),
                 "enable"      : ("BOOLEAN", {"default": True}),
+            },
+            "optional": {
+                "attn_backend": (["dense", "regional"],  {"default": "dense"}),
             }
         }
 
-    def main(self, model, style_dtype="float32", enable=True, force=False):
+    def main(self, model, style_dtype="float32", enable=True, force=False, attn_backend="dense"):
         return super().main(
             model               = model,
             doublestream_blocks = "all",
             singlestream_blocks = "all",
             style_dtype         = style_dtype,
             enable              = enable,
-            force               = force
+            force               = force,
+            attn_backend        = attn_backend,
         )    
 
 
@@ -449,6 +466,9 @@ class ReChromaPatcherAdvanced:
                 "singlestream_blocks" : ("STRING",  {"default": "all", "multiline": True}),
                 "style_dtype"         : (["default", "bfloat16", "float16", "float32", "float64"],  {"default": "float64"}),
                 "enable"              : ("BOOLEAN", {"default": True}),
+            },
+            "optional": {
+                "attn_backend"        : (["dense", "regional"],  {"default": "dense"}),
             }
         }
     RETURN_TYPES = ("MODEL",)
@@ -456,7 +476,7 @@ class ReChromaPatcherAdvanced:
     CATEGORY     = "RES4LYF/model_patches"
     FUNCTION     = "main"
 
-    def main(self, model, doublestream_blocks, singlestream_blocks, style_dtype, enable=True, force=False):
+    def main(self, model, doublestream_blocks, singlestream_blocks, style_dtype, enable=True, force=False, attn_backend="dense"):
         
         doublestream_blocks = parse_range_string(doublestream_blocks)
         singlestream_blocks = parse_range_string(singlestream_blocks)
@@ -475,14 +495,16 @@ class ReChromaPatcherAdvanced:
                     block.__class__ = ReChromaDoubleStreamBlock
                 else:
                     block.__class__ = ReChromaDoubleStreamBlockNoMask
-                block.idx       = i
+                block.idx          = i
+                block.attn_backend = attn_backend
 
             for i, block in enumerate(m.model.diffusion_model.single_blocks):
                 if i in singlestream_blocks:
                     block.__class__ = ReChromaSingleStreamBlock
                 else:
                     block.__class__ = ReChromaSingleStreamBlockNoMask
-                block.idx       = i
+                block.idx          = i
+                block.attn_backend = attn_backend
                 
         
         elif not enable and model.model.diffusion_model.__class__ == ReChroma:
@@ -513,17 +535,21 @@ class ReChromaPatcher(ReChromaPatcherAdvanced):
                 "model"       : ("MODEL",),
                 "style_dtype" : (["default", "bfloat16", "float16", "float32", "float64"],  {"default": "float64"}),
                 "enable"      : ("BOOLEAN", {"default": True}),
+            },
+            "optional": {
+                "attn_backend": (["dense", "regional"],  {"default": "dense"}),
             }
         }
 
-    def main(self, model, style_dtype="float32", enable=True, force=False):
+    def main(self, model, style_dtype="float32", enable=True, force=False, attn_backend="dense"):
         return super().main(
             model               = model,
             doublestream_blocks = "all",
             singlestream_blocks = "all",
             style_dtype         = style_dtype,
             enable              = enable,
-            force               = force
+            force               = force,
+            attn_backend        = attn_backend,
         )    
 
 
@@ -770,6 +796,9 @@ class ReHiDreamPatcherAdvanced:
                 "single_stream_blocks" : ("STRING",  {"default": "all", "multiline": True}),
                 "style_dtype"          : (["default", "bfloat16", "float16", "float32", "float64"],  {"default": "float64"}),
                 "enable"               : ("BOOLEAN", {"default": True}),
+            },
+            "optional": {
+                "attn_backend"         : (["dense", "regional"],  {"default": "dense"}),
             }
         }
     RETURN_TYPES = ("MODEL",)
@@ -777,7 +806,7 @@ class ReHiDreamPatcherAdvanced:
     CATEGORY     = "RES4LYF/model_patches"
     FUNCTION     = "main"
 
-    def main(self, model, double_stream_blocks, single_stream_blocks, style_dtype, enable=True, force=False):
+    def main(self, model, double_stream_blocks, single_stream_blocks, style_dtype, enable=True, force=False, attn_backend="dense"):
         
         double_stream_blocks = parse_range_string(double_stream_blocks)
         single_stream_blocks = parse_range_string(single_stream_blocks)
@@ -808,6 +837,7 @@ class ReHiDreamPatcherAdvanced:
                 block.idx             = i
                 block.block.idx       = i
                 block.block.attn1.idx = i
+                block.block.attn1.attn_backend = attn_backend
 
             for i, block in enumerate(m.model.diffusion_model.single_stream_blocks):
                 if i in single_stream_blocks:
@@ -825,6 +855,7 @@ class ReHiDreamPatcherAdvanced:
                 block.idx             = i
                 block.block.idx       = i
                 block.block.attn1.idx = i
+                block.block.attn1.attn_backend = attn_backend
 
         elif not enable and model.model.diffusion_model.__class__ == HDModel:
             m = model.clone()
@@ -860,17 +891,21 @@ class ReHiDreamPatcher(ReHiDreamPatcherAdvanced):
                 "model"       : ("MODEL",),
                 "style_dtype" : (["default", "bfloat16", "float16", "float32", "float64"],  {"default": "float64"}),
                 "enable"      : ("BOOLEAN", {"default": True}),
+            },
+            "optional": {
+                "attn_backend": (["dense", "regional"],  {"default": "dense"}),
             }
         }
 
-    def main(self, model, style_dtype="default", enable=True, force=False):
+    def main(self, model, style_dtype="default", enable=True, force=False, attn_backend="dense"):
         return super().main(
             model                = model,
             double_stream_blocks = "all",
             single_stream_blocks = "all",
             style_dtype          = style_dtype,
             enable               = enable,
-            force                = force
+            force                = force,
+            attn_backend         = attn_backend,
         )    
 
 
@@ -888,6 +923,9 @@ class ReSD35PatcherAdvanced:
                 "joint_blocks" : ("STRING",  {"default": "all", "multiline": True}),
                 "style_dtype"  : (["default", "bfloat16", "float16", "float32", "float64"],  {"default": "float64"}),
                 "enable"       : ("BOOLEAN", {"default": True}),
+            },
+            "optional": {
+                "attn_backend" : (["dense", "regional"],  {"default": "dense"}),
             }
         }
     RETURN_TYPES = ("MODEL",)
@@ -895,7 +933,7 @@ class ReSD35PatcherAdvanced:
     CATEGORY     = "RES4LYF/model_patches"
     FUNCTION     = "main"
 
-    def main(self, model, joint_blocks, style_dtype, enable=True, force=False):
+    def main(self, model, joint_blocks, style_dtype, enable=True, force=False, attn_backend="dense"):
         
         model.model.diffusion_model.style_dtype = getattr(torch, style_dtype) if style_dtype != "default" else None
         model.model.diffusion_model.proj_weights = None
@@ -913,7 +951,8 @@ class ReSD35PatcherAdvanced:
                     block.__class__ = ReJointBlock
                 else:
                     ReJointBlockNoMask
-                block.idx       = i
+                block.idx          = i
+                block.attn_backend = attn_backend
 
         elif not enable and model.model.diffusion_model.__class__ == ReOpenAISignatureMMDITWrapper:
             m = model.clone()
@@ -937,16 +976,20 @@ class ReSD35Patcher(ReSD35PatcherAdvanced):
                 "model"       : ("MODEL",),
                 "style_dtype" : (["default", "bfloat16", "float16", "float32", "float64"],  {"default": "float64"}),
                 "enable"      : ("BOOLEAN", {"default": True}),
+            },
+            "optional": {
+                "attn_backend": (["dense", "regional"],  {"default": "dense"}),
             }
         }
 
-    def main(self, model, style_dtype="float32", enable=True, force=False):
+    def main(self, model, style_dtype="float32", enable=True, force=False, attn_backend="dense"):
         return super().main(
             model        = model,
             joint_blocks = "all",
             style_dtype  = style_dtype,
             enable       = enable,
-            force        = force
+            force        = force,
+            attn_backend = attn_backend,
         )    
 
 class ReDoubleAttentionNoMask(ReDoubleAttention):
@@ -16,6 +16,7 @@ import comfy.ops
 import comfy.ldm.common_dit
 
 from ..helper import ExtraOptions
+from ..flux.math import attention_regional
 
 
 #from .attention import optimized_attention
@@ -618,7 +619,7 @@ def block_mixing(*args, use_checkpoint=True, **kwargs):
         return _block_mixing(*args, **kwargs)
 
 # context_qkv = Tuple[Tensor,Tensor,Tensor] 2,154,1536 2,154,1536 2,154,24,64             x_qkv 2,4096,1536, ..., 2,4096,24,64
-def _block_mixing(context, x, context_block, x_block, c, mask=None):
+def _block_mixing(context, x, context_block, x_block, c, mask=None, attn_backend="dense"):
     context_qkv, context_intermediates = context_block.pre_attention(context, c)
 
     if x_block.x_block_self_attn:  # x_qkv2 = self-attn?
@@ -631,7 +632,13 @@ def _block_mixing(context, x, context_block, x_block, c, mask=None):
         o.append(torch.cat((context_qkv[t], x_qkv[t]), dim=1))
     qkv = tuple(o)
 
-    if mask is not None:
+    if mask is not None and attn_backend == "regional":
+        attn = attention_regional(
+            qkv[0], qkv[1], qkv[2],
+            heads = x_block.attn.num_heads,
+            mask  = mask,
+        )
+    elif mask is not None:
         attn = attention_pytorch(      #1,4186,1536    
             qkv[0], qkv[1], qkv[2],
             heads = x_block.attn.num_heads,
@@ -667,6 +674,7 @@ def _block_mixing(context, x, context_block, x_block, c, mask=None):
 
 class ReJointBlock(nn.Module):
     """just a small wrapper to serve as a fsdp unit"""
+    attn_backend = "dense"      # "regional" is set per block by ReSD35Patcher
 
     def __init__(
         self,
@@ -682,7 +690,7 @@ class ReJointBlock(nn.Module):
 
     def forward(self, *args, **kwargs):  # context_block, x_block are DismantledBlock
         return block_mixing(                      # args = Tuple[Tensor,Tensor]   2,154,1536   2,4096,1536
-            *args, context_block=self.context_block, x_block=self.x_block, **kwargs
+            *args, context_block=self.context_block, x_block=self.x_block, attn_backend=self.attn_backend, **kwargs
         )
 
 
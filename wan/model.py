@@ -102,6 +102,93 @@ def attention_weights(q, k):
 
 
 
+SLIDING_WINDOW_PLANS      = {}
+SLIDING_WINDOW_PLANS_SIZE = 16
+
+def get_sliding_window_plan(total_frames, window_size, window_type="standard", frames_per_launch=4, device=None):
+    """
+    Attention launches for frame-windowed attention as (first q frame, end q frame, first kv frame, kv frames, sliding).
+    Query frames that share a window run in one launch; with sliding=True each successive query frame's window starts
+    one kv frame later. For "circular" windows the kv frames index a sequence wrapped by half the window on both sides,
+    built with the returned index (None for "standard"). Cached per frame count, window and device.
+    """
+    key = (total_frames, window_size, window_type, frames_per_launch, str(device))
+    if key in SLIDING_WINDOW_PLANS:
+        SLIDING_WINDOW_PLANS[key] = SLIDING_WINDOW_PLANS.pop(key)
+        return SLIDING_WINDOW_PLANS[key]
+    
+    half_window = window_size // 2
+    windows     = []
+    for i in range(total_frames):
+        if window_type == "circular":
+            windows.append((i, 2 * half_window + 1))
+        else:
+            start = max(0, i - half_window)
+            end   = min(total_frames, i + half_window + 1)
+            # Shift window if it would be too short
+            if end - start < window_size:
+                if start == 0:
+                    end = min(total_frames, start + window_size)
+                elif end == total_frames:
+                    start = max(0, end - window_size)
+            windows.append((start, end - start))
+    
+    launches = []
+    i = 0
+    while i < total_frames:
+        start, length = windows[i]
+        j = i + 1
+        while j < total_frames and windows[j] == windows[i]:
+            j += 1
+        if j > i + 1:
+            launches.append((i, j, start, length, False))
+        else:                                       # stop before a frame that opens a shared window
+            while j < min(total_frames, i + frames_per_launch) and windows[j] == (start + j - i, length) and (j + 1 == total_frames or windows[j + 1] != windows[j]):
+                j += 1
+            launches.append((i, j, start, length, True))
+        i = j
+    
+    wrap_idx = None
+    if window_type == "circular":
+        wrap_idx = torch.arange(-half_window, total_frames + half_window, device=device) % total_frames
+    
+    if len(SLIDING_WINDOW_PLANS) >= SLIDING_WINDOW_PLANS_SIZE:
+        SLIDING_WINDOW_PLANS.pop(next(iter(SLIDING_WINDOW_PLANS)))
+    SLIDING_WINDOW_PLANS[key] = (launches, wrap_idx)
+    return launches, wrap_idx
+
+
+def sliding_window_attention(q, k, v, heads, img_len, window_size, window_type="standard", frames_per_launch=4):
+    """
+    Each frame's tokens attend to the k/v tokens of a window of frames around it. q, k, v: [B, frames * img_len, C].
+    Shared windows are plain views of k/v, sliding windows are gathered with unfold up to frames_per_launch frames per launch.
+    """
+    b, s, c     = q.shape
+    frames      = s // img_len
+    launches, wrap_idx = get_sliding_window_plan(frames, window_size, window_type, max(1, frames_per_launch), q.device)
+    
+    if wrap_idx is not None:
+        k = k.reshape(b, frames, img_len, c).index_select(1, wrap_idx).view(b, -1, c)
+        v = v.reshape(b, frames, img_len, c).index_select(1, wrap_idx).view(b, -1, c)
+    
+    x = torch.empty_like(q)
+    for q_start, q_end, kv_start, kv_len, sliding in launches:
+        n = q_end - q_start
+        q_launch = q[:, q_start * img_len : q_end * img_len]
+        
+        if not sliding or n == 1:
+            k_launch = k[:, kv_start * img_len : (kv_start + kv_len) * img_len]
+            v_launch = v[:, kv_start * img_len : (kv_start + kv_len) * img_len]
+            x[:, q_start * img_len : q_end * img_len] = optimized_attention(q_launch, k_launch, v_launch, heads=heads)
+        else:
+            window   = lambda t: t.view(b, -1, img_len, c)[:, kv_start : kv_start + n + kv_len - 1].unfold(1, kv_len, 1).permute(0, 1, 4, 2, 3).reshape(b * n, kv_len * img_len, c)
+            x_launch = optimized_attention(q_launch.reshape(b * n, img_len, c), window(k), window(v), heads=heads)
+            x[:, q_start * img_len : q_end * img_len] = x_launch.reshape(b, n * img_len, c)
+    
+    return x
+
+
+
 class ReWanSlidingSelfAttention(nn.Module):
 
     def __init__(self,
@@ -121,6 +208,7 @@ class ReWanSlidingSelfAttention(nn.Module):
         self.eps         = eps
         self.winderz     = 15
         self.winderz_type= "standard"
+        self.winderz_batch = 4
 
         # layers
         self.q = operation_settings.get("operations").Linear(dim, dim, device=operation_settings.get("device"), dtype=operation_settings.get("dtype"))
@@ -151,55 +239,12 @@ class ReWanSlidingSelfAttention(nn.Module):
         # q,k.shape = 2,14040,12,128      v.shape = 2,14040,1536
     
         img_len = grid_sizes[1] * grid_sizes[2]
-        total_frames = int(q.shape[1] // img_len)
-
-        window_size = self.winderz
-        half_window = window_size // 2
 
         q_ = q.view(b, s, n * d)
         k_ = k.view(b, s, n * d)
-        x_list = []
-
-        for i in range(total_frames):
-            q_start =  i      * img_len
-            q_end   = (i + 1) * img_len
-
-            # circular frame indices for key/value window
-            center = i
-            #window_indices = [(center + offset) % total_frames for offset in range(-half_window, half_window + 1)]
-            if self.winderz_type == "standard":
-                start = max(0, center - half_window)
-                end   = min(total_frames, center + half_window + 1)
-                # Shift window if it would be too short
-                if end - start < window_size:
-                    if start == 0:
-                        end = min(total_frames, start + window_size)
-                    elif end == total_frames:
-                        start = max(0, end - window_size)
-
-                window_indices = list(range(start, end))
-            elif self.winderz_type == "circular":
-                window_indices = [(center + offset) % total_frames for offset in range(-half_window, half_window + 1)]
-            
-            # frame indices to token indices
-            token_indices = []
-            for frame in window_indices:
-                start = frame * img_len
-                token_indices.extend(range(start, start + img_len))
-
-            token_indices = torch.tensor(token_indices, device=q.device)
-
-            x = optimized_attention(
-                q_[:, q_start:q_end, :],           # [B, img_len, C]
-                k_.index_select(1, token_indices), # [B, window_size * img_len, C]
-                v .index_select(1, token_indices),
-                heads=self.num_heads,
-            )
-
-            x_list.append(x)
 
-        x = torch.cat(x_list, dim=1)
-        del x_list, q, k, v, q_, k_
+        x = sliding_window_attention(q_, k_, v, self.num_heads, img_len, self.winderz, self.winderz_type, self.winderz_batch)
+        del q, k, v, q_, k_
 
         x = self.o(x)
         return x
@@ -220,58 +265,9 @@ class ReWanT2VSlidingCrossAttention(ReWanSlidingSelfAttention):
         k = self.norm_k(self.k(context))
         v =             self.v(context)
 
-        img_len = grid_sizes[1] * grid_sizes[2]
-        total_frames = int(q.shape[1] // img_len)
-
-        window_size = self.winderz
-        half_window = window_size // 2
-        
-        b, s, n, d = *x.shape[:2], self.num_heads, self.head_dim
-        q_, k_ = q, k
-        #q_ = q.view(b, s, n * d)
-        #k_ = k.view(b, s, n * d)
-        x_list = []
-
-        for i in range(total_frames):
-            q_start =  i      * img_len
-            q_end   = (i + 1) * img_len
-
-            # circular frame indices for key/value window
-            center = i
-            #window_indices = [(center + offset) % total_frames for offset in range(-half_window, half_window + 1)]
-            if self.winderz_type == "standard":
-                start = max(0, center - half_window)
-                end   = min(total_frames, center + half_window + 1)
-                # Shift window if it would be too short
-                if end - start < window_size:
-                    if start == 0:
-                        end = min(total_frames, start + window_size)
-                    elif end == total_frames:
-                        start = max(0, end - window_size)
-
-                window_indices = list(range(start, end))
-            elif self.winderz_type == "circular":
-                window_indices = [(center + offset) % total_frames for offset in range(-half_window, half_window + 1)]
-            
-            # frame indices to token indices
-            token_indices = []
-            for frame in window_indices:
-                start = frame * img_len
-                token_indices.extend(range(start, start + img_len))
-
-            token_indices = torch.tensor(token_indices, device=q.device)
-
-            x = optimized_attention(
-                q_[:, q_start:q_end, :],           # [B, img_len, C]
-                k_, #.index_select(1, token_indices), # [B, window_size * img_len, C]
-                v , #.index_select(1, token_indices),
-                heads=self.num_heads,
-            )
-
-            x_list.append(x)
-
-        x = torch.cat(x_list, dim=1)
-        del x_list, q, k, v, q_, k_
+        # k/v come from the context, so every frame attends to all of it and the frames need no separate launches
+        x = optimized_attention(q, k, v, heads=self.num_heads)
+        del q, k, v
 
         x = self.o(x)
         return x